@@ -4,79 +4,31 @@ Comprehensive CSV Analysis Tool for Civ VI Log Files
 Analyzes all CSV files in the logs directory and generates detailed documentation
 """
 
-import pandas as pd
 import os
 import numpy as np
 from pathlib import Path
 import json
 from datetime import datetime
 
+from csv_analysis_cache import DEFAULT_CACHE_PATH, CSVAnalysisCache
+from csv_profiler import profile_csv, profile_csvs
+
 class CivCSVAnalyzer:
-    def __init__(self):
+    def __init__(self, cache_path=DEFAULT_CACHE_PATH):
         # Path to Civ VI logs directory
         self.logs_path = Path(os.path.expandvars(r"${LOCALAPPDATA}\Firaxis Games\Sid Meier's Civilization VI\Logs"))
         self.analysis_results = {}
         self.markdown_docs = []
+        # Results of unchanged files are reused (csv_analysis_cache.py); None re-profiles everything
+        self.cache = CSVAnalysisCache(cache_path) if cache_path else None
         
     def analyze_csv_file(self, csv_path):
         """Analyze a single CSV file and return comprehensive metadata"""
-        try:
-            print(f"📊 Analyzing {csv_path.name}...")
-            
-            # Read the CSV file
-            df = pd.read_csv(csv_path)
-            
-            # Basic file info
-            file_info = {
-                'filename': csv_path.name,
-                'file_size_kb': round(csv_path.stat().st_size / 1024, 2),
-                'row_count': len(df),
-                'column_count': len(df.columns),
-                'columns': list(df.columns),
-                'dtypes': {col: str(dtype) for col, dtype in df.dtypes.items()},
-                'memory_usage_mb': round(df.memory_usage(deep=True).sum() / 1024 / 1024, 2)
-            }
-            
-            # Column analysis
-            column_analysis = {}
-            for col in df.columns:
-                col_data = {
-                    'data_type': str(df[col].dtype),
-                    'non_null_count': df[col].count(),
-                    'null_count': df[col].isnull().sum(),
-                    'unique_values': df[col].nunique(),
-                }
-                
-                # Sample values (first 5 non-null)
-                sample_values = df[col].dropna().head(5).tolist()
-                col_data['sample_values'] = sample_values
-                
-                # For numeric columns, add statistical info
-                if df[col].dtype in ['int64', 'float64']:
-                    col_data['min_value'] = df[col].min() if not df[col].empty else None
-                    col_data['max_value'] = df[col].max() if not df[col].empty else None
-                    col_data['mean_value'] = round(df[col].mean(), 2) if not df[col].empty else None
-                
-                # For string columns, show value distribution if reasonable
-                if df[col].dtype == 'object' and df[col].nunique() <= 20:
-                    col_data['value_counts'] = df[col].value_counts().head(10).to_dict()
-                
-                column_analysis[col] = col_data
-            
-            file_info['column_analysis'] = column_analysis
-            
-            # Data preview (first few rows)
-            file_info['data_preview'] = df.head(3).to_dict('records')
-            
-            return file_info
-            
-        except Exception as e:
-            print(f"❌ Error analyzing {csv_path.name}: {str(e)}")
-            return {
-                'filename': csv_path.name,
-                'error': str(e),
-                'file_size_kb': round(csv_path.stat().st_size / 1024, 2) if csv_path.exists() else 0
-            }
+        print(f"📊 Analyzing {csv_path.name}...")
+        file_info = profile_csv(csv_path)
+        if 'error' in file_info:
+            print(f"❌ Error analyzing {csv_path.name}: {file_info['error']}")
+        return file_info
     
     def generate_markdown_doc(self, file_info):
         """Generate markdown documentation for a CSV file"""
@@ -154,17 +106,27 @@ class CivCSVAnalyzer:
         md_content += "\n---\n\n"
         return md_content
     
-    def analyze_all_csvs(self):
-        """Analyze all CSV files in the logs directory"""
+    def analyze_all_csvs(self, n_jobs=None):
+        """Analyze all CSV files in the logs directory (in parallel, see csv_profiler.py)"""
         print(f"🔍 Scanning CSV files in: {self.logs_path}")
         
         csv_files = list(self.logs_path.glob("*.csv"))
         print(f"📂 Found {len(csv_files)} CSV files")
         
-        # Analyze each file
-        for csv_file in sorted(csv_files):
-            file_info = self.analyze_csv_file(csv_file)
-            self.analysis_results[csv_file.name] = file_info
+        # Profile new and modified files, then document them all in name order
+        if self.cache is not None:
+            results = self.cache.analyze(sorted(csv_files), n_jobs=n_jobs)
+            self.cache.prune(csv_files)
+            self.cache.save()
+            print(f"⚡ {self.cache.hits} unchanged files from cache, {self.cache.misses} profiled")
+        else:
+            results = profile_csvs(sorted(csv_files), n_jobs=n_jobs)
+        for filename, file_info in results.items():
+            if 'error' in file_info:
+                print(f"❌ Error analyzing {filename}: {file_info['error']}")
+            else:
+                print(f"📊 {filename}: {file_info['row_count']:,} rows, {file_info['column_count']} columns")
+            self.analysis_results[filename] = file_info
             
             # Generate markdown documentation
             md_doc = self.generate_markdown_doc(file_info)
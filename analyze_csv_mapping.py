@@ -7,6 +7,8 @@ import pandas as pd
 import os
 from pathlib import Path
 
+from log_schemas import read_log_csv
+
 def analyze_csv_files():
     """Analyze the CSV files to understand player ID mapping"""
     
@@ -38,7 +40,7 @@ def analyze_csv_files():
     dataframes = {}
     for name, file_path in main_files.items():
         if file_path.exists():
-            df = pd.read_csv(file_path)
+            df = read_log_csv(file_path)
             dataframes[name] = df
             print(f"\n✅ Loaded {name}: {df.shape[0]} rows, {df.shape[1]} columns")
         else:
@@ -59,21 +61,22 @@ def analyze_csv_files():
         # Show columns
         print(f"  📋 Columns: {list(df.columns)}")
         
-        # Filter to turn 1 if Game Turn column exists
-        if 'Game Turn' in df.columns:
-            turn1_data = df[df['Game Turn'] == 1]
+        # Filter to turn 1 if game_turn column exists
+        if 'game_turn' in df.columns:
+            turn1_data = df[df['game_turn'] == 1]
+            player_name = 'player_id' if name == 'scores' else 'player_name'
             print(f"  📈 Turn 1 records: {len(turn1_data)}")
             
             # Show first few rows of turn 1
             print(f"  📄 Turn 1 sample data:")
             for idx, row in turn1_data.head(10).iterrows():
-                if ' Player' in row:
-                    player_col = row[' Player'] if pd.notna(row[' Player']) else 'N/A'
+                if player_name in row:
+                    player_col = row[player_name] if pd.notna(row[player_name]) else 'N/A'
                     print(f"    Row {idx}: Player = {player_col}")
                 else:
                     print(f"    Row {idx}: {dict(row)}")
         else:
-            # Show first few rows if no Game Turn column
+            # Show first few rows if no game_turn column
             print(f"  📄 Sample data (first 5 rows):")
             for idx, row in df.head(5).iterrows():
                 print(f"    Row {idx}: {dict(row)}")
@@ -88,28 +91,28 @@ def analyze_csv_files():
         scores_df = dataframes['scores']
         
         # Get turn 1 data
-        if 'Game Turn' in stats_df.columns and 'Game Turn' in scores_df.columns:
-            turn1_stats = stats_df[stats_df['Game Turn'] == 1]
-            turn1_scores = scores_df[scores_df['Game Turn'] == 1]
+        if 'game_turn' in stats_df.columns and 'game_turn' in scores_df.columns:
+            turn1_stats = stats_df[stats_df['game_turn'] == 1]
+            turn1_scores = scores_df[scores_df['game_turn'] == 1]
             
             print(f"\n📊 Turn 1 Stats - Civilizations found:")
-            if ' Player' in turn1_stats.columns:
-                civs = turn1_stats[' Player'].tolist()
+            if 'player_name' in turn1_stats.columns:
+                civs = turn1_stats['player_name'].tolist()
                 for i, civ in enumerate(civs):
                     print(f"  Stats Row {i}: {civ}")
             
             print(f"\n📊 Turn 1 Scores - Player IDs found:")
-            if ' Player' in turn1_scores.columns:
-                players = turn1_scores[' Player'].tolist()
-                scores = turn1_scores[' Score'].tolist() if ' Score' in turn1_scores.columns else ['N/A'] * len(players)
+            if 'player_id' in turn1_scores.columns:
+                players = turn1_scores['player_id'].tolist()
+                scores = turn1_scores['total_score'].tolist() if 'total_score' in turn1_scores.columns else ['N/A'] * len(players)
                 for player, score in zip(players, scores):
                     print(f"  Player {player}: Score = {score}")
             
             # Try to correlate them
             print(f"\n🔗 CORRELATION ATTEMPT:")
             print("Current script assumes:")
-            if ' Player' in turn1_stats.columns:
-                sorted_civs = sorted(turn1_stats[' Player'].unique())
+            if 'player_name' in turn1_stats.columns:
+                sorted_civs = sorted(turn1_stats['player_name'].unique())
                 for i, civ in enumerate(sorted_civs):
                     print(f"  {civ} → Player {i}")
             
@@ -125,7 +128,7 @@ def analyze_csv_files():
     for csv_file in other_csvs:
         print(f"\n📄 Examining {csv_file.name}:")
         try:
-            df = pd.read_csv(csv_file)
+            df = read_log_csv(csv_file)
             print(f"  📏 Shape: {df.shape}")
             print(f"  📋 Columns: {list(df.columns)}")
             
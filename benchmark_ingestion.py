@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Ingestion Benchmark for stage4h_insert_data
+===========================================
+
+Replays the bundled civ6_*_cleaned_*.csv snapshots through the loader and
+reports rows/sec for the original iterrows + row-by-row path and the
+vectorized join + bulk COPY FROM STDIN / INSERT ... ON CONFLICT path.
+
+Usage:
+    python benchmark_ingestion.py          # row building, join and COPY buffer only
+    python benchmark_ingestion.py --db     # also write into a temp copy of civ_game_data
+
+The --db mode needs the local PostgreSQL container with an existing
+civ_game_data table. Everything is written to a TEMP table and rolled back.
+"""
+
+import argparse
+import glob
+import time
+
+import psycopg2
+
+from log_schemas import read_log_csv
+from stage4h_insert_data import (
+    KEY_LOG_COLUMNS, MAJOR_CIVILIZATIONS, build_turn_rows, build_civ_game_frame,
+    frame_to_rows, build_copy_buffer, upsert_sql, upsert_civ_rows
+)
+
+# Major civilizations of the game captured in the bundled snapshots
+BUNDLED_MAJOR_CIVILIZATIONS = MAJOR_CIVILIZATIONS | {
+    "CIVILIZATION_NORWAY",
+    "CIVILIZATION_MAPUCHE",
+    "CIVILIZATION_GERMANY",
+}
+
+BENCHMARK_GAME_ID = 'benchmark_game'
+
+def _latest_snapshot(pattern):
+    """Return the newest bundled snapshot matching a glob pattern"""
+    matches = sorted(glob.glob(pattern))
+    if not matches:
+        raise FileNotFoundError(f"No bundled snapshot matches {pattern}")
+    return matches[-1]
+
+def load_bundled_logs():
+    """Load the bundled cleaned CSVs with the columns the loader reads from the Civ VI Logs files"""
+    return {
+        'stats': read_log_csv(_latest_snapshot('civ6_player_stats_cleaned_*.csv'), columns=KEY_LOG_COLUMNS['stats']),
+        'stats2': read_log_csv(_latest_snapshot('civ6_player_stats_2_cleaned_*.csv'), columns=KEY_LOG_COLUMNS['stats2']),
+        'scores': read_log_csv(_latest_snapshot('civ6_game_scores_cleaned_*.csv'), columns=KEY_LOG_COLUMNS['scores'])
+    }
+
+def _timed(func):
+    """Run func once and return (result, elapsed seconds)"""
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+def benchmark_row_building(dataframes, civilizations):
+    """Time the original per-turn, per-civ row construction"""
+    turns = sorted(dataframes['stats']['game_turn'].unique())
+
+    def build_all():
+        rows = []
+        for turn in turns:
+            rows.extend(build_turn_rows(turn, dataframes, civilizations, verbose=False))
+        return rows
+
+    return _timed(build_all)
+
+def benchmark_frame_join(dataframes, civilizations):
+    """Time the single-pass (game_turn, player_name) join"""
+    return _timed(lambda: build_civ_game_frame(dataframes, major_civilizations=civilizations))
+
+def benchmark_database_writes(rows, civ_frame, db_config):
+    """Time row-by-row upserts against one COPY + ON CONFLICT batch into a temp copy of civ_game_data"""
+    conn = psycopg2.connect(**db_config)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "CREATE TEMP TABLE civ_game_data_bench "
+            "(LIKE civ_game_data INCLUDING DEFAULTS INCLUDING INDEXES)"
+        )
+        bench_upsert_sql = upsert_sql('civ_game_data_bench')
+        civ_frame = civ_frame.assign(game_id=BENCHMARK_GAME_ID)
+
+        def insert_rows():
+            for data in rows:
+                cursor.execute(bench_upsert_sql, [BENCHMARK_GAME_ID] + data)
+
+        _, insert_seconds = _timed(insert_rows)
+        cursor.execute("TRUNCATE civ_game_data_bench")
+        _, copy_seconds = _timed(lambda: upsert_civ_rows(cursor, civ_frame, table='civ_game_data_bench'))
+
+        return insert_seconds, copy_seconds
+    finally:
+        conn.rollback()
+        cursor.close()
+        conn.close()
+
+def _report(label, rows, seconds):
+    """Print one benchmark line"""
+    rate = rows / seconds if seconds > 0 else float('inf')
+    print(f"  {label:<36s} {rows:>8,d} rows  {seconds:8.3f}s  {rate:>12,.0f} rows/sec")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark civ_game_data ingestion paths")
+    parser.add_argument('--db', action='store_true',
+                        help="Also time INSERT vs COPY against the local PostgreSQL")
+    args = parser.parse_args()
+
+    print("⏱️  CIV VI INGESTION BENCHMARK")
+    print("=" * 70)
+
+    dataframes = load_bundled_logs()
+    for name, df in dataframes.items():
+        print(f"  📄 {name}: {df.shape[0]} rows, {df.shape[1]} columns")
+
+    print("\n🔧 Python-side preparation:")
+    rows, build_seconds = benchmark_row_building(dataframes, BUNDLED_MAJOR_CIVILIZATIONS)
+    _report("build rows (iterrows)", len(rows), build_seconds)
+
+    civ_frame, join_seconds = benchmark_frame_join(dataframes, BUNDLED_MAJOR_CIVILIZATIONS)
+    _report("build frame (vectorized join)", len(civ_frame), join_seconds)
+
+    if frame_to_rows(civ_frame) == rows:
+        print("  ✅ Vectorized join matches per-row output exactly")
+    else:
+        print("  ❌ Vectorized join output differs from per-row output")
+
+    _, buffer_seconds = _timed(lambda: build_copy_buffer(civ_frame))
+    _report("serialize COPY buffer", len(civ_frame), buffer_seconds)
+
+    if args.db:
+        print("\n💾 Database writes (temp table, rolled back):")
+        db_config = {
+            'host': 'localhost',
+            'port': 5432,
+            'database': 'civ6_analytics',
+            'user': 'civ6_user',
+            'password': 'civ6_password'
+        }
+        insert_seconds, copy_seconds = benchmark_database_writes(rows, civ_frame, db_config)
+        _report("before: iterrows + upsert per row", len(rows), build_seconds + insert_seconds)
+        _report("after: join + COPY + ON CONFLICT", len(rows), join_seconds + copy_seconds)
+        if copy_seconds > 0:
+            print(f"\n🚀 Write speed-up: {insert_seconds / copy_seconds:.1f}x")
+    else:
+        print("\nℹ️  Run with --db to time INSERT vs COPY against PostgreSQL")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Model Load Benchmark for model_registry
+=======================================
+
+Compares loading a RandomForest the old way (pickle of trained_model.pkl),
+through joblib, and through the model registry - both inside one warm
+process and as a cold start in a fresh interpreter, which is what
+predict_winner.py pays on every run.
+
+A synthetic forest is trained and saved to a temporary directory; the
+real models/ directory is not touched.
+
+Usage:
+    python benchmark_model_load.py                # 200 trees
+    python benchmark_model_load.py --trees 500
+"""
+
+import argparse
+import pickle
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from model_registry import ModelRegistry
+
+FEATURES = [f"feature_{i}" for i in range(19)]
+ROWS = 5000
+REPEATS = 20
+
+COLD_START_SCRIPTS = {
+    'pickle.load': "import pickle; pickle.load(open(r'{pkl}', 'rb'))",
+    'registry.load': "from model_registry import ModelRegistry; ModelRegistry(r'{root}').load()",
+    'registry.load(lazy)': "from model_registry import ModelRegistry; ModelRegistry(r'{root}').load(lazy=True)",
+}
+
+def build_artifacts(directory, trees):
+    """Fit a synthetic forest and save it in every format"""
+    rng = np.random.default_rng(42)
+    X = rng.random((ROWS, len(FEATURES)))
+    y = (X[:, 0] + X[:, 1] > 1).astype(int)
+    model = RandomForestClassifier(n_estimators=trees, random_state=42).fit(X, y)
+
+    pkl = directory / 'trained_model.pkl'
+    with open(pkl, 'wb') as f:
+        pickle.dump(model, f)
+    joblib.dump(model, directory / 'model.joblib')
+    ModelRegistry(directory / 'models').save(model, FEATURES)
+    return pkl
+
+def time_warm(load):
+    """Mean seconds per load inside this process"""
+    load()
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        load()
+    return (time.perf_counter() - start) / REPEATS
+
+def time_cold(script):
+    """Seconds for a fresh interpreter to run a load script (median of 3)"""
+    timings = []
+    for _ in range(3):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', script], check=True, cwd=Path(__file__).parent)
+        timings.append(time.perf_counter() - start)
+    return sorted(timings)[1]
+
+def main():
+    parser = argparse.ArgumentParser(description="Time model loading: pickle vs joblib vs model registry")
+    parser.add_argument('--trees', type=int, default=200)
+    args = parser.parse_args()
+
+    print("⏱️  MODEL LOAD BENCHMARK")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+        pkl = build_artifacts(directory, args.trees)
+        registry = ModelRegistry(directory / 'models')
+        print(f"🌲 {args.trees} trees: pickle {pkl.stat().st_size / 1024:.0f} KB")
+
+        warm = {
+            'pickle.load': lambda: pickle.load(open(pkl, 'rb')),
+            'joblib.load': lambda: joblib.load(directory / 'model.joblib'),
+            "joblib.load(mmap_mode='r')": lambda: joblib.load(directory / 'model.joblib', mmap_mode='r'),
+            'registry.load': lambda: registry.load(),
+            'registry.load(mmap=False)': lambda: registry.load(mmap=False),
+        }
+        print("\n   Warm process (model only):")
+        for name, load in warm.items():
+            print(f"   {name:28s} {time_warm(load) * 1000:8.1f} ms")
+
+        print("\n   Cold start (fresh interpreter, imports included):")
+        for name, script in COLD_START_SCRIPTS.items():
+            seconds = time_cold(script.format(pkl=pkl, root=directory / 'models'))
+            print(f"   {name:28s} {seconds * 1000:8.0f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Training Query Benchmark for ml_data_preparation
+================================================
+
+Times TRAINING_FEATURES_QUERY against a synthetic civ_game_data archive
+(1M rows by default) so regressions show up before the real archive gets
+that big.
+
+The synthetic rows go into TEMP tables named civ_game_data and
+civ_turn_rankings, which shadow the real tables for this session only, and
+get the same indexes and rankings as database/migrations. Nothing is
+written to the real tables.
+
+Usage:
+    python benchmark_training_query.py                # 1,000,000 rows
+    python benchmark_training_query.py --rows 200000  # smaller archive
+    python benchmark_training_query.py --plan         # also print the query plan
+"""
+
+import argparse
+import json
+import time
+
+import psycopg2
+
+from migrate_database import MIGRATIONS_DIR
+from ml_data_preparation import TRAINING_FEATURES_QUERY
+
+TURNS_PER_GAME = 250
+CIVS_PER_GAME = 8
+TARGET_SECONDS = 1.0
+
+SYNTHETIC_TABLE_DDL = """
+CREATE TEMP TABLE civ_game_data (LIKE public.civ_game_data);
+CREATE TEMP TABLE civ_turn_rankings (LIKE public.civ_turn_rankings INCLUDING INDEXES);
+"""
+
+# Every game runs TURNS_PER_GAME turns with CIVS_PER_GAME civilizations,
+# loaded one turn per minute
+SYNTHETIC_ROWS_SQL = """
+INSERT INTO pg_temp.civ_game_data (
+    id, game_id, game_turn, civilization, player_number,
+    num_cities, population, techs, civics,
+    yields_science, yields_culture, yields_production,
+    buildings, districts, total_score, created_at
+)
+SELECT
+    ROW_NUMBER() OVER (),
+    'synthetic_' || g,
+    t,
+    'CIVILIZATION_' || c,
+    c,
+    1 + t / 25 + (random() * 3)::int,
+    2 + t / 8 + (random() * 5)::int,
+    t / 4 + (random() * 4)::int,
+    t / 5 + (random() * 4)::int,
+    t / 2 + (random() * 10)::int,
+    t / 3 + (random() * 10)::int,
+    t / 2 + (random() * 15)::int,
+    t / 6 + (random() * 4)::int,
+    t / 20 + (random() * 2)::int,
+    t * 4 + c * 7 + (random() * 40)::int,
+    TIMESTAMP '2025-01-01' + g * INTERVAL '1 day' + t * INTERVAL '1 minute'
+FROM generate_series(1, %(games)s) g,
+     generate_series(1, %(turns)s) t,
+     generate_series(1, %(civs)s) c
+"""
+
+def build_synthetic_archive(cursor, rows):
+    """Create and index the session-local synthetic civ_game_data; returns its row count"""
+    games = max(1, rows // (TURNS_PER_GAME * CIVS_PER_GAME))
+    cursor.execute(SYNTHETIC_TABLE_DDL)
+    cursor.execute(SYNTHETIC_ROWS_SQL, {'games': games, 'turns': TURNS_PER_GAME, 'civs': CIVS_PER_GAME})
+
+    # Same indexes and precomputed rankings as the real tables
+    # (migration SQL is unqualified, so it hits the temp tables)
+    cursor.execute("CREATE UNIQUE INDEX ON pg_temp.civ_game_data (game_id, game_turn, civilization)")
+    for migration in sorted(MIGRATIONS_DIR.glob('[0-9][0-9][0-9]_*.sql')):
+        cursor.execute(migration.read_text(encoding='utf-8'))
+
+    cursor.execute("SELECT COUNT(*), COUNT(DISTINCT game_id) FROM civ_game_data")
+    return cursor.fetchone()
+
+def time_training_query(cursor, show_plan=False):
+    """Server-side execution time (EXPLAIN ANALYZE) and wall time to fetch every row"""
+    cursor.execute("EXPLAIN (ANALYZE, FORMAT JSON) " + TRAINING_FEATURES_QUERY)
+    explain = cursor.fetchone()[0]
+    if isinstance(explain, str):
+        explain = json.loads(explain)
+    execution_seconds = explain[0]['Execution Time'] / 1000
+
+    if show_plan:
+        cursor.execute("EXPLAIN " + TRAINING_FEATURES_QUERY)
+        print("\n".join(row[0] for row in cursor.fetchall()))
+
+    start = time.perf_counter()
+    cursor.execute(TRAINING_FEATURES_QUERY)
+    result_rows = len(cursor.fetchall())
+    fetch_seconds = time.perf_counter() - start
+
+    return execution_seconds, fetch_seconds, result_rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the ML training-feature query on a synthetic archive")
+    parser.add_argument('--rows', type=int, default=1_000_000,
+                        help="Approximate number of synthetic civ_game_data rows")
+    parser.add_argument('--plan', action='store_true', help="Print the query plan")
+    args = parser.parse_args()
+
+    db_config = {
+        'host': 'localhost',
+        'port': 5432,
+        'database': 'civ6_analytics',
+        'user': 'civ6_user',
+        'password': 'civ6_password'
+    }
+
+    print("⏱️  ML TRAINING QUERY BENCHMARK")
+    print("=" * 60)
+
+    conn = psycopg2.connect(**db_config)
+    cursor = conn.cursor()
+    try:
+        start = time.perf_counter()
+        rows, games = build_synthetic_archive(cursor, args.rows)
+        print(f"🧪 Synthetic archive: {rows:,d} rows, {games:,d} games "
+              f"(built in {time.perf_counter() - start:.1f}s)")
+
+        execution_seconds, fetch_seconds, result_rows = time_training_query(cursor, args.plan)
+        print(f"  Query execution (server):  {execution_seconds:8.3f}s")
+        print(f"  Execute + fetch (client):  {fetch_seconds:8.3f}s  {result_rows:,d} training rows")
+
+        if execution_seconds < TARGET_SECONDS:
+            print(f"✅ Under the {TARGET_SECONDS:.0f}s target")
+        else:
+            print(f"⚠️  Over the {TARGET_SECONDS:.0f}s target")
+    finally:
+        conn.rollback()
+        cursor.close()
+        conn.close()
+
+if __name__ == "__main__":
+    main()
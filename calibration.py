@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Win Probability Calibration per Game Phase
+==========================================
+
+RandomForest vote shares are not probabilities: early in a game they cluster
+around the base rate and late in a game they overshoot, so the 70% / 40%
+tiers in predict_winner.analyze_predictions mean different things at
+turn 25 and turn 90. PhaseCalibrator fits one monotone mapping per game
+phase (the same early / mid / late buckets as generate_strategic_insights)
+on out-of-fold probabilities from whole held-out games:
+
+    isotonic  piecewise-linear step function (IsotonicRegression)
+    sigmoid   Platt scaling, 1 / (1 + exp(-(coef * p + intercept)))
+
+A phase with too few rows or games, or only one outcome, is left
+uncalibrated. The
+fitted mappings are plain lists of numbers, stored in the model's registry
+manifest (to_dict / from_dict) and applied with np.interp or one exp per
+row, so calibrating a turn costs microseconds next to the forest itself.
+
+Usage:
+    calibrator = PhaseCalibrator('isotonic').fit(oof_probabilities, turns, y)
+    calibrated = calibrator.transform(probabilities, turns)
+
+    python calibration.py              # calibration error and latency benchmark
+    python calibration.py --method sigmoid --splits 3
+    python calibration.py --synthetic 300  # 300 simulated games instead of the feature store
+"""
+
+import argparse
+import time
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.isotonic import IsotonicRegression
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import StratifiedKFold
+
+from group_cv import game_folds
+
+METHODS = ('isotonic', 'sigmoid')
+PHASE_NAMES = ('early', 'mid', 'late')
+# Last turn of the early and mid game (as in LiveVictoryPredictor.generate_strategic_insights)
+PHASE_BOUNDS = (30, 60)
+# Fewer rows or games than this (or a single outcome) leaves a phase uncalibrated;
+# turns of one game share its outcome, so rows alone overstate how much there is to learn from
+MIN_PHASE_ROWS = 30
+MIN_PHASE_GAMES = 5
+
+def game_phase(turns):
+    """Phase index of each turn: 0 early, 1 mid, 2 late"""
+    return np.searchsorted(PHASE_BOUNDS, np.asarray(turns), side='left')
+
+def expected_calibration_error(y, probabilities, n_bins=10):
+    """Row-weighted gap between mean probability and win rate over equal-width bins"""
+    y = np.asarray(y, dtype=np.float64)
+    probabilities = np.asarray(probabilities, dtype=np.float64)
+    if len(y) == 0:
+        return 0.0
+    bins = np.minimum((probabilities * n_bins).astype(int), n_bins - 1)
+    counts = np.bincount(bins, minlength=n_bins)
+    gaps = np.abs(np.bincount(bins, probabilities, n_bins) - np.bincount(bins, y, n_bins))
+    return float(gaps[counts > 0].sum() / len(y))
+
+def out_of_fold_probabilities(params, X, y, groups=None, n_splits=5, random_state=42):
+    """Win probability of every row from a forest that never saw the row's game
+
+    Without groups, rows are folded with StratifiedKFold instead.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y)
+    if groups is not None:
+        folds = game_folds(np.asarray(groups).astype(str), 'group_kfold', n_splits)
+    else:
+        folds = StratifiedKFold(n_splits, shuffle=True, random_state=random_state).split(X, y)
+
+    probabilities = np.zeros(len(y))
+    for train_idx, test_idx in folds:
+        model = RandomForestClassifier(random_state=random_state, n_jobs=-1, **params)
+        model.fit(X[train_idx], y[train_idx])
+        # A fold whose training games all share one outcome can't give a positive-class column
+        positive = list(model.classes_).index(1) if 1 in model.classes_ else None
+        probabilities[test_idx] = model.predict_proba(X[test_idx])[:, positive] if positive is not None else 0.0
+    return probabilities
+
+def _fit_mapping(method, probabilities, y):
+    """One phase's mapping as plain numbers"""
+    if method == 'isotonic':
+        isotonic = IsotonicRegression(y_min=0.0, y_max=1.0, out_of_bounds='clip').fit(probabilities, y)
+        return {'x': isotonic.X_thresholds_.tolist(), 'y': isotonic.y_thresholds_.tolist()}
+    # Platt scaling; a large C keeps the fit close to an unregularized sigmoid
+    logistic = LogisticRegression(C=1e6).fit(probabilities.reshape(-1, 1), y)
+    return {'coef': float(logistic.coef_[0, 0]), 'intercept': float(logistic.intercept_[0])}
+
+def _apply_mapping(method, mapping, probabilities):
+    """Calibrated probabilities for one phase (mapping from _as_arrays)"""
+    if method == 'isotonic':
+        return np.interp(probabilities, mapping['x'], mapping['y'])
+    return 1.0 / (1.0 + np.exp(-(mapping['coef'] * probabilities + mapping['intercept'])))
+
+def _as_arrays(mapping):
+    """Mapping with its lists converted once, so transform() doesn't convert them per call"""
+    if mapping is None:
+        return None
+    return {key: np.asarray(value, dtype=np.float64) if isinstance(value, list) else value
+            for key, value in mapping.items()}
+
+class PhaseCalibrator:
+    def __init__(self, method='isotonic', phases=None):
+        """Per-game-phase calibration of win probabilities (use fit() or from_dict())"""
+        if method not in METHODS:
+            raise ValueError(f"Unknown calibration method '{method}' (choose from {', '.join(METHODS)})")
+        self.method = method
+        self.phases = phases or [None] * len(PHASE_NAMES)
+        self._mappings = [_as_arrays(mapping) for mapping in self.phases]
+
+    def fit(self, probabilities, turns, y, groups=None):
+        """Fit one mapping per phase from out-of-fold probabilities and outcomes
+
+        groups (the game_id of each row), if given, also requires
+        MIN_PHASE_GAMES games per phase.
+        """
+        probabilities = np.asarray(probabilities, dtype=np.float64)
+        y = np.asarray(y)
+        phases = game_phase(turns)
+        self.phases = []
+        for phase in range(len(PHASE_NAMES)):
+            mask = phases == phase
+            too_few_games = groups is not None and len(np.unique(np.asarray(groups)[mask])) < MIN_PHASE_GAMES
+            if mask.sum() < MIN_PHASE_ROWS or too_few_games or len(np.unique(y[mask])) < 2:
+                self.phases.append(None)
+            else:
+                self.phases.append(_fit_mapping(self.method, probabilities[mask], y[mask]))
+        self._mappings = [_as_arrays(mapping) for mapping in self.phases]
+        return self
+
+    @property
+    def calibrated_phases(self):
+        """Names of the phases that have a mapping"""
+        return [name for name, mapping in zip(PHASE_NAMES, self.phases) if mapping is not None]
+
+    def transform(self, probabilities, turns):
+        """Calibrated win probabilities (uncalibrated phases pass through unchanged)"""
+        probabilities = np.asarray(probabilities, dtype=np.float64)
+        calibrated = probabilities.copy()
+        phases = game_phase(turns)
+        for phase, mapping in enumerate(self._mappings):
+            if mapping is None:
+                continue
+            mask = phases == phase
+            if mask.any():
+                calibrated[mask] = _apply_mapping(self.method, mapping, probabilities[mask])
+        return calibrated
+
+    def to_dict(self):
+        """JSON-serializable form for the registry manifest"""
+        return {'method': self.method, 'phase_bounds': list(PHASE_BOUNDS),
+                'phases': dict(zip(PHASE_NAMES, self.phases))}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Calibrator from to_dict() output (None if there is none)"""
+        if not data:
+            return None
+        if list(data['phase_bounds']) != list(PHASE_BOUNDS):
+            raise ValueError(f"Calibrator was fitted for phase bounds {data['phase_bounds']}, not {list(PHASE_BOUNDS)}")
+        return cls(data['method'], [data['phases'].get(name) for name in PHASE_NAMES])
+
+def calibration_report(y, turns, raw, calibrated):
+    """ECE and Brier score per phase, before and after calibration"""
+    y = np.asarray(y, dtype=np.float64)
+    phases = game_phase(turns)
+    rows = []
+    for phase, name in list(enumerate(PHASE_NAMES)) + [(None, 'all')]:
+        mask = np.ones(len(y), dtype=bool) if phase is None else phases == phase
+        if not mask.any():
+            continue
+        rows.append({
+            'phase': name,
+            'rows': int(mask.sum()),
+            'ece_raw': expected_calibration_error(y[mask], raw[mask]),
+            'ece_calibrated': expected_calibration_error(y[mask], calibrated[mask]),
+            'brier_raw': float(np.mean((raw[mask] - y[mask]) ** 2)),
+            'brier_calibrated': float(np.mean((calibrated[mask] - y[mask]) ** 2)),
+        })
+    return rows
+
+def print_calibration_report(rows):
+    """Per-phase calibration table"""
+    print(f"   {'phase':<6s} {'rows':>6s} {'ECE raw':>8s} {'ECE cal':>8s} {'Brier raw':>10s} {'Brier cal':>10s}")
+    for row in rows:
+        print(f"   {row['phase']:<6s} {row['rows']:6d} {row['ece_raw']:8.4f} {row['ece_calibrated']:8.4f} "
+              f"{row['brier_raw']:10.4f} {row['brier_calibrated']:10.4f}")
+
+def make_synthetic_games(feature_columns, n_games=300, turns=range(10, 110, 5), n_civs=6, seed=42):
+    """Simulated games whose metrics reveal the winner more clearly as turns pass
+
+    Returns X, y, groups, turns shaped like prepare_features output.
+    """
+    rng = np.random.default_rng(seed)
+    turns = np.asarray(turns)
+    X, y, groups, all_turns = [], [], [], []
+    for game in range(n_games):
+        strength = rng.normal(size=n_civs)
+        winner = np.argmax(strength + rng.normal(scale=0.5, size=n_civs))
+        for turn in turns:
+            # Noise shrinks as the game goes on, so late turns are far more predictable
+            noise_scale = 3.0 * (turns[-1] - turn + 10) / (turns[-1] - turns[0] + 10)
+            rows = strength[:, np.newaxis] + rng.normal(scale=noise_scale, size=(n_civs, len(feature_columns)))
+            rows[:, feature_columns.index('game_turn')] = turn
+            X.append(rows)
+            y.append((np.arange(n_civs) == winner).astype(int))
+            groups.extend([f"synthetic_{game:03d}"] * n_civs)
+            all_turns.extend([turn] * n_civs)
+    return np.vstack(X), np.concatenate(y), np.asarray(groups), np.asarray(all_turns)
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibration error and inference cost of per-phase calibration")
+    parser.add_argument('--method', choices=METHODS, default=None, help="Only benchmark one method")
+    parser.add_argument('--splits', type=int, default=5, help="Game folds for the out-of-fold probabilities")
+    parser.add_argument('--trees', type=int, default=100)
+    parser.add_argument('--repeats', type=int, default=500)
+    parser.add_argument('--synthetic', type=int, default=None, metavar='GAMES',
+                        help="Benchmark on this many simulated games instead of the feature store")
+    args = parser.parse_args()
+
+    from compiled_forest import CompiledForest
+    from victory_prediction_model import VictoryPredictionModel
+
+    print("📐 WIN PROBABILITY CALIBRATION BENCHMARK")
+    print("=" * 60)
+
+    trainer = VictoryPredictionModel()
+    if args.synthetic:
+        X, y, groups, turns = make_synthetic_games(trainer.feature_columns, args.synthetic)
+        print(f"🎲 {args.synthetic} simulated games, {len(y)} rows")
+    else:
+        df = trainer.load_training_data()
+        if df is None:
+            return
+        X, y, df_clean = trainer.prepare_features(df)
+        X, y = X.to_numpy(dtype=np.float64), y.to_numpy()
+        groups = df_clean['game_id'].astype(str).to_numpy()
+        turns = df_clean['game_turn'].to_numpy()
+    params = {'n_estimators': args.trees}
+
+    # Calibrators are fitted on some games and scored on the others
+    games = np.unique(groups)
+    rng = np.random.default_rng(42)
+    test_games = set(rng.choice(games, size=max(1, len(games) // 3), replace=False))
+    test = np.isin(groups, list(test_games))
+    raw = out_of_fold_probabilities(params, X, y, groups, args.splits)
+    print(f"   {len(games)} games: calibrators fitted on {len(games) - len(test_games)}, "
+          f"scored on {len(test_games)} held-out games")
+
+    calibrators = {}
+    for method in ([args.method] if args.method else METHODS):
+        calibrator = PhaseCalibrator(method).fit(raw[~test], turns[~test], y[~test], groups[~test])
+        calibrators[method] = calibrator
+        print(f"\n📊 {method} (calibrated phases: {', '.join(calibrator.calibrated_phases) or 'none'})")
+        print_calibration_report(calibration_report(y[test], turns[test], raw[test],
+                                                    calibrator.transform(raw[test], turns[test])))
+
+    # Inference cost on top of the compiled forest
+    model = RandomForestClassifier(random_state=42, **params).fit(X, y)
+    forest = CompiledForest.from_estimator(model)
+    turn_column = trainer.feature_columns.index('game_turn')
+    print(f"\n⏱️  Inference time per batch ({args.trees} trees, compiled forest)")
+    print(f"   {'batch':>5s} {'forest us':>10s} " + ' '.join(f"{'+' + method + ' us':>14s}" for method in calibrators))
+    for batch_size in (8, 256, 4096):
+        batch = np.resize(X, (batch_size, X.shape[1]))
+        p = forest.predict_proba(batch)[:, 1]
+
+        start = time.perf_counter()
+        for _ in range(args.repeats):
+            forest.predict_proba(batch)
+        forest_us = (time.perf_counter() - start) / args.repeats * 1e6
+
+        extra = []
+        for calibrator in calibrators.values():
+            start = time.perf_counter()
+            for _ in range(args.repeats):
+                calibrator.transform(p, batch[:, turn_column])
+            extra.append((time.perf_counter() - start) / args.repeats * 1e6)
+        print(f"   {batch_size:5d} {forest_us:10.1f} " +
+              ' '.join(f"{us:8.1f} ({us / forest_us:.1%})".rjust(14) for us in extra))
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
-import pandas as pd
 from pathlib import Path
 
+from log_schemas import read_log_csv
+
 # Use the correct path
 logs_dir = Path(r"C:\Users\rhode\AppData\Local\Firaxis Games\Sid Meier's Civilization VI\Logs")
 stats_file = logs_dir / "Player_Stats.csv"
@@ -10,24 +11,24 @@ print(f"📂 Reading from: {stats_file}")
 print(f"File exists: {stats_file.exists()}")
 
 if stats_file.exists():
-    df = pd.read_csv(stats_file)
+    df = read_log_csv(stats_file, columns=['game_turn', 'player_name'])
     print(f"\nPlayer_Stats.csv: {df.shape[0]} rows, {df.shape[1]} columns")
     
-    if ' Player' in df.columns:
-        civs = df[' Player'].unique()
+    if 'player_name' in df.columns:
+        civs = df['player_name'].unique()
         print(f"\n🏛️ All civilizations in logs ({len(civs)} total):")
         for civ in sorted(civs):
             print(f"  - {repr(civ)}")
         
         # Show latest turn
-        latest_turn = max(df['Game Turn'].unique())
-        latest_data = df[df['Game Turn'] == latest_turn]
-        latest_civs = set(latest_data[' Player'].unique())
+        latest_turn = max(df['game_turn'].unique())
+        latest_data = df[df['game_turn'] == latest_turn]
+        latest_civs = set(latest_data['player_name'].unique())
         print(f"\n📊 Latest turn ({latest_turn}): {len(latest_civs)} civilizations")
         for civ in sorted(latest_civs):
             print(f"  - {repr(civ)}")
     else:
-        print("\nColumn ' Player' not found. Available columns:")
+        print("\nColumn 'player_name' not found. Available columns:")
         for col in df.columns:
             print(f"  - {repr(col)}")
 else:
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Live Civ VI Log Watcher
+Watches the Civ VI Logs directory and pushes new turns into PostgreSQL as
+soon as the game writes them, over one persistent database connection
+
+Writes to Player_Stats.csv, Player_Stats_2.csv and Game_PlayerScores.csv
+are debounced so the burst the game produces at turn end becomes a single
+load. Only the lines appended since the last load are parsed (see
+incremental_log_reader.py).
+
+Usage:
+    python civ_log_watcher.py              # native filesystem events
+    python civ_log_watcher.py --poll       # polling (Docker bind mounts from Windows)
+    python stage4h_insert_data.py --watch  # same thing via the loader CLI
+"""
+
+import argparse
+import threading
+import time
+from pathlib import Path
+
+import psycopg2
+from watchdog.events import FileSystemEventHandler
+from watchdog.observers import Observer
+from watchdog.observers.polling import PollingObserver
+
+from stage4h_insert_data import (
+    KEY_LOG_FILES, find_logs_dir, get_db_config, prepare_schema, open_log_reader, load_new_turns
+)
+
+# Quiet period after the last write before loading
+DEBOUNCE_SECONDS = 0.3
+# Upper bound on how long a continuous burst of writes can delay a load
+MAX_DELAY_SECONDS = 0.6
+# Polling observer interval (only used with --poll)
+POLL_INTERVAL_SECONDS = 0.2
+
+class CivLogWatcher(FileSystemEventHandler):
+    def __init__(self, logs_dir, db_config, bulk=True, full_reload=False,
+                 debounce_seconds=DEBOUNCE_SECONDS, max_delay_seconds=MAX_DELAY_SECONDS):
+        """Initialize the watcher for one Logs directory"""
+        super().__init__()
+        self.logs_dir = Path(logs_dir)
+        self.db_config = db_config
+        self.bulk = bulk
+        self.full_reload = full_reload
+        self.debounce_seconds = debounce_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.watched_files = set(KEY_LOG_FILES.values())
+
+        self.conn = None
+        self.reader = None
+        self._timer = None
+        self._first_write = None
+        self._timer_lock = threading.Lock()
+        self._load_lock = threading.Lock()
+
+    def connect(self):
+        """Open (or re-open) the persistent database connection"""
+        self.conn = psycopg2.connect(**self.db_config)
+        if self.reader is None:
+            prepare_schema(self.conn)
+            with self.conn.cursor() as cursor:
+                self.reader = open_log_reader(cursor, full_reload=self.full_reload)
+            self.conn.commit()
+        print("📡 Database connection ready")
+
+    def close(self):
+        """Close the database connection"""
+        if self.conn is not None and not self.conn.closed:
+            self.conn.close()
+
+    def on_created(self, event):
+        self._schedule(event.src_path, event.is_directory)
+
+    def on_modified(self, event):
+        self._schedule(event.src_path, event.is_directory)
+
+    def on_moved(self, event):
+        self._schedule(event.dest_path, event.is_directory)
+
+    def _schedule(self, path, is_directory=False):
+        """Debounce writes to the key log files into one load"""
+        if is_directory or Path(path).name not in self.watched_files:
+            return
+
+        with self._timer_lock:
+            now = time.monotonic()
+            if self._first_write is None:
+                self._first_write = now
+            if self._timer is not None:
+                self._timer.cancel()
+
+            # Never let a long burst push the load past the latency budget
+            remaining = self.max_delay_seconds - (now - self._first_write)
+            delay = max(0.0, min(self.debounce_seconds, remaining))
+
+            self._timer = threading.Timer(delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        """Load everything the game has written since the last flush"""
+        with self._timer_lock:
+            first_write = self._first_write
+            self._first_write = None
+            self._timer = None
+
+        with self._load_lock:
+            try:
+                if self.conn is None or self.conn.closed:
+                    self.connect()
+
+                loaded = load_new_turns(self.conn, self.reader, self.logs_dir, self.bulk)
+                if loaded is None:
+                    self.conn.rollback()
+                elif loaded[1] and first_write is not None:
+                    latency_ms = (time.monotonic() - first_write) * 1000
+                    print(f"⚡ Stored turn(s) {loaded[1]} {latency_ms:.0f} ms after the game wrote them")
+
+            except psycopg2.Error as e:
+                # Drop the connection; the next flush reconnects
+                print(f"❌ Database error: {e}")
+                self.close()
+                self.conn = None
+
+            except Exception as e:
+                print(f"❌ Error loading new turns: {e}")
+                if self.conn is not None and not self.conn.closed:
+                    self.conn.rollback()
+
+    def run(self, poll=False):
+        """Catch up on existing log lines, then watch until interrupted"""
+        observer = PollingObserver(timeout=POLL_INTERVAL_SECONDS) if poll else Observer()
+        observer.schedule(self, str(self.logs_dir), recursive=False)
+
+        self.connect()
+        self.flush()
+
+        observer.start()
+        print(f"👀 Watching {self.logs_dir} for new turns (Ctrl+C to stop)")
+        try:
+            while observer.is_alive():
+                observer.join(1)
+        except KeyboardInterrupt:
+            print("\n🛑 Stopping watcher...")
+        finally:
+            observer.stop()
+            observer.join()
+            with self._timer_lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+            self.close()
+
+def watch_logs(bulk=True, full_reload=False, poll=None):
+    """Run the live watcher for the detected Logs directory"""
+    print("👀 LIVE CIV VI LOG WATCHER")
+    print("=" * 50)
+
+    logs_dir, in_docker = find_logs_dir()
+    if not logs_dir.exists():
+        print(f"❌ Logs directory not found: {logs_dir}")
+        return False
+
+    # Bind mounts from a Windows host don't deliver inotify events
+    if poll is None:
+        poll = in_docker
+
+    watcher = CivLogWatcher(logs_dir, get_db_config(in_docker), bulk=bulk, full_reload=full_reload)
+    watcher.run(poll=poll)
+    return True
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Push new Civ VI turns into PostgreSQL as they are written")
+    parser.add_argument('--poll', action='store_true',
+                        help="Use a polling observer instead of native filesystem events")
+    parser.add_argument('--full-reload', action='store_true',
+                        help="Ignore saved log checkpoints on start-up")
+    args = parser.parse_args()
+
+    watch_logs(full_reload=args.full_reload, poll=True if args.poll else None)
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Persistent Cache of CSV Analysis Results
+========================================
+
+Keeps the csv_profiler result of every log file in one JSON file, keyed by
+the file's path and a content fingerprint:
+
+    size         bytes on disk
+    mtime_ns     last modification time
+    sample_hash  SHA-1 of the first and last 64 KB plus a few 4 KB blocks
+                 spread evenly in between (whole file when it's small)
+
+A file whose fingerprint still matches is served from the cache without
+being read beyond the sampled blocks; only new or modified files are
+re-profiled (on the csv_profiler process pool). After one new turn only the
+logs the game appended to are profiled again.
+
+Entries are tagged with CACHE_VERSION so a change to the profiler's output
+layout discards them.
+
+Usage:
+    cache = CSVAnalysisCache()
+    results = cache.analyze(sorted(logs_path.glob('*.csv')))   # {filename: file_info}
+    cache.save()
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from csv_profiler import profile_csvs
+
+CACHE_VERSION = 2
+DEFAULT_CACHE_PATH = 'csv_analysis_cache.json'
+EDGE_BYTES = 64 * 1024
+SAMPLE_BLOCKS = 8
+BLOCK_BYTES = 4096
+
+def sample_hash(path, size=None):
+    """SHA-1 of the size, head, tail and evenly spaced blocks of a file"""
+    size = path.stat().st_size if size is None else size
+    digest = hashlib.sha1(str(size).encode('utf-8'))
+    with open(path, 'rb') as f:
+        if size <= 2 * EDGE_BYTES + SAMPLE_BLOCKS * BLOCK_BYTES:
+            digest.update(f.read())
+            return digest.hexdigest()
+        digest.update(f.read(EDGE_BYTES))
+        step = (size - 2 * EDGE_BYTES) // (SAMPLE_BLOCKS + 1)
+        for block in range(1, SAMPLE_BLOCKS + 1):
+            f.seek(EDGE_BYTES + block * step)
+            digest.update(f.read(BLOCK_BYTES))
+        f.seek(size - EDGE_BYTES)
+        digest.update(f.read(EDGE_BYTES))
+    return digest.hexdigest()
+
+def fingerprint(path):
+    """(size, mtime_ns, sample_hash) of a file"""
+    stat = path.stat()
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sample_hash': sample_hash(path, stat.st_size)}
+
+class CSVAnalysisCache:
+    def __init__(self, cache_path=DEFAULT_CACHE_PATH):
+        """Initialize the cache from its JSON file (missing, corrupt or outdated file means empty)"""
+        self.cache_path = Path(cache_path)
+        self.entries = self._load_entries()
+        self.hits = 0
+        self.misses = 0
+
+    def _load_entries(self):
+        """Cached entries by file path"""
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+        if cached.get('version') != CACHE_VERSION:
+            return {}
+        return cached.get('files', {})
+
+    @staticmethod
+    def _key(csv_path):
+        """Cache key for a log file"""
+        return str(Path(csv_path))
+
+    def get(self, csv_path):
+        """Cached analysis of a file, or None if it is new or has changed"""
+        entry = self.entries.get(self._key(csv_path))
+        if entry is None or not csv_path.exists():
+            return None
+        stat = csv_path.stat()
+        cached = entry['fingerprint']
+        if (stat.st_size, stat.st_mtime_ns) != (cached['size'], cached['mtime_ns']):
+            return None
+        if sample_hash(csv_path, stat.st_size) != cached['sample_hash']:
+            return None
+        return entry['analysis']
+
+    def analyze(self, csv_paths, n_jobs=None):
+        """Analysis of every file ({filename: file_info}), profiling only the ones not cached"""
+        csv_paths = [Path(path) for path in csv_paths]
+        results = {}
+        stale = []
+        for path in csv_paths:
+            cached = self.get(path)
+            if cached is None:
+                stale.append(path)
+            else:
+                results[path.name] = cached
+        self.hits += len(csv_paths) - len(stale)
+        self.misses += len(stale)
+
+        if stale:
+            # Fingerprint before profiling: a file written to meanwhile is profiled again next time
+            fingerprints = {path: fingerprint(path) for path in stale if path.exists()}
+            for path, file_info in zip(stale, profile_csvs(stale, n_jobs=n_jobs).values()):
+                # Stored exactly as it will be read back, so hits and misses look the same
+                file_info = json.loads(json.dumps(file_info, default=str))
+                results[path.name] = file_info
+                if path in fingerprints:
+                    self.entries[self._key(path)] = {'fingerprint': fingerprints[path], 'analysis': file_info}
+
+        return {path.name: results[path.name] for path in csv_paths}
+
+    def results(self):
+        """Every cached analysis ({filename: file_info}), without checking the files"""
+        return {Path(key).name: entry['analysis'] for key, entry in sorted(self.entries.items())}
+
+    def prune(self, csv_paths):
+        """Drop entries of files that aren't in csv_paths (deleted or renamed logs)"""
+        keep = {self._key(path) for path in csv_paths}
+        self.entries = {key: entry for key, entry in self.entries.items() if key in keep}
+
+    def save(self):
+        """Write the cache file (atomically)"""
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': CACHE_VERSION, 'files': self.entries}, f, default=str)
+        os.replace(tmp_path, self.cache_path)
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Streaming CSV Profiler for Civ VI Log Files
+===========================================
+
+Profiles a CSV without loading it whole: the file is read in chunks and
+every column's statistics are accumulated in one pass over each chunk
+(non-null / null counts, min / max / mean, distinct count, first sample
+values, small value distributions, memory). Accumulators are mergeable,
+so chunk results fold into a file result.
+
+Distinct counts are exact while a column has at most EXACT_DISTINCT_LIMIT
+values (the value counts are kept anyway for the markdown docs); past that
+the column switches to a HyperLogLog sketch (2^12 registers, ~1.6% standard
+error) fed with pandas' vectorized 64-bit hashes.
+
+Every column that could be a join key (text, integers, whole-number floats)
+also gets a 128-permutation MinHash signature of its distinct values, with
+text stripped and whole-number floats hashed as integers so the same key
+matches across files. join_discovery.py finds foreign-key candidates from
+these signatures.
+
+Files are profiled in parallel across a process pool, largest first. The
+result of profile_csv has the same layout as
+CivCSVAnalyzer.analyze_csv_file always produced.
+
+Usage:
+    file_info = profile_csv(Path('Player_Stats.csv'))
+    results = profile_csvs(sorted(logs_path.glob('*.csv')))    # {filename: file_info}
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+CHUNK_ROWS = 100_000
+SAMPLE_VALUES = 5
+PREVIEW_ROWS = 3
+# Exact value counts (and distinct counts) are kept up to this many distinct values per column
+EXACT_DISTINCT_LIMIT = 1024
+# Value distributions are reported for text columns with at most this many distinct values
+VALUE_COUNTS_LIMIT = 20
+HLL_PRECISION = 12
+MINHASH_PERMUTATIONS = 128
+MINHASH_BATCH = 4096
+MINHASH_SEED = 20250803
+
+def _bit_length(values):
+    """Number of significant bits of each uint64 (exact; 32-bit halves fit in a float64)"""
+    high = (values >> np.uint64(32)).astype(np.float64)
+    low = (values & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    high_bits = np.where(high > 0, np.floor(np.log2(np.maximum(high, 1))) + 1, 0)
+    low_bits = np.where(low > 0, np.floor(np.log2(np.maximum(low, 1))) + 1, 0)
+    return np.where(high_bits > 0, high_bits + 32, low_bits).astype(np.int64)
+
+class HyperLogLog:
+    def __init__(self, precision=HLL_PRECISION):
+        """Approximate distinct counter with 2^precision registers"""
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add_hashes(self, hashes):
+        """Add 64-bit hashes (uint64 array)"""
+        if len(hashes) == 0:
+            return
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        index = (hashes >> np.uint64(64 - self.precision)).astype(np.int64)
+        remaining = hashes & np.uint64((1 << (64 - self.precision)) - 1)
+        # Position of the first 1 bit in the remaining 64 - p bits
+        rank = (64 - self.precision) - _bit_length(remaining) + 1
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+
+    def add(self, values):
+        """Add the values of a Series"""
+        self.add_hashes(pd.util.hash_pandas_object(values, index=False).to_numpy())
+
+    def merge(self, other):
+        """Union with another sketch of the same precision (in place)"""
+        if other.precision != self.precision:
+            raise ValueError("Can't merge HyperLogLog sketches of different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self):
+        """Approximate number of distinct values added"""
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.power(2.0, -self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            # Small-range correction (linear counting)
+            return int(round(m * np.log(m / zeros)))
+        return int(round(raw))
+
+def _mix64(values):
+    """splitmix64 finalizer: a well-mixed 64-bit permutation of each uint64"""
+    values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+class MinHash:
+    def __init__(self, num_perm=MINHASH_PERMUTATIONS):
+        """MinHash signature (num_perm minima of independently permuted hashes) of a set of values"""
+        # Fixed random seeds so signatures from different runs and files are comparable
+        self.seeds = np.random.default_rng(MINHASH_SEED).integers(
+            0, np.iinfo(np.uint64).max, num_perm, dtype=np.uint64, endpoint=True)
+        self.signature = np.full(num_perm, np.iinfo(np.uint64).max, dtype=np.uint64)
+
+    def add_hashes(self, hashes):
+        """Add 64-bit hashes (uint64 array)"""
+        hashes = np.unique(np.asarray(hashes, dtype=np.uint64))
+        for start in range(0, len(hashes), MINHASH_BATCH):
+            permuted = _mix64(hashes[start:start + MINHASH_BATCH, None] ^ self.seeds[None, :])
+            np.minimum(self.signature, permuted.min(axis=0), out=self.signature)
+
+    def add(self, values):
+        """Add the values of a Series"""
+        self.add_hashes(pd.util.hash_pandas_object(values, index=False).to_numpy())
+
+    def merge(self, other):
+        """Union with another signature of the same size (in place)"""
+        if len(other.signature) != len(self.signature):
+            raise ValueError("Can't merge MinHash signatures with different numbers of permutations")
+        np.minimum(self.signature, other.signature, out=self.signature)
+        return self
+
+    def jaccard(self, other):
+        """Estimated Jaccard similarity of the two value sets"""
+        return float(np.mean(self.signature == other.signature))
+
+    def to_hex(self):
+        """Compact text form for the analysis JSON"""
+        return self.signature.astype('<u8').tobytes().hex()
+
+    @classmethod
+    def from_hex(cls, text):
+        """Signature saved by to_hex"""
+        signature = np.frombuffer(bytes.fromhex(text), dtype='<u8').astype(np.uint64)
+        minhash = cls(len(signature))
+        minhash.signature = signature
+        return minhash
+
+def _join_keys(present):
+    """Non-null values normalized for matching across files, or None if they can't be a join key"""
+    if pd.api.types.is_bool_dtype(present):
+        return present.astype(np.int64)
+    if pd.api.types.is_float_dtype(present):
+        values = present.to_numpy()
+        if not (np.isfinite(values).all() and np.array_equal(values, np.floor(values))):
+            return None
+        return present.astype(np.int64)
+    if pd.api.types.is_numeric_dtype(present):
+        return present.astype(np.int64)
+    return present.astype(str).str.strip()
+
+def _merge_dtype(current, chunk_dtype):
+    """Column dtype pandas would infer for the whole file, given one more chunk's"""
+    chunk_dtype = str(chunk_dtype)
+    if current is None or current == chunk_dtype:
+        return chunk_dtype
+    if {current, chunk_dtype} <= {'int64', 'float64'}:
+        return 'float64'
+    return 'object'
+
+class ColumnProfile:
+    def __init__(self):
+        """Mergeable statistics of one column"""
+        self.dtype = None
+        self.dtype_seen = False    # dtype came from a chunk with values (all-null chunks read as float64)
+        self.count = 0
+        self.nulls = 0
+        self.minimum = None
+        self.maximum = None
+        self.total = 0.0
+        self.numeric_count = 0
+        self.samples = []
+        self.value_counts = {}     # None once the column has too many distinct values (the sketch takes over)
+        self.hll = HyperLogLog()
+        self.minhash = MinHash()   # None once a value shows it can't be a join key
+
+    def update(self, series):
+        """Accumulate one chunk of the column"""
+        present = series.dropna()
+        self.count += len(present)
+        self.nulls += len(series) - len(present)
+        if len(present) == 0:
+            if not self.dtype_seen:
+                self.dtype = str(series.dtype)
+            return
+        self.dtype = _merge_dtype(self.dtype if self.dtype_seen else None, series.dtype)
+        self.dtype_seen = True
+
+        if len(self.samples) < SAMPLE_VALUES:
+            self.samples.extend(present.head(SAMPLE_VALUES - len(self.samples)).tolist())
+
+        if pd.api.types.is_numeric_dtype(present) and not pd.api.types.is_bool_dtype(present):
+            values = present.to_numpy()
+            low, high = values.min(), values.max()
+            self.minimum = low if self.minimum is None else min(self.minimum, low)
+            self.maximum = high if self.maximum is None else max(self.maximum, high)
+            self.total += float(values.sum(dtype=np.float64))
+            self.numeric_count += len(values)
+
+        if self.minhash is not None:
+            keys = _join_keys(pd.Series(present.unique(), dtype=present.dtype))
+            if keys is None:
+                self.minhash = None
+            else:
+                self.minhash.add(keys)
+
+        if self.value_counts is None:
+            self.hll.add(present)
+            return
+        for value, count in present.value_counts(sort=False).items():
+            self.value_counts[value] = self.value_counts.get(value, 0) + int(count)
+        self._check_exact_limit()
+
+    def _check_exact_limit(self):
+        """Switch to the sketch once the exact counts get too big (seeded with every value seen)"""
+        if self.value_counts is not None and len(self.value_counts) > EXACT_DISTINCT_LIMIT:
+            self.hll.add(pd.Series(list(self.value_counts)))
+            self.value_counts = None
+
+    def merge(self, other):
+        """Fold another profile of the same column (a later chunk) into this one"""
+        if other.dtype_seen:
+            self.dtype = _merge_dtype(self.dtype if self.dtype_seen else None, other.dtype)
+            self.dtype_seen = True
+        elif not self.dtype_seen and other.dtype:
+            self.dtype = other.dtype
+        self.count += other.count
+        self.nulls += other.nulls
+        for attr, pick in (('minimum', min), ('maximum', max)):
+            theirs = getattr(other, attr)
+            if theirs is not None:
+                ours = getattr(self, attr)
+                setattr(self, attr, theirs if ours is None else pick(ours, theirs))
+        self.total += other.total
+        self.numeric_count += other.numeric_count
+        self.samples = (self.samples + other.samples)[:SAMPLE_VALUES]
+        if self.minhash is not None and other.minhash is not None:
+            self.minhash.merge(other.minhash)
+        else:
+            self.minhash = None
+        if self.value_counts is not None and other.value_counts is not None:
+            for value, count in other.value_counts.items():
+                self.value_counts[value] = self.value_counts.get(value, 0) + count
+            self._check_exact_limit()
+            return self
+        for profile in (self, other):
+            if profile.value_counts:
+                self.hll.add(pd.Series(list(profile.value_counts)))
+        self.hll.merge(other.hll)
+        self.value_counts = None
+        return self
+
+    @property
+    def distinct(self):
+        """Exact distinct count while it's small, HyperLogLog estimate beyond"""
+        return len(self.value_counts) if self.value_counts is not None else self.hll.estimate()
+
+    def to_dict(self):
+        """Column entry in the CivCSVAnalyzer layout"""
+        col_data = {
+            'data_type': self.dtype,
+            'non_null_count': self.count,
+            'null_count': self.nulls,
+            'unique_values': self.distinct,
+            'sample_values': self.samples,
+            'minhash': self.minhash.to_hex() if self.minhash is not None and self.count else None,
+        }
+        if self.dtype in ('int64', 'float64'):
+            col_data['min_value'] = _plain(self.minimum) if self.numeric_count else None
+            col_data['max_value'] = _plain(self.maximum) if self.numeric_count else None
+            col_data['mean_value'] = round(self.total / self.numeric_count, 2) if self.numeric_count else None
+        if self.dtype in ('object', 'str') and self.value_counts is not None \
+                and len(self.value_counts) <= VALUE_COUNTS_LIMIT:
+            top = sorted(self.value_counts.items(), key=lambda item: item[1], reverse=True)[:10]
+            col_data['value_counts'] = dict(top)
+        return col_data
+
+def _plain(value):
+    """numpy scalar as a plain Python number"""
+    return value.item() if isinstance(value, np.generic) else value
+
+def profile_csv(csv_path, chunk_rows=CHUNK_ROWS):
+    """Profile one CSV in a single streaming pass (CivCSVAnalyzer.analyze_csv_file layout)"""
+    try:
+        columns = None
+        profiles = {}
+        rows = 0
+        memory_bytes = 0
+        preview = []
+
+        for chunk in pd.read_csv(csv_path, chunksize=chunk_rows):
+            if columns is None:
+                columns = list(chunk.columns)
+                profiles = {col: ColumnProfile() for col in columns}
+                preview = chunk.head(PREVIEW_ROWS).to_dict('records')
+            rows += len(chunk)
+            memory_bytes += int(chunk.memory_usage(deep=True, index=False).sum())
+            for col in columns:
+                profiles[col].update(chunk[col])
+
+        if columns is None:
+            raise ValueError("No columns to parse from file")
+
+        return {
+            'filename': csv_path.name,
+            'file_size_kb': round(csv_path.stat().st_size / 1024, 2),
+            'row_count': rows,
+            'column_count': len(columns),
+            'columns': columns,
+            'dtypes': {col: profiles[col].dtype for col in columns},
+            'memory_usage_mb': round(memory_bytes / 1024 / 1024, 2),
+            'column_analysis': {col: profiles[col].to_dict() for col in columns},
+            'data_preview': preview,
+        }
+
+    except Exception as e:
+        return {
+            'filename': csv_path.name,
+            'error': str(e),
+            'file_size_kb': round(csv_path.stat().st_size / 1024, 2) if csv_path.exists() else 0
+        }
+
+def profile_csvs(csv_paths, n_jobs=None, chunk_rows=CHUNK_ROWS):
+    """Profile many CSVs on a process pool; {filename: file_info} in csv_paths order
+
+    Files are submitted largest first so one big log doesn't finish last.
+    n_jobs=None uses every core (capped at the number of files); n_jobs=1
+    profiles in this process.
+    """
+    csv_paths = list(csv_paths)
+    if not csv_paths:
+        return {}
+    n_workers = min(n_jobs or os.cpu_count() or 1, len(csv_paths))
+    by_size = sorted(csv_paths, key=lambda path: path.stat().st_size if path.exists() else 0, reverse=True)
+
+    if n_workers == 1:
+        results = {path.name: profile_csv(path, chunk_rows) for path in by_size}
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            futures = {path.name: pool.submit(profile_csv, path, chunk_rows) for path in by_size}
+            results = {name: future.result() for name, future in futures.items()}
+    return {path.name: results[path.name] for path in csv_paths}
@@ -11,15 +11,32 @@ from pathlib import Path
 from collections import defaultdict
 import re
 
+from csv_analysis_cache import DEFAULT_CACHE_PATH, CSVAnalysisCache
+from join_discovery import MIN_CONTAINMENT, discover_joins
+
 class CivRelationshipAnalyzer:
-    def __init__(self):
+    def __init__(self, cache_path=DEFAULT_CACHE_PATH):
         self.logs_path = Path(os.path.expandvars(r"${LOCALAPPDATA}\Firaxis Games\Sid Meier's Civilization VI\Logs"))
         self.relationships = defaultdict(list)
         self.common_keys = defaultdict(set)
         self.file_structures = {}
+        self.cache_path = cache_path
         
     def load_analysis_results(self):
-        """Load the existing CSV analysis results"""
+        """Load the CSV analysis results from the analysis cache (refreshing changed logs)"""
+        cache = CSVAnalysisCache(self.cache_path)
+        csv_files = sorted(self.logs_path.glob("*.csv"))
+        if csv_files:
+            results = cache.analyze(csv_files)
+            cache.prune(csv_files)
+            cache.save()
+            print(f"⚡ {cache.hits} unchanged files from cache, {cache.misses} profiled")
+            return results
+        if cache.entries:
+            print(f"⚠️  No log CSVs found - using the {len(cache.entries)} cached analyses")
+            return cache.results()
+
+        # Analysis saved before the cache existed
         try:
             with open('csv_analysis_20250803_191142.json', 'r') as f:
                 return json.load(f)
@@ -163,6 +180,14 @@ class CivRelationshipAnalyzer:
         
         return join_candidates
     
+    def find_value_joins(self, analysis_results, min_containment=MIN_CONTAINMENT):
+        """Find foreign-key candidates from overlapping column values (MinHash + LSH, see join_discovery.py)"""
+        value_joins = discover_joins(analysis_results, min_containment)
+        for join in value_joins:
+            self.relationships[join['file']].append(join)
+            self.common_keys[join['column'].strip().lower()].update([join['file'], join['ref_file']])
+        return value_joins
+    
     def generate_sql_schemas(self, categories, join_candidates):
         """Generate SQL schema recommendations for each category"""
         
@@ -269,11 +294,15 @@ CREATE TABLE economic_state (
         print("🔑 Finding joinable columns...")
         join_candidates = self.find_joinable_columns(analysis_results)
         
+        print("🧬 Matching column values across files...")
+        value_joins = self.find_value_joins(analysis_results)
+        
         print("🗃️ Generating SQL schemas...")
         schemas = self.generate_sql_schemas(categories, join_candidates)
         
         # Generate detailed report
-        report = self.generate_detailed_report(patterns, relationships, categories, join_candidates, schemas)
+        report = self.generate_detailed_report(patterns, relationships, categories, join_candidates, schemas,
+                                               value_joins)
         
         # Save report
         timestamp = "20250803_relationships"
@@ -289,10 +318,11 @@ CREATE TABLE economic_state (
             'relationships': relationships,
             'categories': categories,
             'join_candidates': join_candidates,
+            'value_joins': value_joins,
             'schemas': schemas
         }
     
-    def generate_detailed_report(self, patterns, relationships, categories, join_candidates, schemas):
+    def generate_detailed_report(self, patterns, relationships, categories, join_candidates, schemas, value_joins=()):
         """Generate the detailed markdown report"""
         
         report = f"""# 🔗 Civ VI CSV Relationship Analysis Report
@@ -363,6 +393,12 @@ CREATE TABLE economic_state (
 {self._format_join_details(patterns['city_columns'])}
 ```
 
+### 🧬 Value-Overlap Joins (MinHash)
+**Candidate foreign keys:** {len(value_joins)} (share of the column's distinct values found in the referenced column)
+```
+{self._format_value_joins(value_joins)}
+```
+
 ---
 
 ## 💾 Recommended Database Schema
@@ -438,6 +474,22 @@ CREATE TABLE economic_state (
         
         return '\n'.join(formatted)
 
+    def _format_value_joins(self, value_joins):
+        """Format value-overlap join candidates, best first"""
+        if not value_joins:
+            return "No value overlaps found (re-run analyze_all_csv_files.py to collect column signatures)"
+        
+        formatted = []
+        for join in value_joins[:25]:  # Limit to the top 25
+            arrow = '<->' if join['mutual'] else '->'
+            formatted.append(f"{join['file']}: '{join['column']}' {arrow} {join['ref_file']}: "
+                             f"'{join['ref_column']}' ({join['containment']:.0%} of {join['distinct']:,} values)")
+        
+        if len(value_joins) > 25:
+            formatted.append(f"... and {len(value_joins) - 25} more pairs")
+        
+        return '\n'.join(formatted)
+
 def main():
     print("🔍 Starting CSV relationship analysis...")
     
@@ -450,6 +502,7 @@ def main():
         print(f"- Competitive network: {len(results['relationships']['competitive_network'])} files") 
         print(f"- Core junction: {len(results['relationships']['core_junction'])} files")
         print(f"- Join candidates identified: {len(results['join_candidates'])} types")
+        print(f"- Value-overlap joins: {len(results['value_joins'])} column pairs")
     
     print("\n✅ Relationship analysis complete!")
 
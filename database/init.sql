@@ -25,6 +25,45 @@ CREATE TABLE IF NOT EXISTS game_data (
     UNIQUE(game_id, turn_number, player_name)
 );
 
+-- Real Civ VI data loaded from the game logs (stage4h_insert_data.py)
+-- One row per civilization per turn per game
+CREATE TABLE IF NOT EXISTS civ_game_data (
+    id SERIAL PRIMARY KEY,
+    game_id VARCHAR(100) NOT NULL,
+    game_turn INTEGER NOT NULL,
+    civilization VARCHAR(50) NOT NULL,
+    player_number INTEGER,
+    num_cities INTEGER,
+    population INTEGER,
+    techs INTEGER,
+    civics INTEGER,
+    land_units INTEGER,
+    corps INTEGER,
+    armies INTEGER,
+    naval_units INTEGER,
+    tiles_owned INTEGER,
+    tiles_improved INTEGER,
+    balance_gold INTEGER,
+    balance_faith INTEGER,
+    yields_science INTEGER,
+    yields_culture INTEGER,
+    yields_gold INTEGER,
+    yields_faith INTEGER,
+    yields_production INTEGER,
+    yields_food INTEGER,
+    buildings INTEGER,
+    districts INTEGER,
+    outgoing_trade_routes INTEGER,
+    tourism INTEGER,
+    diplo_victory INTEGER,
+    balance_favor INTEGER,
+    lifetime_favor INTEGER,
+    co2_per_turn INTEGER,
+    total_score INTEGER,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT civ_game_data_natural_key UNIQUE (game_id, game_turn, civilization)
+);
+
 -- Insert sample data for testing
 INSERT INTO game_sessions (game_id, map_type, difficulty, num_players) 
 VALUES 
@@ -0,0 +1,22 @@
+-- 001: Indexes for the per-game queries on civ_game_data
+--
+-- The loader, the ML scripts, predict_winner and the Superset /civ6 endpoints
+-- all look up the current game (latest created_at), its MAX(game_turn) and the
+-- rows of that turn, or walk one civilization's turns within a game.
+
+-- "Which game is current?" - ORDER BY created_at DESC LIMIT 1, index-only
+CREATE INDEX IF NOT EXISTS idx_civ_game_data_created_at
+    ON civ_game_data (created_at)
+    INCLUDE (game_id);
+
+-- MAX(game_turn) per game and the rows of one turn (status / rankings columns covered)
+CREATE INDEX IF NOT EXISTS idx_civ_game_data_game_turn
+    ON civ_game_data (game_id, game_turn)
+    INCLUDE (civilization, total_score, yields_science, yields_culture);
+
+-- One civilization's history within a game (final results, timelines)
+CREATE INDEX IF NOT EXISTS idx_civ_game_data_game_civ_turn
+    ON civ_game_data (game_id, civilization, game_turn)
+    INCLUDE (total_score);
+
+ANALYZE civ_game_data;
@@ -0,0 +1,31 @@
+-- 002: Per-turn rankings, maintained by the loader for the turns it writes
+--
+-- Training extraction and live prediction read these instead of running
+-- RANK() windows over the whole of civ_game_data.
+
+CREATE TABLE IF NOT EXISTS civ_turn_rankings (
+    game_id VARCHAR(100) NOT NULL,
+    game_turn INTEGER NOT NULL,
+    civilization VARCHAR(50) NOT NULL,
+    science_rank INTEGER NOT NULL,
+    cities_rank INTEGER NOT NULL,
+    score_rank INTEGER NOT NULL,
+    population_rank INTEGER NOT NULL,
+    PRIMARY KEY (game_id, game_turn, civilization)
+);
+
+-- One-off backfill of everything loaded so far
+INSERT INTO civ_turn_rankings (
+    game_id, game_turn, civilization,
+    science_rank, cities_rank, score_rank, population_rank
+)
+SELECT
+    game_id, game_turn, civilization,
+    RANK() OVER (PARTITION BY game_id, game_turn ORDER BY yields_science DESC),
+    RANK() OVER (PARTITION BY game_id, game_turn ORDER BY num_cities DESC),
+    RANK() OVER (PARTITION BY game_id, game_turn ORDER BY total_score DESC),
+    RANK() OVER (PARTITION BY game_id, game_turn ORDER BY population DESC)
+FROM civ_game_data
+ON CONFLICT (game_id, game_turn, civilization) DO NOTHING;
+
+ANALYZE civ_turn_rankings;
@@ -0,0 +1,16 @@
+-- 003: Win probability of every civilization at every turn of a game
+--
+-- Written by predict_winner.py --timeline in one batched pass per game and
+-- charted in Superset (x: game_turn, metric: win_probability, series:
+-- civilization). A game's rows are replaced whenever its timeline is rebuilt.
+
+CREATE TABLE IF NOT EXISTS prediction_timeline (
+    game_id VARCHAR(100) NOT NULL,
+    game_turn INTEGER NOT NULL,
+    civilization VARCHAR(50) NOT NULL,
+    win_probability DOUBLE PRECISION NOT NULL,
+    probability_rank INTEGER NOT NULL,
+    model_version VARCHAR(20),
+    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (game_id, game_turn, civilization)
+);
@@ -0,0 +1,22 @@
+-- 004: Backtest metrics of a model version at every turn of every archived game
+--
+-- Written by backtest.py, one row per (model_version, game_id, game_turn).
+-- A version's rows are replaced whenever it is backtested again. Chart
+-- winner_correct / brier / log_loss against game_turn in Superset, filtering
+-- on in_training = false for held-out curves.
+
+CREATE TABLE IF NOT EXISTS backtest_results (
+    model_version VARCHAR(20) NOT NULL,
+    game_id VARCHAR(100) NOT NULL,
+    game_turn INTEGER NOT NULL,
+    final_turn INTEGER NOT NULL,
+    civilizations INTEGER NOT NULL,
+    predicted_winner VARCHAR(50) NOT NULL,
+    winner_correct BOOLEAN NOT NULL,
+    accuracy DOUBLE PRECISION NOT NULL,
+    brier DOUBLE PRECISION NOT NULL,
+    log_loss DOUBLE PRECISION NOT NULL,
+    in_training BOOLEAN NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (model_version, game_id, game_turn)
+);
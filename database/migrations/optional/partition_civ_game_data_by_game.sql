@@ -0,0 +1,61 @@
+-- Optional: LIST-partition civ_game_data by game_id, one partition per game
+--
+-- Apply with: python migrate_database.py --partition-by-game
+-- The loader creates the partition for each new game it detects; anything
+-- else lands in civ_game_data_default. Requires migration 001.
+
+-- Partitioned copy with the same columns and defaults (id keeps its sequence)
+CREATE TABLE civ_game_data_by_game (LIKE civ_game_data INCLUDING DEFAULTS)
+    PARTITION BY LIST (game_id);
+
+DO $$
+DECLARE
+    game RECORD;
+BEGIN
+    FOR game IN SELECT DISTINCT game_id FROM civ_game_data LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF civ_game_data_by_game FOR VALUES IN (%L)',
+            'civ_game_data_g_' || substr(md5(game.game_id), 1, 12), game.game_id
+        );
+    END LOOP;
+END $$;
+
+CREATE TABLE civ_game_data_default PARTITION OF civ_game_data_by_game DEFAULT;
+
+INSERT INTO civ_game_data_by_game SELECT * FROM civ_game_data;
+
+-- Keep the id sequence when the old table goes away
+DO $$
+BEGIN
+    IF to_regclass('civ_game_data_id_seq') IS NOT NULL THEN
+        ALTER SEQUENCE civ_game_data_id_seq OWNED BY NONE;
+    END IF;
+END $$;
+
+DROP TABLE civ_game_data;
+ALTER TABLE civ_game_data_by_game RENAME TO civ_game_data;
+
+DO $$
+BEGIN
+    IF to_regclass('civ_game_data_id_seq') IS NOT NULL THEN
+        ALTER SEQUENCE civ_game_data_id_seq OWNED BY civ_game_data.id;
+    END IF;
+END $$;
+
+-- Unique key and the 001 indexes, created on every partition
+ALTER TABLE civ_game_data
+    ADD CONSTRAINT civ_game_data_natural_key UNIQUE (game_id, game_turn, civilization);
+
+CREATE INDEX IF NOT EXISTS idx_civ_game_data_created_at
+    ON civ_game_data (created_at)
+    INCLUDE (game_id);
+
+CREATE INDEX IF NOT EXISTS idx_civ_game_data_game_turn
+    ON civ_game_data (game_id, game_turn)
+    INCLUDE (civilization, total_score, yields_science, yields_culture);
+
+CREATE INDEX IF NOT EXISTS idx_civ_game_data_game_civ_turn
+    ON civ_game_data (game_id, civilization, game_turn)
+    INCLUDE (total_score);
+
+ANALYZE civ_game_data;
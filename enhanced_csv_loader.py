@@ -13,8 +13,17 @@ from psycopg2.extras import execute_values
 import logging
 from datetime import datetime
 
+from incremental_log_reader import IncrementalLogReader
+from log_schemas import read_log_csv
+from feature_store import FeatureStore
+
 class CivDataLoader:
-    def __init__(self):
+    def __init__(self, incremental=False, checkpoint_path='civ_data_loader_checkpoints.json',
+                 game_id='current_logs'):
+        """Set incremental=True to only load lines appended since commit_checkpoints()
+        
+        game_id tags the feature store partition the loaded logs are saved under.
+        """
         self.logs_path = Path(os.path.expandvars(r"${LOCALAPPDATA}\Firaxis Games\Sid Meier's Civilization VI\Logs"))
         self.setup_logging()
         
@@ -33,6 +42,13 @@ class CivDataLoader:
             'user': 'civ6_user',
             'password': 'civ6_password'
         }
+        
+        # Tail reader for incremental refreshes (None = always read whole files)
+        self.reader = IncrementalLogReader(checkpoint_path) if incremental else None
+        
+        # Parquet datasets replace the timestamped CSV snapshots
+        self.game_id = game_id
+        self.feature_store = FeatureStore()
     
     def setup_logging(self):
         """Setup logging configuration"""
@@ -46,16 +62,22 @@ class CivDataLoader:
         )
         self.logger = logging.getLogger(__name__)
     
-    def clean_column_names(self, df):
-        """Clean column names by removing leading/trailing spaces"""
-        df.columns = df.columns.str.strip()
+    def read_log(self, file_path):
+        """Read a log CSV (stripped, renamed and typed in one parse) - whole file, or only the appended lines when incremental"""
+        if self.reader is None:
+            return read_log_csv(file_path)
+        
+        df = self.reader.read(file_path)
+        if self.reader.was_full_reload(file_path):
+            self.logger.info(f"Full read of {file_path.name} ({self.reader.reload_reason(file_path)})")
+        else:
+            self.logger.info(f"Incremental read of {file_path.name}: {len(df)} new rows")
         return df
     
-    def clean_player_names(self, df, player_col='Player'):
-        """Clean player names by removing leading spaces"""
-        if player_col in df.columns:
-            df[player_col] = df[player_col].str.strip()
-        return df
+    def commit_checkpoints(self):
+        """Remember how far each log has been consumed (incremental mode only)"""
+        if self.reader is not None:
+            self.reader.commit()
     
     def load_player_stats(self):
         """Load and clean Player_Stats.csv"""
@@ -63,37 +85,7 @@ class CivDataLoader:
         
         try:
             self.logger.info(f"Loading {file_path}")
-            df = pd.read_csv(file_path)
-            
-            # Clean column names and data
-            df = self.clean_column_names(df)
-            df = self.clean_player_names(df, 'Player')
-            
-            # Rename columns for database consistency
-            column_mapping = {
-                'Game Turn': 'game_turn',
-                'Player': 'player_name',
-                'Num Cities': 'num_cities',
-                'Population': 'population',
-                'Techs': 'techs',
-                'Civics': 'civics',
-                'Land Units': 'land_units',
-                'corps': 'corps',
-                'Armies': 'armies',
-                'Naval Units': 'naval_units',
-                'TILES: Owned': 'tiles_owned',
-                'Improved': 'tiles_improved',
-                'BALANCE: Gold': 'balance_gold',
-                'Faith': 'balance_faith',
-                'YIELDS: Science': 'yield_science',
-                'Culture': 'yield_culture',
-                'Gold': 'yield_gold',
-                'Faith.1': 'yield_faith',
-                'Production': 'yield_production',
-                'Food': 'yield_food'
-            }
-            
-            df = df.rename(columns=column_mapping)
+            df = self.read_log(file_path)
             
             # Add metadata
             df['data_source'] = 'player_stats'
@@ -112,29 +104,7 @@ class CivDataLoader:
         
         try:
             self.logger.info(f"Loading {file_path}")
-            df = pd.read_csv(file_path)
-            
-            # Clean column names and data
-            df = self.clean_column_names(df)
-            df = self.clean_player_names(df, 'Player')
-            
-            # Rename columns for database consistency
-            column_mapping = {
-                'Game Turn': 'game_turn',
-                'Player': 'player_name',
-                'BY TYPE: Tiles': 'tiles_by_type',
-                'Buildings': 'buildings',
-                'Districts': 'districts',
-                'Population': 'population_alt',
-                'Outgoing Trade Routes': 'outgoing_trade_routes',
-                'TOURISM': 'tourism',
-                'Diplo Victory': 'diplo_victory_points',
-                'BALANCE: Favor': 'balance_favor',
-                'LIFETIME: Favor': 'lifetime_favor',
-                'CO2 Per Turn': 'co2_per_turn'
-            }
-            
-            df = df.rename(columns=column_mapping)
+            df = self.read_log(file_path)
             
             # Add metadata
             df['data_source'] = 'player_stats_2'
@@ -153,32 +123,7 @@ class CivDataLoader:
         
         try:
             self.logger.info(f"Loading {file_path}")
-            df = pd.read_csv(file_path)
-            
-            # Clean column names
-            df = self.clean_column_names(df)
-            
-            # Rename columns for database consistency
-            column_mapping = {
-                'Game Turn': 'game_turn',
-                'Player': 'player_id',
-                'Score': 'total_score',
-                'CATEGORY_CIVICS': 'score_civics',
-                'CATEGORY_EMPIRE': 'score_empire',
-                'CATEGORY_GREAT_PEOPLE': 'score_great_people',
-                'CATEGORY_RELIGION': 'score_religion',
-                'CATEGORY_TECH': 'score_tech',
-                'CATEGORY_WONDER': 'score_wonder',
-                'CATEGORY_TRADE': 'score_trade',
-                'CATEGORY_PILLAGE': 'score_pillage',
-                'CATEGORY_INCOME': 'score_income',
-                'CATEGORY_SCENARIO1': 'score_scenario1',
-                'CATEGORY_SCENARIO2': 'score_scenario2',
-                'CATEGORY_SCENARIO3': 'score_scenario3',
-                'CATEGORY_E': 'score_category_e'
-            }
-            
-            df = df.rename(columns=column_mapping)
+            df = self.read_log(file_path)
             
             # Add metadata
             df['data_source'] = 'game_scores'
@@ -265,6 +210,15 @@ class CivDataLoader:
             return output_path
         return None
     
+    def save_to_feature_store(self, df, dataset):
+        """Save dataframe as this game's partition of a feature store dataset"""
+        if df is not None:
+            manifest = self.feature_store.write(dataset, df, game_id=self.game_id, overwrite=False)
+            self.logger.info(f"Saved {len(df)} rows to feature store dataset {dataset} "
+                             f"({manifest['total_rows']} rows across {len(manifest['partitions'])} games)")
+            return f"{self.feature_store.root}/{dataset}"
+        return None
+    
     def analyze_data_quality(self, df):
         """Analyze data quality and completeness"""
         if df is None:
@@ -334,7 +288,7 @@ def main():
         
         # Save results
         print("\n💾 Saving results...")
-        output_file = loader.save_to_csv(merged_df, "civ6_ml_training_data")
+        output_file = loader.save_to_feature_store(merged_df, "civ6_ml_training_data")
         
         if output_file:
             print(f"✅ ML training dataset saved to: {output_file}")
@@ -342,11 +296,11 @@ def main():
         
         # Save individual cleaned datasets too
         if df_stats is not None:
-            loader.save_to_csv(df_stats, "civ6_player_stats_cleaned")
+            loader.save_to_feature_store(df_stats, "civ6_player_stats_cleaned")
         if df_stats2 is not None:
-            loader.save_to_csv(df_stats2, "civ6_player_stats_2_cleaned")
+            loader.save_to_feature_store(df_stats2, "civ6_player_stats_2_cleaned")
         if df_scores is not None:
-            loader.save_to_csv(df_scores, "civ6_game_scores_cleaned")
+            loader.save_to_feature_store(df_scores, "civ6_game_scores_cleaned")
     
     else:
         print("❌ Failed to create merged dataset")
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Feature Attribution for the Victory Prediction Model
+====================================================
+
+Impurity importances (feature_importances_) say which features the trees
+split on, not which ones the predictions depend on. This module adds:
+
+    permutation importance   drop in held-out accuracy when one feature's
+                             column is shuffled (same procedure and seeds as
+                             sklearn.inspection.permutation_importance)
+    tree attributions        per-prediction contributions of each feature
+                             (path attribution via CompiledForest.contributions)
+
+Permutation importance fans the features out over a process pool. The test
+matrix and labels are copied once into shared memory (see group_cv.py) and
+every worker receives the model once when it starts, so a task is just a
+column index. Results are cached as JSON under attribution_cache/, keyed by
+the model's artifact hash (the manifest's artifact.sha256 for saved
+versions), a hash of the evaluation data and the settings - asking again
+for the same model and data reads the file instead of rescoring.
+
+Tree attributions explain the raw forest probability (before calibration).
+AttributionCache keeps the ones already computed per model and rows, so
+predict_winner and the prediction server don't recompute them per request.
+
+Usage:
+    importance = permutation_importance(model, X_test, y_test, n_repeats=10)
+    python feature_attribution.py                   # latest model on its held-out games
+    python feature_attribution.py --version v0003 --repeats 20 --jobs 4
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from group_cv import _attach_shared_arrays, _share_array, _shared
+from model_registry import artifact_hash, hash_frame
+
+DEFAULT_CACHE_DIR = 'attribution_cache'
+ATTRIBUTION_CACHE_SIZE = 1024
+
+# Worker-side model and data (set by _init_worker, or directly when running in-process)
+_worker = {}
+
+def _init_worker(specs, model, feature_names):
+    """Pool initializer: attach the shared test data and keep the model"""
+    _attach_shared_arrays(specs)
+    _worker.update(X=_shared['X'][1], y=_shared['y'][1], model=model, feature_names=feature_names)
+
+def _accuracy(X):
+    """Accuracy of the worker's model on a (possibly permuted) test matrix"""
+    if _worker['feature_names'] is not None:
+        X = pd.DataFrame(X, columns=_worker['feature_names'])
+    return float(np.mean(_worker['model'].predict(X) == _worker['y']))
+
+def _permute_feature(column, seed, n_repeats, baseline):
+    """Accuracy drops for one shuffled column, repeat by repeat (sklearn's shuffling order)"""
+    X = _worker['X']
+    random_state = np.random.RandomState(seed)
+    X_permuted = X.copy()
+    shuffling_idx = np.arange(len(X))
+    drops = []
+    for _ in range(n_repeats):
+        random_state.shuffle(shuffling_idx)
+        X_permuted[:, column] = X_permuted[shuffling_idx, column]
+        drops.append(baseline - _accuracy(X_permuted))
+    return column, drops
+
+def cache_key(model_hash, X, y, n_repeats, random_state):
+    """Cache file name for one model, evaluation set and settings"""
+    data_hash = hash_frame(pd.concat([pd.DataFrame(X).reset_index(drop=True),
+                                      pd.Series(np.asarray(y), name='__target__')], axis=1))
+    settings = hashlib.sha256(f"{data_hash}:{n_repeats}:{random_state}".encode('utf-8')).hexdigest()
+    return f"{model_hash[:16]}_{settings[:16]}.json"
+
+def permutation_importance(model, X, y, n_repeats=10, random_state=42, n_jobs=None,
+                           model_hash=None, cache_dir=DEFAULT_CACHE_DIR):
+    """Permutation importance of every feature, from the cache when possible
+
+    model_hash defaults to artifact_hash(model); pass the manifest's
+    artifact.sha256 for a loaded registry version. n_jobs=None uses every
+    core (capped at the number of features), n_jobs=1 stays in-process.
+    cache_dir=None disables the cache. Returns a frame sorted by
+    importance_mean with feature, importance_mean, importance_std.
+    """
+    feature_names = list(X.columns) if isinstance(X, pd.DataFrame) else None
+    columns = feature_names or [f"x{i}" for i in range(np.asarray(X).shape[1])]
+    model_hash = model_hash or artifact_hash(model)
+
+    cache_path = None
+    if cache_dir is not None:
+        cache_path = Path(cache_dir) / cache_key(model_hash, X, y, n_repeats, random_state)
+        if cache_path.exists():
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            return pd.DataFrame(cached['features'])
+
+    X = np.ascontiguousarray(np.asarray(X, dtype=np.float64))
+    y = np.asarray(y)
+    # One seed for every column, drawn like sklearn does
+    seed = np.random.RandomState(random_state).randint(np.iinfo(np.int32).max + 1)
+    n_workers = min(n_jobs or os.cpu_count() or 1, X.shape[1])
+
+    if n_workers == 1:
+        _worker.update(X=X, y=y, model=model, feature_names=feature_names)
+        baseline = _accuracy(X)
+        results = [_permute_feature(column, seed, n_repeats, baseline) for column in range(X.shape[1])]
+    else:
+        blocks, specs = [], {}
+        try:
+            for key, array in (('X', X), ('y', y)):
+                block, specs[key] = _share_array(array)
+                blocks.append(block)
+            _worker.update(X=X, y=y, model=model, feature_names=feature_names)
+            baseline = _accuracy(X)
+            with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                                     initargs=(specs, model, feature_names)) as pool:
+                futures = [pool.submit(_permute_feature, column, seed, n_repeats, baseline)
+                           for column in range(X.shape[1])]
+                results = [future.result() for future in futures]
+        finally:
+            for block in blocks:
+                block.close()
+                block.unlink()
+
+    features = [
+        {'feature': columns[column], 'importance_mean': float(np.mean(drops)),
+         'importance_std': float(np.std(drops)), 'importances': [float(d) for d in drops]}
+        for column, drops in sorted(results)
+    ]
+    importance = pd.DataFrame(features).sort_values('importance_mean', ascending=False, ignore_index=True)
+
+    if cache_path is not None:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'model_hash': model_hash, 'baseline_accuracy': baseline, 'n_repeats': n_repeats,
+                       'random_state': random_state, 'features': importance.to_dict('records')}, f, indent=2)
+        os.replace(tmp_path, cache_path)
+    return importance
+
+class AttributionCache:
+    def __init__(self, forest, feature_columns, model_hash, size=ATTRIBUTION_CACHE_SIZE):
+        """Per-row tree attributions of one compiled forest, kept in an LRU cache"""
+        self.forest = forest
+        self.feature_columns = list(feature_columns)
+        self.model_hash = model_hash
+        self.size = size
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        # The prediction server explains from several request threads at once
+        self._lock = threading.Lock()
+
+    def explain(self, X):
+        """Contribution of every feature to each row's win probability (frame indexed like X)
+
+        Rows already explained for this model come from the cache; the rest
+        are walked through the forest in one batch.
+        """
+        index = X.index if isinstance(X, pd.DataFrame) else None
+        values = np.ascontiguousarray(np.asarray(X, dtype=np.float64))
+        keys = [(self.model_hash, row.tobytes()) for row in values]
+        with self._lock:
+            found = {i: self.cache[key] for i, key in enumerate(keys) if key in self.cache}
+        missing = [i for i in range(len(keys)) if i not in found]
+
+        computed = {}
+        if missing:
+            _, contributions = self.forest.contributions(values[missing])
+            computed = dict(zip(missing, contributions))
+
+        rows = [found[i] if i in found else computed[i] for i in range(len(keys))]
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(missing)
+            # Refresh the hits before adding new rows, so eviction never drops a row of this batch first
+            for i in found:
+                if keys[i] in self.cache:
+                    self.cache.move_to_end(keys[i])
+            for i, row in computed.items():
+                self.cache[keys[i]] = row
+            while len(self.cache) > self.size:
+                self.cache.popitem(last=False)
+        return pd.DataFrame(np.vstack(rows), columns=self.feature_columns, index=index)
+
+def top_drivers(contributions, n=3):
+    """The n features that raise each row's win probability the most, as (feature, contribution) lists"""
+    order = np.argsort(-contributions.to_numpy(), axis=1)[:, :n]
+    columns = np.asarray(contributions.columns)
+    values = contributions.to_numpy()
+    return [[(columns[j], float(values[i, j])) for j in row if values[i, j] > 0] for i, row in enumerate(order)]
+
+def print_importance(importance, impurity=None, n=None):
+    """Permutation importance table, with impurity importance next to it when given"""
+    header = f"   {'feature':<22s} {'permutation':>12s} {'± std':>7s}"
+    print(header + (f" {'impurity':>9s}" if impurity is not None else ""))
+    rows = importance if n is None else importance.head(n)
+    for feature, mean, std in zip(rows['feature'], rows['importance_mean'], rows['importance_std']):
+        line = f"   {feature:<22s} {mean:12.4f} {std:7.4f}"
+        if impurity is not None:
+            line += f" {impurity.get(feature, float('nan')):9.4f}"
+        print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description="Permutation importance of a model version on its held-out games")
+    parser.add_argument('--version', default='latest', help="Registry version (default: latest)")
+    parser.add_argument('--repeats', type=int, default=10, help="Shuffles per feature")
+    parser.add_argument('--jobs', type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument('--no-cache', action='store_true', help="Recompute even if a cached result exists")
+    args = parser.parse_args()
+
+    from feature_store import FeatureStore
+    from ml_data_preparation import TRAINING_DATASET
+    from model_registry import ModelRegistry
+
+    print("🎯 PERMUTATION FEATURE IMPORTANCE")
+    print("=" * 60)
+
+    model, manifest = ModelRegistry().load(args.version)
+    if manifest is None:
+        print(f"❌ Model version '{args.version}' not found - run victory_prediction_model.py first")
+        return
+
+    feature_columns = manifest['feature_columns']
+    seen = set((manifest.get('lineage') or {}).get('games_seen', []))
+    store = FeatureStore()
+    held_out = [game for game in store.games(TRAINING_DATASET) if game not in seen]
+    if not held_out:
+        print("⚠️  Every stored game was used for training - scoring on all of them (in-sample)")
+        held_out = None
+    df = store.read(TRAINING_DATASET, columns=feature_columns + ['will_win'], games=held_out)
+    X, y = df[feature_columns].fillna(0), df['will_win']
+    print(f"   Model {manifest['version']}: {len(X)} rows from "
+          f"{len(held_out) if held_out else len(store.games(TRAINING_DATASET))} games, {args.repeats} repeats")
+
+    start = time.perf_counter()
+    importance = permutation_importance(model, X, y, args.repeats, n_jobs=args.jobs,
+                                        model_hash=manifest['artifact'].get('sha256'),
+                                        cache_dir=None if args.no_cache else DEFAULT_CACHE_DIR)
+    print(f"   computed in {time.perf_counter() - start:.2f}s")
+    impurity = dict(zip(feature_columns, model.feature_importances_))
+    print_importance(importance, impurity)
+
+if __name__ == "__main__":
+    main()
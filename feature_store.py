@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Civ VI Feature Store
+Columnar Parquet storage for training features and cleaned log datasets,
+partitioned by game_id
+
+Layout:
+    feature_store/<dataset>/_manifest.json
+    feature_store/<dataset>/game_id=<game>/part-0.parquet
+
+The manifest records the schema, each game's file and row count, so readers
+can pick games and columns without touching the other files. Files are
+zstd-compressed, with int32 integers and dictionary-encoded strings,
+and are read through memory maps.
+
+Usage:
+    store = FeatureStore()
+    store.write('training_features', df)
+    df = store.read('training_features', columns=['game_id', 'techs'], games=['2025-08-01_20:00:00'])
+"""
+
+import json
+import os
+import re
+import shutil
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+DEFAULT_ROOT = 'feature_store'
+PARTITION_COLUMN = 'game_id'
+MANIFEST_NAME = '_manifest.json'
+COMPRESSION = 'zstd'
+
+# Narrowest integer type used on disk - anything smaller invites overflow in derived features
+MIN_INT_DTYPE = np.int32
+
+def _narrow_types(df):
+    """int32 where the values fit and categorical strings (floats are left as float64)"""
+    df = df.copy()
+    for col in df.columns:
+        series = df[col]
+        if pd.api.types.is_bool_dtype(series):
+            continue
+        if pd.api.types.is_integer_dtype(series):
+            info = np.iinfo(MIN_INT_DTYPE)
+            if len(series) == 0 or (series.min() >= info.min and series.max() <= info.max):
+                df[col] = series.astype(MIN_INT_DTYPE)
+        elif (pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)) \
+                and col != PARTITION_COLUMN:
+            df[col] = series.astype('category')
+    return df
+
+def _partition_dir(game_id):
+    """Filesystem-safe directory name for a game (game ids contain ':')"""
+    return f"{PARTITION_COLUMN}=" + re.sub(r'[^A-Za-z0-9_.-]', '-', str(game_id))
+
+class FeatureStore:
+    def __init__(self, root=DEFAULT_ROOT):
+        """Initialize a store rooted at a directory"""
+        self.root = Path(root)
+
+    def _dataset_dir(self, dataset):
+        """Directory holding one dataset"""
+        return self.root / dataset
+
+    def manifest(self, dataset):
+        """Manifest of a dataset (None if it was never written)"""
+        try:
+            with open(self._dataset_dir(dataset) / MANIFEST_NAME, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def exists(self, dataset):
+        """Whether a dataset has been written"""
+        return self.manifest(dataset) is not None
+
+    def games(self, dataset):
+        """Game ids stored in a dataset"""
+        manifest = self.manifest(dataset) or {'partitions': {}}
+        return list(manifest['partitions'])
+
+    def write(self, dataset, df, game_id=None, overwrite=True):
+        """Write a frame partitioned by game_id and update the manifest
+
+        Frames without a game_id column are stored as the single game passed
+        in game_id. overwrite=True replaces the whole dataset; overwrite=False
+        only replaces the games present in df and keeps the others.
+        Returns the manifest.
+        """
+        if PARTITION_COLUMN not in df.columns:
+            if game_id is None:
+                raise ValueError(f"{dataset}: frame has no {PARTITION_COLUMN} column and no game_id was given")
+            df = df.assign(**{PARTITION_COLUMN: str(game_id)})
+
+        dataset_dir = self._dataset_dir(dataset)
+        manifest = None if overwrite else self.manifest(dataset)
+        if overwrite and dataset_dir.exists():
+            shutil.rmtree(dataset_dir)
+        dataset_dir.mkdir(parents=True, exist_ok=True)
+
+        df = _narrow_types(df)
+        partitions = dict(manifest['partitions']) if manifest else {}
+        schema = None
+
+        for game, game_df in df.groupby(PARTITION_COLUMN, sort=True, observed=True):
+            table = pa.Table.from_pandas(game_df.reset_index(drop=True), preserve_index=False)
+            schema = schema or table.schema
+            table = table.cast(schema)
+
+            relative_path = Path(_partition_dir(game)) / 'part-0.parquet'
+            path = dataset_dir / relative_path
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix('.tmp')
+            pq.write_table(table, tmp_path, compression=COMPRESSION)
+            os.replace(tmp_path, path)
+
+            partitions[str(game)] = {'path': relative_path.as_posix(), 'rows': len(game_df)}
+
+        if schema is None:
+            schema = pa.Schema.from_pandas(df, preserve_index=False)
+
+        manifest = {
+            'dataset': dataset,
+            'partition_column': PARTITION_COLUMN,
+            'compression': COMPRESSION,
+            'schema': {field.name: str(field.type) for field in schema},
+            'partitions': partitions,
+            'total_rows': sum(p['rows'] for p in partitions.values()),
+            'updated_at': datetime.now().isoformat(timespec='seconds'),
+        }
+        tmp_manifest = dataset_dir / (MANIFEST_NAME + '.tmp')
+        with open(tmp_manifest, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_manifest, dataset_dir / MANIFEST_NAME)
+        return manifest
+
+    def read(self, dataset, columns=None, games=None, memory_map=True):
+        """Load a dataset, optionally only some columns and games
+
+        Only the selected games' files are opened and only the requested
+        columns are decoded. Returns None if the dataset doesn't exist.
+        """
+        manifest = self.manifest(dataset)
+        if manifest is None:
+            return None
+
+        if columns is not None:
+            unknown = [col for col in columns if col not in manifest['schema']]
+            if unknown:
+                raise KeyError(f"{dataset}: unknown columns {unknown}")
+
+        partitions = manifest['partitions']
+        selected = list(partitions) if games is None else [str(g) for g in games if str(g) in partitions]
+        if not selected:
+            return pd.DataFrame(columns=columns if columns is not None else list(manifest['schema']))
+
+        dataset_dir = self._dataset_dir(dataset)
+        tables = [
+            pq.read_table(dataset_dir / partitions[game]['path'], columns=columns, memory_map=memory_map)
+            for game in selected
+        ]
+        table = pa.concat_tables(tables, promote_options='permissive') if len(tables) > 1 else tables[0]
+        return table.to_pandas()
+
+    def row_counts(self, dataset):
+        """Rows per game from the manifest (no data files are read)"""
+        manifest = self.manifest(dataset) or {'partitions': {}}
+        return {game: info['rows'] for game, info in manifest['partitions'].items()}
+
+def describe(root=DEFAULT_ROOT):
+    """Print every dataset in a store with its games and row counts"""
+    root = Path(root)
+    store = FeatureStore(root)
+    datasets = sorted(p.name for p in root.iterdir() if (p / MANIFEST_NAME).exists()) if root.exists() else []
+    if not datasets:
+        print(f"📭 No datasets in {root}")
+        return
+
+    for dataset in datasets:
+        manifest = store.manifest(dataset)
+        size = sum(f.stat().st_size for f in (root / dataset).rglob('*.parquet'))
+        print(f"📦 {dataset}: {manifest['total_rows']:,d} rows, {len(manifest['partitions'])} games, "
+              f"{len(manifest['schema'])} columns, {size / 1024:.1f} KB (updated {manifest['updated_at']})")
+        for game, rows in store.row_counts(dataset).items():
+            print(f"   {game}: {rows:,d} rows")
+
+if __name__ == "__main__":
+    describe()
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Game-Grouped Cross-Validation for VictoryPredictionModel
+========================================================
+
+Training rows are per civilization per turn, so a plain KFold puts turns of
+the same game on both sides of a split and the model gets graded on games it
+has already seen. Folds here are built from whole games (game_id):
+
+    logo         - leave-one-game-out: one fold per game
+    group_kfold  - GroupKFold: games spread over n_splits folds
+
+Folds run in a process pool. The feature matrix and labels are copied once
+into shared memory; workers attach to it read-only when they start, so each
+task only ships its fold indices instead of a pickled copy of the data.
+The pool and shared arrays live until close(), so a hyperparameter search
+reuses them for every configuration.
+
+Usage:
+    with GroupCrossValidator(X, y, groups, method='logo') as cv:
+        mean_accuracy = cv(params)          # CVEvaluator-compatible
+        print_fold_report(cv.last_folds)
+
+    python group_cv.py                      # fold report for the current training data
+    python group_cv.py --method group_kfold --splits 5
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import GroupKFold, LeaveOneGroupOut
+
+METHODS = ('logo', 'group_kfold')
+
+# Worker-side views of the shared arrays (set by _attach_shared_arrays)
+_shared = {}
+
+def game_folds(groups, method='group_kfold', n_splits=5):
+    """(train_idx, test_idx) pairs that never split a game across train and test"""
+    groups = np.asarray(groups)
+    n_games = len(np.unique(groups))
+    if n_games < 2:
+        raise ValueError(f"Need at least 2 games for grouped cross-validation, got {n_games}")
+
+    if method == 'logo':
+        splitter = LeaveOneGroupOut()
+    elif method == 'group_kfold':
+        splitter = GroupKFold(n_splits=min(n_splits, n_games))
+    else:
+        raise ValueError(f"Unknown CV method '{method}' (choose from {', '.join(METHODS)})")
+
+    dummy = np.zeros(len(groups))
+    return list(splitter.split(dummy, dummy, groups))
+
+def _share_array(array):
+    """Copy an array into a new shared memory block; returns (block, spec)"""
+    array = np.ascontiguousarray(array)
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+    return block, (block.name, array.shape, array.dtype.str)
+
+def _attach_shared_arrays(specs):
+    """Pool initializer: map the shared arrays into this worker, read-only"""
+    for key, (name, shape, dtype) in specs.items():
+        block = shared_memory.SharedMemory(name=name)
+        view = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+        view.flags.writeable = False
+        _shared[key] = (block, view)
+
+def _fit_fold(fold, train_idx, test_idx, params, random_state):
+    """Fit and score one fold against the worker's shared arrays"""
+    X = _shared['X'][1]
+    y = _shared['y'][1]
+
+    start = time.perf_counter()
+    model = RandomForestClassifier(random_state=random_state, n_jobs=1, **params)
+    model.fit(X[train_idx], y[train_idx])
+    fit_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    accuracy = float(np.mean(model.predict(X[test_idx]) == y[test_idx]))
+    score_seconds = time.perf_counter() - start
+
+    return {
+        'fold': fold,
+        'train_rows': len(train_idx),
+        'test_rows': len(test_idx),
+        'accuracy': accuracy,
+        'fit_seconds': fit_seconds,
+        'score_seconds': score_seconds,
+    }
+
+class GroupCrossValidator:
+    def __init__(self, X, y, groups, method='group_kfold', n_splits=5, n_jobs=None, random_state=42):
+        """Shared-memory process pool that scores RandomForest configurations on game folds
+
+        n_jobs=None uses every core (capped at the number of folds).
+        """
+        self.groups = np.asarray(groups).astype(str)
+        self.method = method
+        self.folds = game_folds(self.groups, method, n_splits)
+        self.fold_games = [sorted(set(self.groups[test_idx])) for _, test_idx in self.folds]
+        self.random_state = random_state
+        self.n_fits = 0
+        self.last_folds = None
+        self.fold_results = {}
+
+        self._blocks = []
+        specs = {}
+        for key, array in (('X', np.asarray(X, dtype=np.float64)), ('y', np.asarray(y))):
+            block, specs[key] = _share_array(array)
+            self._blocks.append(block)
+
+        workers = min(n_jobs or os.cpu_count() or 1, len(self.folds))
+        self._pool = ProcessPoolExecutor(max_workers=workers, initializer=_attach_shared_arrays,
+                                         initargs=(specs,))
+        self.n_workers = workers
+
+    def evaluate(self, params):
+        """Per-fold results for one configuration, in fold order"""
+        futures = [
+            self._pool.submit(_fit_fold, fold, train_idx, test_idx, params, self.random_state)
+            for fold, (train_idx, test_idx) in enumerate(self.folds)
+        ]
+        results = [future.result() for future in futures]
+        for result in results:
+            result['games'] = self.fold_games[result['fold']]
+
+        self.n_fits += len(results)
+        self.last_folds = results
+        self.fold_results[tuple(sorted((key, str(value)) for key, value in params.items()))] = results
+        return results
+
+    def folds_for(self, params):
+        """Fold results of a configuration that was already evaluated (None otherwise)"""
+        return self.fold_results.get(tuple(sorted((key, str(value)) for key, value in params.items())))
+
+    def __call__(self, params):
+        """Mean fold accuracy (same interface as hyperparameter_search.CVEvaluator)"""
+        return float(np.mean([result['accuracy'] for result in self.evaluate(params)]))
+
+    def close(self):
+        """Stop the workers and free the shared memory"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def print_fold_report(results):
+    """Per-fold accuracy and timing table"""
+    print(f"   {'fold':>4s} {'games':<28s} {'train':>6s} {'test':>5s} {'accuracy':>9s} {'fit s':>7s} {'score s':>8s}")
+    for result in results:
+        games = result.get('games', [])
+        games = games[0] if len(games) == 1 else f"{len(games)} games"
+        print(f"   {result['fold']:4d} {games:<28s} {result['train_rows']:6d} {result['test_rows']:5d} "
+              f"{result['accuracy']:9.3f} {result['fit_seconds']:7.2f} {result['score_seconds']:8.3f}")
+
+    accuracies = np.array([result['accuracy'] for result in results])
+    fit_seconds = sum(result['fit_seconds'] for result in results)
+    print(f"   mean accuracy {accuracies.mean():.3f} ± {accuracies.std():.3f} over {len(results)} folds, "
+          f"{fit_seconds:.1f}s of fitting")
+
+def main():
+    parser = argparse.ArgumentParser(description="Game-grouped cross-validation report for the training data")
+    parser.add_argument('--method', choices=METHODS, default='logo')
+    parser.add_argument('--splits', type=int, default=5, help="Folds for group_kfold")
+    parser.add_argument('--jobs', type=int, default=None, help="Worker processes (default: all cores)")
+    args = parser.parse_args()
+
+    from victory_prediction_model import VictoryPredictionModel
+
+    print("🎲 GAME-GROUPED CROSS-VALIDATION")
+    print("=" * 60)
+
+    trainer = VictoryPredictionModel()
+    df = trainer.load_training_data()
+    if df is None:
+        return
+    X, y, df_clean = trainer.prepare_features(df)
+
+    start = time.perf_counter()
+    with GroupCrossValidator(X, y, df_clean['game_id'], args.method, args.splits, args.jobs) as cv:
+        print(f"   {len(cv.folds)} folds ({args.method}) on {cv.n_workers} worker(s)")
+        results = cv.evaluate({'n_estimators': 100})
+    print_fold_report(results)
+    print(f"   wall time {time.perf_counter() - start:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Hyperparameter Search Strategies for VictoryPredictionModel
+===========================================================
+
+Pluggable RandomForest search strategies that share one cross-validated
+evaluator and a wall-clock budget:
+
+    grid     - exhaustive grid over PARAM_GRID (what train_model always did)
+    halving  - successive halving with n_estimators as the resource: every
+               configuration gets a small forest, the best third moves on
+               to a forest three times the size
+    tpe      - Tree-structured Parzen Estimator over the same grid: after a
+               few random trials, new trials are drawn where the good trials
+               are dense and the bad ones are sparse
+
+Every strategy stops starting new fits once its budget is spent and
+returns the best configuration it has seen.
+
+Usage:
+    python hyperparameter_search.py                  # compare all strategies
+    python hyperparameter_search.py --budget 30      # 30s per strategy
+"""
+
+import argparse
+import itertools
+import time
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import cross_val_score, ParameterGrid
+
+from group_cv import GroupCrossValidator
+
+# Search space used by every strategy
+PARAM_GRID = {
+    'n_estimators': [50, 100, 200],
+    'max_depth': [5, 10, 15, None],
+    'min_samples_split': [2, 5, 10],
+    'min_samples_leaf': [1, 2, 4]
+}
+
+RESOURCE = 'n_estimators'
+
+# RandomForest defaults, used when a search has no scored configuration to pick from
+DEFAULT_PARAMS = {'n_estimators': 100, 'max_depth': None, 'min_samples_split': 2, 'min_samples_leaf': 1}
+
+class Budget:
+    def __init__(self, seconds=None):
+        """Wall-clock budget (None = unlimited)"""
+        self.seconds = seconds
+        self.start = time.perf_counter()
+
+    def elapsed(self):
+        """Seconds since the budget started"""
+        return time.perf_counter() - self.start
+
+    def exhausted(self):
+        """Whether the budget has run out"""
+        return self.seconds is not None and self.elapsed() >= self.seconds
+
+class CVEvaluator:
+    def __init__(self, X, y, cv=5, groups=None, scoring='accuracy', n_jobs=-1, random_state=42):
+        """Cross-validated RandomForest scorer shared by all strategies"""
+        self.X = X
+        self.y = y
+        self.cv = cv
+        self.groups = groups
+        self.scoring = scoring
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+        self.n_fits = 0
+
+    def __call__(self, params):
+        """Mean CV score of one configuration"""
+        model = RandomForestClassifier(random_state=self.random_state, **params)
+        scores = cross_val_score(model, self.X, self.y, groups=self.groups, cv=self.cv,
+                                 scoring=self.scoring, n_jobs=self.n_jobs)
+        self.n_fits += len(scores)
+        return float(np.mean(scores))
+
+class SearchStrategy:
+    name = None
+
+    def run(self, evaluator, param_grid=PARAM_GRID, budget_seconds=None):
+        """Search, then return a result dict with timing and the best configuration"""
+        budget = Budget(budget_seconds)
+        fits_before = evaluator.n_fits
+        self.trials = []
+
+        self.search(evaluator, param_grid, budget)
+
+        # Failed fits score NaN; with nothing scored there is no best configuration
+        scored = [trial for trial in self.trials if np.isfinite(trial[1])]
+        best_params, best_score = self.best(scored) if scored else (None, float('nan'))
+        return {
+            'strategy': self.name,
+            'best_params': best_params,
+            'best_score': best_score,
+            'configurations': len(self.trials),
+            'fits': evaluator.n_fits - fits_before,
+            'seconds': budget.elapsed(),
+            'budget_exhausted': budget.exhausted(),
+        }
+
+    def best(self, trials):
+        """Best (params, score) among the trials"""
+        return max(trials, key=lambda trial: trial[1])
+
+    def _evaluate(self, evaluator, params):
+        """Score a configuration and remember it"""
+        score = evaluator(params)
+        self.trials.append((dict(params), score))
+        return score
+
+    def search(self, evaluator, param_grid, budget):
+        """Evaluate configurations until done or out of budget"""
+        raise NotImplementedError
+
+class GridSearch(SearchStrategy):
+    name = 'grid'
+
+    def search(self, evaluator, param_grid, budget):
+        """Every configuration with the full resource"""
+        for params in ParameterGrid(param_grid):
+            if budget.exhausted():
+                break
+            self._evaluate(evaluator, params)
+
+class SuccessiveHalvingSearch(SearchStrategy):
+    name = 'halving'
+
+    def __init__(self, factor=3, min_resource=25):
+        """Keep the best 1/factor of the candidates each round, with factor x more trees"""
+        self.factor = factor
+        self.min_resource = min_resource
+
+    def best(self, trials):
+        """Best trial of the last round - small-forest scores are too noisy to pick from"""
+        top_resource = max(params[RESOURCE] for params, _ in trials)
+        return max((trial for trial in trials if trial[0][RESOURCE] == top_resource),
+                   key=lambda trial: trial[1])
+
+    def search(self, evaluator, param_grid, budget):
+        """Rounds of cheap forests, spending the big forests only on the survivors"""
+        max_resource = max(param_grid[RESOURCE])
+        other_params = {key: values for key, values in param_grid.items() if key != RESOURCE}
+        candidates = list(ParameterGrid(other_params))
+
+        resource = self.min_resource
+        while candidates and not budget.exhausted():
+            scored = []
+            for params in candidates:
+                if budget.exhausted():
+                    break
+                scored.append((params, self._evaluate(evaluator, dict(params, **{RESOURCE: resource}))))
+
+            if resource >= max_resource or len(scored) <= 1:
+                break
+            scored.sort(key=lambda item: item[1], reverse=True)
+            keep = max(1, len(scored) // self.factor)
+            candidates = [params for params, _ in scored[:keep]]
+            # The last survivor always gets the full-size forest
+            resource = max_resource if keep == 1 else min(resource * self.factor, max_resource)
+
+class TPESearch(SearchStrategy):
+    name = 'tpe'
+
+    def __init__(self, n_trials=30, n_startup=8, gamma=0.25, n_candidates=24, random_state=42):
+        """Tree-structured Parzen Estimator over a discrete grid"""
+        self.n_trials = n_trials
+        self.n_startup = n_startup
+        self.gamma = gamma
+        self.n_candidates = n_candidates
+        self.random_state = random_state
+
+    @staticmethod
+    def _density(trials, key, values):
+        """Smoothed categorical frequency of each value among trials (one pseudo-count each)"""
+        counts = np.ones(len(values))
+        for params, _ in trials:
+            counts[values.index(params[key])] += 1
+        return counts / counts.sum()
+
+    def _suggest(self, rng, param_grid, space, tried):
+        """Pick the untried candidate with the highest l(x)/g(x)"""
+        untried = [params for params in space if self._key(params) not in tried]
+        if not untried:
+            return None
+        if len(self.trials) < self.n_startup:
+            return untried[rng.integers(len(untried))]
+
+        ranked = sorted(self.trials, key=lambda trial: trial[1], reverse=True)
+        n_good = max(1, int(np.ceil(self.gamma * len(ranked))))
+        good, bad = ranked[:n_good], ranked[n_good:]
+
+        # Draw candidates from the good-trial densities, keep the best ratio
+        keys = list(param_grid)
+        good_density = {key: self._density(good, key, param_grid[key]) for key in keys}
+        bad_density = {key: self._density(bad, key, param_grid[key]) for key in keys}
+
+        best, best_ratio = None, -np.inf
+        for _ in range(self.n_candidates):
+            candidate = {key: param_grid[key][rng.choice(len(param_grid[key]), p=good_density[key])]
+                         for key in keys}
+            if self._key(candidate) in tried:
+                continue
+            ratio = sum(np.log(good_density[key][param_grid[key].index(candidate[key])])
+                        - np.log(bad_density[key][param_grid[key].index(candidate[key])])
+                        for key in keys)
+            if ratio > best_ratio:
+                best, best_ratio = candidate, ratio
+        return best if best is not None else untried[rng.integers(len(untried))]
+
+    @staticmethod
+    def _key(params):
+        """Hashable identity of a configuration"""
+        return tuple(sorted((key, str(value)) for key, value in params.items()))
+
+    def search(self, evaluator, param_grid, budget):
+        """Random start-up trials, then density-ratio guided trials"""
+        rng = np.random.default_rng(self.random_state)
+        param_grid = {key: list(values) for key, values in param_grid.items()}
+        space = [dict(zip(param_grid, combo)) for combo in itertools.product(*param_grid.values())]
+        tried = set()
+
+        while len(self.trials) < self.n_trials and not budget.exhausted():
+            params = self._suggest(rng, param_grid, space, tried)
+            if params is None:
+                break
+            tried.add(self._key(params))
+            self._evaluate(evaluator, params)
+
+STRATEGIES = {
+    'grid': GridSearch,
+    'halving': SuccessiveHalvingSearch,
+    'tpe': TPESearch,
+}
+
+def get_strategy(name):
+    """Strategy instance by name"""
+    if name not in STRATEGIES:
+        raise ValueError(f"Unknown search strategy '{name}' (choose from {', '.join(STRATEGIES)})")
+    return STRATEGIES[name]()
+
+def compare_strategies(X, y, names=tuple(STRATEGIES), budget_seconds=None, cv=5, groups=None):
+    """Run each strategy on the same data and print time and CV score side by side
+
+    With groups (game_id per row) the folds are whole games (group_cv.py).
+    """
+    results = []
+    for name in names:
+        print(f"   🔎 {name} search...")
+        if groups is None:
+            results.append(get_strategy(name).run(CVEvaluator(X, y, cv=cv), budget_seconds=budget_seconds))
+        else:
+            with GroupCrossValidator(X, y, groups, n_splits=cv) as evaluator:
+                results.append(get_strategy(name).run(evaluator, budget_seconds=budget_seconds))
+
+    print(f"\n   {'strategy':<10s} {'CV score':>9s} {'configs':>8s} {'fits':>6s} {'seconds':>9s}")
+    for result in results:
+        flag = ' (budget hit)' if result['budget_exhausted'] else ''
+        print(f"   {result['strategy']:<10s} {result['best_score']:9.3f} {result['configurations']:8d} "
+              f"{result['fits']:6d} {result['seconds']:9.1f}{flag}")
+        print(f"      best: {result['best_params']}")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare hyperparameter search strategies on the training data")
+    parser.add_argument('--budget', type=float, default=None, help="Wall-clock budget per strategy (seconds)")
+    parser.add_argument('--strategies', nargs='+', default=list(STRATEGIES), choices=list(STRATEGIES))
+    args = parser.parse_args()
+
+    from victory_prediction_model import VictoryPredictionModel
+
+    print("⏱️  HYPERPARAMETER SEARCH COMPARISON")
+    print("=" * 60)
+
+    trainer = VictoryPredictionModel()
+    df = trainer.load_training_data()
+    if df is None:
+        return
+    X, y, df_clean = trainer.prepare_features(df)
+    compare_strategies(X, y, args.strategies, args.budget, groups=df_clean['game_id'])
+
+if __name__ == "__main__":
+    main()
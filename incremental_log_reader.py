@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Incremental Civ VI Log Reader
+Tail-reads the Civ VI log CSVs using per-file byte-offset checkpoints
+
+Each checkpoint stores the byte offset just past the last consumed line,
+an (inode, size, mtime) fingerprint, a hash of the header line and a hash
+of the bytes right before the offset. Only lines appended after the offset
+are parsed; when a file was truncated, rotated or rewritten for a new game
+the reader falls back to a full reload.
+
+Checkpoints are only persisted by commit(), so callers should commit after
+the rows have been safely written to the database.
+"""
+
+import hashlib
+import io
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from log_schemas import read_log_csv
+
+TURN_COLUMN = 'game_turn'
+TAIL_HASH_BYTES = 256
+
+class IncrementalLogReader:
+    def __init__(self, checkpoint_path='civ6_log_checkpoints.json'):
+        """Initialize the reader with a JSON checkpoint file"""
+        self.checkpoint_path = Path(checkpoint_path)
+        self.checkpoints = self._load_checkpoints()
+        self.pending = {}
+        self.full_reloads = {}
+        self._line_ends = {}
+        self._read_starts = {}
+        self._turns = {}
+        self._previous_turns = {}
+
+    def _load_checkpoints(self):
+        """Load saved checkpoints (missing or corrupt file means none)"""
+        try:
+            with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    @staticmethod
+    def _key(file_path):
+        """Checkpoint key for a log file"""
+        return str(Path(file_path))
+
+    @staticmethod
+    def _hash(data):
+        """Short content hash used for header/tail comparison"""
+        return hashlib.sha1(data).hexdigest()
+
+    def _tail_hash(self, f, offset):
+        """Hash of the bytes immediately before offset"""
+        start = max(offset - TAIL_HASH_BYTES, 0)
+        f.seek(start)
+        return self._hash(f.read(offset - start))
+
+    def _full_reload_reason(self, f, checkpoint, stat, header):
+        """Return why the checkpoint can't be trusted, or None if it can"""
+        if checkpoint is None:
+            return 'no checkpoint'
+        if checkpoint['inode'] != stat.st_ino:
+            return 'file rotated'
+        if stat.st_size < checkpoint['offset']:
+            return 'file truncated'
+        if self._hash(header) != checkpoint['header_hash']:
+            return 'header changed'
+        if self._tail_hash(f, checkpoint['offset']) != checkpoint['tail_hash']:
+            return 'file rewritten'
+        return None
+
+    def read(self, file_path, columns=None):
+        """Return the rows appended to file_path since the last committed checkpoint
+        
+        Rows are typed by the file's registered schema (log_schemas.py);
+        columns limits the frame to those columns.
+        """
+        path = Path(file_path)
+        key = self._key(path)
+        checkpoint = self.checkpoints.get(key)
+        stat = path.stat()
+
+        with open(path, 'rb') as f:
+            header = f.readline()
+            if not header.strip():
+                # Freshly created log without a header yet
+                self.full_reloads[key] = None
+                self._line_ends[key] = []
+                self._read_starts[key] = 0
+                self._turns[key] = []
+                return pd.DataFrame()
+
+            # Fast path: untouched file, nothing to parse
+            if (checkpoint is not None
+                    and checkpoint['inode'] == stat.st_ino
+                    and checkpoint['size'] == stat.st_size
+                    and checkpoint['mtime'] == stat.st_mtime
+                    and checkpoint['offset'] == stat.st_size):
+                reason = None
+                start = checkpoint['offset']
+                data = b''
+            else:
+                reason = self._full_reload_reason(f, checkpoint, stat, header)
+                start = len(header) if reason else checkpoint['offset']
+                f.seek(start)
+                data = f.read()
+
+        self.full_reloads[key] = reason
+
+        # Only consume complete lines - a half-written last line waits for the next run
+        data = data[:data.rfind(b'\n') + 1]
+
+        lines = []
+        line_ends = []
+        position = start
+        for line in data.splitlines(keepends=True):
+            position += len(line)
+            if line.strip():
+                lines.append(line)
+                line_ends.append(position)
+
+        frame = read_log_csv(io.BytesIO(header + b''.join(lines)), columns=columns, file_path=path)
+
+        self._read_starts[key] = start
+        self._line_ends[key] = line_ends
+        self._turns[key] = frame[TURN_COLUMN].tolist() if TURN_COLUMN in frame.columns else []
+
+        previous_turn = None if reason else checkpoint.get('last_turn')
+        self._previous_turns[key] = previous_turn
+        self.pending[key] = {
+            'offset': position,
+            'inode': stat.st_ino,
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'header_hash': self._hash(header),
+            'last_turn': self._last_turn(key, len(lines), previous_turn),
+        }
+
+        return frame
+
+    def _last_turn(self, key, consumed_rows, previous_turn):
+        """Highest turn among the consumed rows (or the previously stored one)"""
+        turns = self._turns[key][:consumed_rows]
+        if not turns:
+            return previous_turn
+        return int(max(turns))
+
+    def hold_back(self, file_path, keep_rows):
+        """Only consume the first keep_rows rows of the last read; the rest is re-read next time"""
+        key = self._key(file_path)
+        if key not in self.pending:
+            return
+        line_ends = self._line_ends[key]
+        keep_rows = max(0, min(keep_rows, len(line_ends)))
+
+        offset = line_ends[keep_rows - 1] if keep_rows else self._read_starts[key]
+        self.pending[key]['offset'] = offset
+        self.pending[key]['last_turn'] = self._last_turn(key, keep_rows, self._previous_turns[key])
+
+    def last_turn(self, file_path):
+        """Highest turn consumed so far for a file (pending read first, then checkpoint)"""
+        key = self._key(file_path)
+        state = self.pending.get(key) or self.checkpoints.get(key) or {}
+        return state.get('last_turn')
+
+    def was_full_reload(self, file_path):
+        """Whether the last read of file_path ignored its checkpoint"""
+        return self.full_reloads.get(self._key(file_path)) is not None
+
+    def reload_reason(self, file_path):
+        """Why the last read fell back to a full reload (None if it was incremental)"""
+        return self.full_reloads.get(self._key(file_path))
+
+    def commit(self):
+        """Persist pending checkpoints after the rows have been stored"""
+        with_tail = {}
+        for key, state in self.pending.items():
+            with open(key, 'rb') as f:
+                state = dict(state, tail_hash=self._tail_hash(f, state['offset']))
+            with_tail[key] = state
+
+        self.checkpoints.update(with_tail)
+        self.pending = {}
+
+        tmp_path = self.checkpoint_path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.checkpoints, f, indent=2)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def reset(self, file_path=None):
+        """Forget checkpoints for one file (or all files) so the next read is a full reload"""
+        if file_path is None:
+            self.checkpoints = {}
+            self.pending = {}
+        else:
+            key = self._key(file_path)
+            self.checkpoints.pop(key, None)
+            self.pending.pop(key, None)
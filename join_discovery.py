@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Value-Overlap Join Discovery for the Civ VI Log CSVs
+====================================================
+
+Finds foreign-key candidates from the values the columns hold rather than
+their names. Column A is a candidate key into column B when most of A's
+distinct values also appear in B (containment |A ∩ B| / |A|).
+
+csv_profiler gives each key-like column a MinHash signature and a distinct
+count. Containment is estimated from those alone:
+
+    J = share of equal signature slots        (Jaccard |A ∩ B| / |A ∪ B|)
+    containment = J (|A| + |B|) / ((1 + J) |A|)
+
+Comparing every pair of columns grows quadratically, so candidates come
+from an LSH index instead (in the style of LSH Ensemble). Columns are
+partitioned by distinct count in powers of two, and every partition is
+banded several ways (1, 2, 4 or 8 signature slots per band). A small column
+contained in a much larger one has a low Jaccard similarity. So each query
+uses, per partition, the most selective banding whose threshold
+(1/bands)^(1/rows) is still below the lowest Jaccard that the containment
+threshold allows for that partition's sizes. Only the columns sharing a
+band are checked.
+
+Usage:
+    joins = discover_joins(analysis_results)    # from CivCSVAnalyzer / CSVAnalysisCache
+    python join_discovery.py --columns 400       # LSH vs pairwise benchmark on synthetic columns
+"""
+
+import argparse
+import math
+import time
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+from csv_profiler import MINHASH_PERMUTATIONS, MinHash
+
+MIN_CONTAINMENT = 0.8
+# Columns with fewer distinct values (flags, small counters) overlap with everything
+MIN_DISTINCT = 5
+BAND_ROWS = (1, 2, 4, 8)
+
+def estimate_containment(jaccard, size, other_size):
+    """Estimated share of a column's distinct values found in the other column"""
+    if jaccard <= 0 or size <= 0:
+        return 0.0
+    return min(1.0, jaccard * (size + other_size) / ((1 + jaccard) * size))
+
+def size_partition(size):
+    """Index of the power-of-two distinct-count partition"""
+    return int(math.log2(max(size, 1)))
+
+class LSHIndex:
+    def __init__(self, num_perm=MINHASH_PERMUTATIONS, band_rows=BAND_ROWS):
+        """Banded MinHash index, partitioned by distinct count"""
+        self.num_perm = num_perm
+        self.band_rows = [rows for rows in band_rows if num_perm % rows == 0]
+        # rows per band -> partition -> band key -> column keys
+        self.tables = {rows: defaultdict(lambda: defaultdict(list)) for rows in self.band_rows}
+        self.partitions = set()
+
+    def _bands(self, signature, rows):
+        """Hashable key of every band of a signature"""
+        return [(band, signature[band * rows:(band + 1) * rows].tobytes())
+                for band in range(self.num_perm // rows)]
+
+    def threshold(self, rows):
+        """Approximate Jaccard similarity above which two columns probably share a band"""
+        return (rows / self.num_perm) ** (1 / rows)
+
+    def insert(self, key, minhash, size):
+        """Index one column"""
+        partition = size_partition(size)
+        self.partitions.add(partition)
+        for rows in self.band_rows:
+            for band_key in self._bands(minhash.signature, rows):
+                self.tables[rows][partition][band_key].append(key)
+
+    def query(self, minhash, size, min_containment=MIN_CONTAINMENT):
+        """Keys of the columns that may contain at least min_containment of this column's values"""
+        candidates = set()
+        for partition in self.partitions:
+            upper = 2 ** (partition + 1)
+            overlap = min_containment * size
+            if upper < overlap:
+                continue   # every column in this partition is too small to contain enough values
+            lowest_jaccard = overlap / (size + upper - overlap)
+            usable = [rows for rows in self.band_rows if self.threshold(rows) <= lowest_jaccard]
+            rows = max(usable) if usable else min(self.band_rows)
+            table = self.tables[rows][partition]
+            for band_key in self._bands(minhash.signature, rows):
+                candidates.update(table.get(band_key, ()))
+        return candidates
+
+def column_sketches(analysis_results, min_distinct=MIN_DISTINCT):
+    """(file, column) -> (MinHash, distinct count) for every key-like column in the analysis"""
+    sketches = {}
+    for filename, info in analysis_results.items():
+        if 'error' in info:
+            continue
+        for col, col_data in info.get('column_analysis', {}).items():
+            if col_data.get('minhash') and col_data.get('unique_values', 0) >= min_distinct:
+                sketches[(filename, col)] = (MinHash.from_hex(col_data['minhash']), col_data['unique_values'])
+    return sketches
+
+def discover_joins(analysis_results, min_containment=MIN_CONTAINMENT, min_distinct=MIN_DISTINCT):
+    """Candidate foreign-key pairs across files, best first
+
+    Each pair says that most distinct values of file.column also appear in
+    ref_file.ref_column. Pairs that contain each other both ways are listed
+    once with mutual=True.
+    """
+    sketches = column_sketches(analysis_results, min_distinct)
+    index = LSHIndex()
+    for key, (minhash, size) in sketches.items():
+        index.insert(key, minhash, size)
+
+    found = {}
+    for key, (minhash, size) in sketches.items():
+        for ref_key in index.query(minhash, size, min_containment):
+            if ref_key[0] == key[0]:
+                continue
+            ref_minhash, ref_size = sketches[ref_key]
+            jaccard = minhash.jaccard(ref_minhash)
+            containment = estimate_containment(jaccard, size, ref_size)
+            if containment >= min_containment:
+                found[(key, ref_key)] = (containment, jaccard)
+
+    joins = []
+    for (key, ref_key), (containment, jaccard) in found.items():
+        mutual = (ref_key, key) in found
+        if mutual and ref_key < key:
+            continue
+        joins.append({
+            'file': key[0], 'column': key[1], 'distinct': sketches[key][1],
+            'ref_file': ref_key[0], 'ref_column': ref_key[1], 'ref_distinct': sketches[ref_key][1],
+            'containment': round(containment, 3), 'jaccard': round(jaccard, 3), 'mutual': mutual,
+        })
+    return sorted(joins, key=lambda join: (-join['containment'], -join['distinct'],
+                                           join['file'], join['column'], join['ref_file'], join['ref_column']))
+
+def pairwise_joins(analysis_results, min_containment=MIN_CONTAINMENT, min_distinct=MIN_DISTINCT):
+    """Every cross-file column pair compared directly (reference for the benchmark)"""
+    sketches = column_sketches(analysis_results, min_distinct)
+    found = set()
+    for key, (minhash, size) in sketches.items():
+        for ref_key, (ref_minhash, ref_size) in sketches.items():
+            if ref_key[0] != key[0] and estimate_containment(minhash.jaccard(ref_minhash), size, ref_size) >= min_containment:
+                found.add((key, ref_key))
+    return found
+
+def make_synthetic_analysis(n_columns, n_files=20, seed=0):
+    """Analysis results of n_columns columns: key subsets of a few domains plus unrelated columns"""
+    rng = np.random.default_rng(seed)
+    domains = [np.arange(start, start + size) for start, size in
+               zip(rng.integers(0, 10**9, 12), rng.choice([20, 200, 2000, 20000], 12))]
+    results = defaultdict(lambda: {'column_analysis': {}})
+    for i in range(n_columns):
+        if rng.random() < 0.5:
+            domain = domains[rng.integers(len(domains))]
+            values = rng.choice(domain, max(5, int(len(domain) * rng.uniform(0.05, 1))), replace=False)
+        else:
+            values = rng.integers(0, 10**12, int(rng.choice([20, 200, 2000])))
+        minhash = MinHash()
+        minhash.add(pd.Series(values))
+        results[f"file_{i % n_files}.csv"]['column_analysis'][f"col_{i}"] = {
+            'unique_values': len(np.unique(values)), 'minhash': minhash.to_hex()}
+    return dict(results)
+
+def main():
+    parser = argparse.ArgumentParser(description="LSH join discovery vs pairwise comparison on synthetic columns")
+    parser.add_argument('--columns', type=int, default=400, help="Number of synthetic columns")
+    parser.add_argument('--containment', type=float, default=MIN_CONTAINMENT, help="Containment threshold")
+    args = parser.parse_args()
+
+    print("🧬 VALUE-OVERLAP JOIN DISCOVERY BENCHMARK")
+    print("=" * 60)
+    analysis = make_synthetic_analysis(args.columns)
+    print(f"🎲 {args.columns} synthetic columns in {len(analysis)} files")
+
+    start = time.perf_counter()
+    joins = discover_joins(analysis, args.containment)
+    lsh_time = time.perf_counter() - start
+    start = time.perf_counter()
+    expected = pairwise_joins(analysis, args.containment)
+    pairwise_time = time.perf_counter() - start
+
+    found = set()
+    for join in joins:
+        key, ref_key = (join['file'], join['column']), (join['ref_file'], join['ref_column'])
+        found.add((key, ref_key))
+        if join['mutual']:
+            found.add((ref_key, key))
+    recall = len(found & expected) / len(expected) if expected else 1.0
+    print(f"   LSH index:  {lsh_time:7.3f}s  {len(found)} directed pairs")
+    print(f"   pairwise:   {pairwise_time:7.3f}s  {len(expected)} directed pairs")
+    print(f"   recall {recall:.1%}, speedup {pairwise_time / lsh_time:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Load Test for prediction_server.py
+==================================
+
+Fires requests at a running prediction server from several threads, each
+on its own keep-alive connection, and reports latency percentiles.
+
+Usage:
+    python prediction_server.py &                       # start the server first
+    python load_test_prediction_server.py               # 2000 x /predict/latest, 8 clients
+    python load_test_prediction_server.py --requests 5000 --concurrency 16
+    python load_test_prediction_server.py --path "/predict/<game_id>/120"
+"""
+
+import argparse
+import http.client
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlparse
+
+import numpy as np
+
+def run_client(url, paths, n_requests, latencies, statuses, lock):
+    """One client: n_requests GETs over a single connection"""
+    parsed = urlparse(url)
+    conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=30)
+    local_latencies, local_statuses = [], Counter()
+    for i in range(n_requests):
+        path = paths[i % len(paths)]
+        start = time.perf_counter()
+        try:
+            conn.request('GET', path)
+            response = conn.getresponse()
+            response.read()
+            local_statuses[response.status] += 1
+        except (OSError, http.client.HTTPException):
+            local_statuses['error'] += 1
+            conn.close()
+            conn = http.client.HTTPConnection(parsed.hostname, parsed.port or 80, timeout=30)
+        local_latencies.append(time.perf_counter() - start)
+    conn.close()
+    with lock:
+        latencies.extend(local_latencies)
+        statuses.update(local_statuses)
+
+def load_test(url, paths, total_requests, concurrency):
+    """Run the test; returns (latencies in seconds, status counts, wall seconds)"""
+    latencies, statuses, lock = [], Counter(), threading.Lock()
+    per_client = [total_requests // concurrency + (1 if i < total_requests % concurrency else 0)
+                  for i in range(concurrency)]
+    threads = [threading.Thread(target=run_client, args=(url, paths, n, latencies, statuses, lock))
+               for n in per_client]
+
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return np.array(latencies), statuses, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency percentiles for the prediction server")
+    parser.add_argument('--url', default='http://127.0.0.1:8765')
+    parser.add_argument('--path', action='append', dest='paths',
+                        help="Path to request (repeatable, round-robin; default /predict/latest)")
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=8)
+    args = parser.parse_args()
+    paths = args.paths or ['/predict/latest']
+
+    print("⏱️  PREDICTION SERVER LOAD TEST")
+    print("=" * 60)
+    print(f"   {args.requests} requests, {args.concurrency} clients -> {args.url} {paths}")
+
+    latencies, statuses, seconds = load_test(args.url, paths, args.requests, args.concurrency)
+    if len(latencies) == 0:
+        print("❌ No requests completed")
+        return
+
+    ms = latencies * 1000
+    print(f"\n   status codes: {dict(statuses)}")
+    print(f"   throughput:   {len(latencies) / seconds:8.0f} req/s")
+    for label, value in (('p50', np.percentile(ms, 50)), ('p90', np.percentile(ms, 90)),
+                         ('p99', np.percentile(ms, 99)), ('max', ms.max())):
+        print(f"   {label}:          {value:8.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Database Migrations for civ_game_data
+Applies the versioned SQL files in database/migrations in order and records
+them in schema_migrations, so every run only applies what is new
+
+Usage:
+    python migrate_database.py                     # apply pending migrations
+    python migrate_database.py --status            # list applied / pending migrations
+    python migrate_database.py --partition-by-game # also LIST-partition civ_game_data by game_id
+
+The loader (stage4h_insert_data.py) applies pending migrations on every run.
+"""
+
+import argparse
+import hashlib
+import sys
+from pathlib import Path
+
+import psycopg2
+from psycopg2 import sql
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent / 'database' / 'migrations'
+OPTIONAL_DIR = MIGRATIONS_DIR / 'optional'
+PARTITION_MIGRATION = 'partition_civ_game_data_by_game'
+
+SCHEMA_MIGRATIONS_DDL = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version VARCHAR(100) PRIMARY KEY,
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+def list_migrations(migrations_dir=MIGRATIONS_DIR):
+    """Versioned migrations as (version, path), ordered by their NNN_ prefix"""
+    return [(path.stem, path) for path in sorted(migrations_dir.glob('[0-9][0-9][0-9]_*.sql'))]
+
+def applied_versions(cursor):
+    """Versions already recorded in schema_migrations"""
+    cursor.execute(SCHEMA_MIGRATIONS_DDL)
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in cursor.fetchall()}
+
+def _apply(cursor, version, path):
+    """Run one migration file and record it"""
+    print(f"🔧 Applying migration {version}...")
+    cursor.execute(path.read_text(encoding='utf-8'))
+    cursor.execute("INSERT INTO schema_migrations (version) VALUES (%s)", (version,))
+
+def apply_migrations(conn, partition_by_game=False, migrations_dir=MIGRATIONS_DIR):
+    """Apply pending migrations, each in its own transaction; returns the versions applied"""
+    applied = []
+    with conn.cursor() as cursor:
+        done = applied_versions(cursor)
+        conn.commit()
+
+        pending = [(version, path) for version, path in list_migrations(migrations_dir)
+                   if version not in done]
+        if partition_by_game and PARTITION_MIGRATION not in done:
+            pending.append((PARTITION_MIGRATION, migrations_dir / 'optional' / f"{PARTITION_MIGRATION}.sql"))
+
+        for version, path in pending:
+            try:
+                _apply(cursor, version, path)
+                conn.commit()
+            except psycopg2.Error:
+                conn.rollback()
+                raise
+            applied.append(version)
+    return applied
+
+def is_partitioned(cursor, table='civ_game_data'):
+    """Whether a table is a partitioned (parent) table"""
+    cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", (table,))
+    row = cursor.fetchone()
+    return row is not None and row[0] == 'p'
+
+def game_partition_name(game_id):
+    """Partition name for a game (same naming as the partitioning migration)"""
+    return 'civ_game_data_g_' + hashlib.md5(game_id.encode('utf-8')).hexdigest()[:12]
+
+def ensure_game_partition(cursor, game_id):
+    """Create the game's partition when civ_game_data is partitioned; returns True if created"""
+    if not is_partitioned(cursor):
+        return False
+    name = game_partition_name(game_id)
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL", (name,))
+    if cursor.fetchone()[0]:
+        return False
+    cursor.execute(
+        sql.SQL("CREATE TABLE {} PARTITION OF civ_game_data FOR VALUES IN ({})").format(
+            sql.Identifier(name), sql.Literal(game_id)
+        )
+    )
+    print(f"   🧱 Created partition {name} for game {game_id}")
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply civ_game_data schema migrations")
+    parser.add_argument('--status', action='store_true',
+                        help="Show applied and pending migrations without applying anything")
+    parser.add_argument('--partition-by-game', action='store_true',
+                        help="Also apply the optional LIST partitioning of civ_game_data by game_id")
+    parser.add_argument('--host', default='localhost', help="PostgreSQL host (postgres inside Docker)")
+    args = parser.parse_args()
+
+    # The natural key migration needs Python (game_id backfill), so it lives in the loader
+    from stage4h_insert_data import get_db_config, ensure_natural_key
+
+    db_config = dict(get_db_config(in_docker=False), host=args.host)
+
+    print("🗄️  CIV_GAME_DATA MIGRATIONS")
+    print("=" * 50)
+
+    try:
+        conn = psycopg2.connect(**db_config)
+    except psycopg2.Error as e:
+        print(f"❌ Database connection failed: {e}")
+        return False
+
+    try:
+        with conn.cursor() as cursor:
+            if args.status:
+                done = applied_versions(cursor)
+                for version, _ in list_migrations():
+                    print(f"  {'✅' if version in done else '⏳'} {version}")
+                print(f"  {'✅' if PARTITION_MIGRATION in done else '➖'} {PARTITION_MIGRATION} (optional)")
+                return True
+
+            ensure_natural_key(cursor)
+            conn.commit()
+
+        applied = apply_migrations(conn, partition_by_game=args.partition_by_game)
+        if applied:
+            print(f"✅ Applied {len(applied)} migration(s): {applied}")
+        else:
+            print("✅ Database schema is up to date")
+        return True
+
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        return False
+
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    if not main():
+        sys.exit(1)
@@ -7,19 +7,165 @@ This script extracts Turn 20 features and final game outcomes from the database
 to create a training dataset for the ML victory prediction model.
 
 Usage:
-    python ml_data_preparation.py
+    python ml_data_preparation.py              # re-extract every game
+    python ml_data_preparation.py --new-games  # only append games that finished since the last run
 
 Output:
-    - training_data.csv: Features and outcomes for model training
+    - feature_store/training_features: Features and outcomes for model training (Parquet)
     - data_analysis_report.txt: Summary statistics and insights
 """
 
+import argparse
 import pandas as pd
 import psycopg2
 import numpy as np
 from datetime import datetime
 import os
 
+from feature_store import FeatureStore, DEFAULT_ROOT
+
+# Feature store dataset the trainer reads
+TRAINING_DATASET = 'training_features'
+
+# Features for every turn of every game plus each game's final outcome.
+# Every game's final turn is aggregated once in game_sessions and joined,
+# so the query stays linear in the size of civ_game_data.
+TRAINING_FEATURES_QUERY = """
+WITH game_sessions AS (
+    -- Identify distinct game sessions and their final turns (one pass, joined below)
+    SELECT 
+        game_id,
+        MAX(game_turn) as final_turn
+    FROM civ_game_data
+    GROUP BY game_id
+),
+current_game AS (
+    -- The game the loader wrote to most recently
+    SELECT game_id
+    FROM civ_game_data
+    ORDER BY created_at DESC
+    LIMIT 1
+),
+all_turn_data AS (
+    -- Get features for ALL turns for each civilization in each game
+    SELECT 
+        cgd.game_id,
+        cgd.civilization,
+        cgd.game_turn,
+        cgd.num_cities,
+        cgd.population,
+        cgd.techs,
+        cgd.civics,
+        cgd.yields_science,
+        cgd.yields_culture,
+        cgd.yields_production,
+        cgd.buildings,
+        cgd.districts,
+        cgd.total_score,
+        -- Relative rankings within each game session and turn (precomputed at ingest)
+        r.science_rank,
+        r.cities_rank,
+        r.score_rank,
+        r.population_rank
+    FROM civ_game_data cgd
+    JOIN civ_turn_rankings r
+      ON r.game_id = cgd.game_id
+     AND r.game_turn = cgd.game_turn
+     AND r.civilization = cgd.civilization
+),
+final_results AS (
+    -- Get final game outcomes (last turn for each game session)
+    SELECT 
+        cgd.game_id,
+        cgd.civilization,
+        cgd.game_turn as final_turn,
+        cgd.total_score as final_score,
+        RANK() OVER (
+            PARTITION BY cgd.game_id 
+            ORDER BY cgd.total_score DESC
+        ) as final_rank
+    FROM civ_game_data cgd
+    JOIN game_sessions gs
+      ON gs.game_id = cgd.game_id
+     AND gs.final_turn = cgd.game_turn
+)
+SELECT 
+    atd.game_id,
+    atd.civilization,
+    atd.game_turn,
+    -- Raw features
+    atd.num_cities,
+    atd.population,
+    atd.techs,
+    atd.civics,
+    atd.yields_science,
+    atd.yields_culture,
+    atd.yields_production,
+    atd.buildings,
+    atd.districts,
+    atd.total_score as current_score,
+    -- Calculated features
+    CASE WHEN atd.num_cities > 0 
+         THEN atd.yields_science::float / atd.num_cities 
+         ELSE 0 END as science_per_city,
+    CASE WHEN atd.num_cities > 0 
+         THEN atd.population::float / atd.num_cities 
+         ELSE 0 END as population_per_city,
+    CASE WHEN atd.num_cities > 0 
+         THEN atd.buildings::float / atd.num_cities 
+         ELSE 0 END as buildings_per_city,
+    CASE WHEN atd.game_turn > 0 
+         THEN (atd.techs + atd.civics)::float / atd.game_turn 
+         ELSE 0 END as development_index,
+    -- Relative rankings
+    atd.science_rank,
+    atd.cities_rank,
+    atd.score_rank,
+    atd.population_rank,
+    -- Final outcomes
+    fr.final_turn,
+    fr.final_score,
+    fr.final_rank,
+    CASE WHEN fr.final_rank = 1 THEN 1 ELSE 0 END as will_win,
+    -- Game metadata
+    CASE WHEN atd.game_id = (SELECT game_id FROM current_game) THEN 'Current_Game' 
+         ELSE 'Previous_Game' END as game_session
+FROM all_turn_data atd
+JOIN final_results fr ON atd.game_id = fr.game_id AND atd.civilization = fr.civilization
+WHERE atd.game_turn >= 10  -- Only use turns 10+ for meaningful data
+ORDER BY atd.game_id, atd.game_turn, fr.final_rank;
+"""
+
+# Same features restricted to some games; the filter is on the window
+# partition key, so Postgres pushes it into every CTE
+GAME_FEATURES_QUERY = (
+    "SELECT * FROM (" + TRAINING_FEATURES_QUERY.strip().rstrip(';') + ") training_features\n"
+    "WHERE game_id = ANY(%(games)s)\n"
+    "ORDER BY game_id, game_turn, final_rank"
+)
+
+# Games that have finished: everything except the one being written to now
+FINISHED_GAMES_QUERY = """
+SELECT DISTINCT game_id
+FROM civ_game_data
+WHERE game_id <> (SELECT game_id FROM civ_game_data ORDER BY created_at DESC LIMIT 1)
+"""
+
+def finished_games(store):
+    """Stored games whose outcome is known (everything but the current game)
+
+    The current game's will_win is provisional (the leader at the latest
+    turn), so it must not be trained or backtested on.
+    """
+    manifest = store.manifest(TRAINING_DATASET)
+    if manifest is None:
+        return []
+    if 'game_session' not in manifest['schema']:
+        return sorted(manifest['partitions'])
+    sessions = store.read(TRAINING_DATASET, columns=['game_id', 'game_session'])
+    current = set(sessions.loc[sessions['game_session'].astype(str) == 'Current_Game', 'game_id'].astype(str))
+    return sorted(game for game in manifest['partitions'] if game not in current)
+
 class CivMLDataPreparation:
     def __init__(self):
         """Initialize database connection parameters"""
@@ -51,15 +197,15 @@ class CivMLDataPreparation:
             # Get overview of all game sessions
             query = """
             SELECT 
-                created_at::date as game_date,
-                created_at::time as game_time,
+                game_id,
+                MIN(created_at) as started_at,
                 COUNT(DISTINCT civilization) as num_civilizations,
                 MIN(game_turn) as min_turn,
                 MAX(game_turn) as max_turn,
                 COUNT(*) as total_records
             FROM civ_game_data 
-            GROUP BY created_at::date, created_at::time
-            ORDER BY created_at::date, created_at::time;
+            GROUP BY game_id
+            ORDER BY started_at;
             """
             
             df = pd.read_sql(query, conn)
@@ -68,7 +214,7 @@ class CivMLDataPreparation:
             print("\n📊 Available Game Sessions:")
             print("=" * 80)
             for _, row in df.iterrows():
-                print(f"Date: {row['game_date']} | Time: {row['game_time']} | "
+                print(f"Game: {row['game_id']} | Started: {row['started_at']} | "
                       f"Civs: {row['num_civilizations']} | "
                       f"Turns: {row['min_turn']}-{row['max_turn']} | "
                       f"Records: {row['total_records']}")
@@ -80,126 +226,21 @@ class CivMLDataPreparation:
             conn.close()
             return None
     
-    def extract_training_features(self):
-        """Extract features from all available turns and final outcomes for ML training"""
+    def extract_training_features(self, games=None):
+        """Extract features from all available turns and final outcomes for ML training
+        
+        games limits the extract to those game_ids (default: every game).
+        """
         conn = self.connect_database()
         if not conn:
             return None
             
         try:
-            # Simplified query to get ALL turn data + final outcomes
-            query = """
-            WITH game_sessions AS (
-                -- Identify distinct game sessions and their final turns
-                SELECT DISTINCT 
-                    created_at::date as game_date,
-                    created_at::time as game_time,
-                    CONCAT(created_at::date, '_', created_at::time) as game_id,
-                    MAX(game_turn) OVER (PARTITION BY created_at::date, created_at::time) as final_turn
-                FROM civ_game_data
-            ),
-            all_turn_data AS (
-                -- Get features for ALL turns for each civilization in each game
-                SELECT 
-                    CONCAT(created_at::date, '_', created_at::time) as game_id,
-                    civilization,
-                    game_turn,
-                    num_cities,
-                    population,
-                    techs,
-                    civics,
-                    yields_science,
-                    yields_culture,
-                    yields_production,
-                    buildings,
-                    districts,
-                    total_score,
-                    -- Calculate relative rankings within each game session and turn
-                    RANK() OVER (
-                        PARTITION BY created_at::date, created_at::time, game_turn 
-                        ORDER BY yields_science DESC
-                    ) as science_rank,
-                    RANK() OVER (
-                        PARTITION BY created_at::date, created_at::time, game_turn 
-                        ORDER BY num_cities DESC
-                    ) as cities_rank,
-                    RANK() OVER (
-                        PARTITION BY created_at::date, created_at::time, game_turn 
-                        ORDER BY total_score DESC
-                    ) as score_rank,
-                    RANK() OVER (
-                        PARTITION BY created_at::date, created_at::time, game_turn 
-                        ORDER BY population DESC
-                    ) as population_rank
-                FROM civ_game_data 
-            ),
-            final_results AS (
-                -- Get final game outcomes (last turn for each game session)
-                SELECT 
-                    CONCAT(created_at::date, '_', created_at::time) as game_id,
-                    civilization,
-                    game_turn as final_turn,
-                    total_score as final_score,
-                    RANK() OVER (
-                        PARTITION BY created_at::date, created_at::time 
-                        ORDER BY total_score DESC
-                    ) as final_rank
-                FROM civ_game_data t1
-                WHERE game_turn = (
-                    SELECT MAX(game_turn) 
-                    FROM civ_game_data t2 
-                    WHERE t2.created_at::date = t1.created_at::date 
-                    AND t2.created_at::time = t1.created_at::time
-                )
-            )
-            SELECT 
-                atd.game_id,
-                atd.civilization,
-                atd.game_turn,
-                -- Raw features
-                atd.num_cities,
-                atd.population,
-                atd.techs,
-                atd.civics,
-                atd.yields_science,
-                atd.yields_culture,
-                atd.yields_production,
-                atd.buildings,
-                atd.districts,
-                atd.total_score as current_score,
-                -- Calculated features
-                CASE WHEN atd.num_cities > 0 
-                     THEN atd.yields_science::float / atd.num_cities 
-                     ELSE 0 END as science_per_city,
-                CASE WHEN atd.num_cities > 0 
-                     THEN atd.population::float / atd.num_cities 
-                     ELSE 0 END as population_per_city,
-                CASE WHEN atd.num_cities > 0 
-                     THEN atd.buildings::float / atd.num_cities 
-                     ELSE 0 END as buildings_per_city,
-                CASE WHEN atd.game_turn > 0 
-                     THEN (atd.techs + atd.civics)::float / atd.game_turn 
-                     ELSE 0 END as development_index,
-                -- Relative rankings
-                atd.science_rank,
-                atd.cities_rank,
-                atd.score_rank,
-                atd.population_rank,
-                -- Final outcomes
-                fr.final_turn,
-                fr.final_score,
-                fr.final_rank,
-                CASE WHEN fr.final_rank = 1 THEN 1 ELSE 0 END as will_win,
-                -- Game metadata
-                CASE WHEN atd.game_id LIKE '%07:%' OR atd.game_id LIKE '%10:%' THEN 'Current_Game' 
-                     ELSE 'Previous_Game' END as game_session
-            FROM all_turn_data atd
-            JOIN final_results fr ON atd.game_id = fr.game_id AND atd.civilization = fr.civilization
-            WHERE atd.game_turn >= 10  -- Only use turns 10+ for meaningful data
-            ORDER BY atd.game_id, atd.game_turn, fr.final_rank;
-            """
-            
-            df = pd.read_sql(query, conn)
+            # ALL turn data + final outcomes
+            if games is None:
+                df = pd.read_sql(TRAINING_FEATURES_QUERY, conn)
+            else:
+                df = pd.read_sql(GAME_FEATURES_QUERY, conn, params={'games': list(games)})
             conn.close()
             
             print(f"\n✅ Extracted {len(df)} civilization records for ML training")
@@ -319,16 +360,39 @@ class CivMLDataPreparation:
         print("\n" + report_text)
         print(f"\n📋 Full report saved to: data_analysis_report.txt")
     
-    def save_training_data(self, df):
-        """Save prepared training data to CSV"""
+    def find_new_finished_games(self):
+        """Finished games that are missing from the feature store or were stored while still running"""
+        conn = self.connect_database()
+        if not conn:
+            return None
+            
+        try:
+            finished = set(pd.read_sql(FINISHED_GAMES_QUERY, conn)['game_id'])
+            conn.close()
+        except Exception as e:
+            print(f"❌ Error listing finished games: {e}")
+            conn.close()
+            return None
+        
+        store = FeatureStore()
+        stored = set()
+        if store.exists(TRAINING_DATASET):
+            sessions = store.read(TRAINING_DATASET, columns=['game_id', 'game_session'])
+            stored = set(sessions.loc[sessions['game_session'].astype(str) == 'Previous_Game', 'game_id'])
+        
+        return sorted(finished - stored)
+    
+    def save_training_data(self, df, append=False):
+        """Save prepared training data to the Parquet feature store"""
         if df is None or len(df) == 0:
             print("❌ No data to save")
             return False
             
         try:
-            # Save full dataset
-            df.to_csv('training_data.csv', index=False)
-            print(f"✅ Training data saved to: training_data.csv ({len(df)} records)")
+            # Save full dataset (or just the extracted games), one partition per game
+            manifest = FeatureStore().write(TRAINING_DATASET, df, overwrite=not append)
+            print(f"✅ Training data saved to: {DEFAULT_ROOT}/{TRAINING_DATASET} "
+                  f"({manifest['total_rows']} records, {len(manifest['partitions'])} games)")
             
             # Also save a sample for quick inspection
             sample_df = df.head(10)
@@ -366,13 +430,41 @@ class CivMLDataPreparation:
             print("\n🎉 Data preparation completed successfully!")
             print("Next steps:")
             print("  1. Review data_analysis_report.txt for insights")
-            print("  2. Inspect training_data.csv for quality")
+            print("  2. Inspect training_data_sample.csv for quality")
             print("  3. Run victory_prediction_model.py to train the ML model")
             
         else:
             print("\n❌ Data preparation failed - check database connection and data")
 
+    def run_new_games_preparation(self):
+        """Extract only newly finished games and append them to the feature store"""
+        print("🚀 Appending newly finished games to the training data")
+        print("=" * 70)
+        
+        new_games = self.find_new_finished_games()
+        if new_games is None:
+            return False
+        if not new_games:
+            print("✅ Feature store is up to date - no newly finished games")
+            return True
+        
+        print(f"🆕 {len(new_games)} newly finished game(s): {', '.join(new_games)}")
+        training_data = self.extract_training_features(new_games)
+        if training_data is None or not self.save_training_data(training_data, append=True):
+            return False
+        
+        print("\nNext step: python victory_prediction_model.py --incremental")
+        return True
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prepare Civ VI victory prediction training data")
+    parser.add_argument('--new-games', action='store_true',
+                        help="Only extract games that finished since the last run and append them")
+    args = parser.parse_args()
+    
     # Run the data preparation process
     prep = CivMLDataPreparation()
-    prep.run_preparation()
+    if args.new_games:
+        prep.run_new_games_preparation()
+    else:
+        prep.run_preparation()
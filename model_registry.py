@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Civ VI Model Registry
+Versioned model artifacts with a JSON manifest, replacing trained_model.pkl
+
+Layout:
+    models/LATEST                      - name of the newest version
+    models/<version>/manifest.json     - features, metrics, data hash, artifact hash, params, lineage
+    models/<version>/model.pkl         - pickle (protocol 5) of the estimator without its arrays
+    models/<version>/arrays.bin        - the estimator's numpy buffers, 64-byte aligned
+
+Arrays are written out-of-band into one file and handed back to the
+unpickler as slices of a single read-only memory map, so loading does not
+read the arrays into Python byte strings first. joblib.load was measured
+at 70-95ms for a 200-tree forest against ~8ms for this format - its
+per-array wrappers go through a pure-Python unpickler.
+
+The manifest is read on its own, so the feature schema is checked before
+the estimator (and scikit-learn) is loaded, and lazy=True defers the
+estimator until it is first used.
+
+Usage:
+    registry = ModelRegistry()
+    manifest = registry.save(model, feature_columns, metrics={'test_accuracy': 0.88}, data_hash=hash_frame(df))
+    model, manifest = registry.load(feature_columns=feature_columns)
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import pickle
+import shutil
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+DEFAULT_ROOT = 'models'
+MANIFEST_NAME = 'manifest.json'
+SKELETON_NAME = 'model.pkl'
+ARRAYS_NAME = 'arrays.bin'
+LATEST_NAME = 'LATEST'
+ALIGNMENT = 64
+
+class FeatureSchemaMismatch(ValueError):
+    """The caller's feature columns differ from the ones the model was trained on"""
+
+def hash_frame(df):
+    """Order-sensitive SHA-256 of a frame's values and column names"""
+    digest = hashlib.sha256()
+    digest.update(json.dumps([str(col) for col in df.columns]).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return digest.hexdigest()
+
+def check_feature_schema(manifest, feature_columns):
+    """Raise FeatureSchemaMismatch unless feature_columns match the manifest exactly (order included)"""
+    expected = manifest['feature_columns']
+    if list(feature_columns) == expected:
+        return
+    missing = [col for col in expected if col not in feature_columns]
+    extra = [col for col in feature_columns if col not in expected]
+    detail = f"missing {missing}, unexpected {extra}" if missing or extra else "same columns in a different order"
+    raise FeatureSchemaMismatch(f"Model {manifest['version']} was trained on a different feature schema: {detail}")
+
+def _serialize(model):
+    """Pickle skeleton (protocol 5) and the out-of-band array buffers"""
+    buffers = []
+    skeleton = pickle.dumps(model, protocol=5, buffer_callback=buffers.append)
+    return skeleton, buffers
+
+def artifact_hash(model, skeleton=None, buffers=None):
+    """SHA-256 of a model's serialized form (the manifest's artifact.sha256 for saved versions)"""
+    if skeleton is None:
+        skeleton, buffers = _serialize(model)
+    digest = hashlib.sha256(skeleton)
+    for buffer in buffers:
+        digest.update(buffer.raw())
+    return digest.hexdigest()
+
+def _dump_artifact(model, directory):
+    """Write the pickle skeleton and the aligned array file; returns the buffer layout"""
+    skeleton, buffers = _serialize(model)
+    (directory / SKELETON_NAME).write_bytes(skeleton)
+
+    layout = []
+    position = 0
+    with open(directory / ARRAYS_NAME, 'wb') as f:
+        for buffer in buffers:
+            raw = buffer.raw()
+            padding = -position % ALIGNMENT
+            f.write(b'\0' * padding)
+            position += padding
+            layout.append([position, raw.nbytes])
+            f.write(raw)
+            position += raw.nbytes
+    return {'buffers': layout, 'array_bytes': position, 'skeleton_bytes': len(skeleton),
+            'sha256': artifact_hash(model, skeleton, buffers)}
+
+def _load_artifact(directory, artifact, use_mmap=True):
+    """Unpickle the estimator, feeding its arrays from one memory map (or one read)"""
+    arrays_path = directory / ARRAYS_NAME
+    if artifact['array_bytes'] == 0:
+        data = b''
+    elif use_mmap:
+        with open(arrays_path, 'rb') as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    else:
+        data = bytearray(arrays_path.read_bytes())
+
+    view = memoryview(data)
+    buffers = [view[offset:offset + nbytes] for offset, nbytes in artifact['buffers']]
+    return pickle.loads((directory / SKELETON_NAME).read_bytes(), buffers=buffers)
+
+class LazyModel:
+    def __init__(self, loader):
+        """Stand-in that loads the estimator the first time it is used"""
+        self._loader = loader
+        self._model = None
+
+    @property
+    def loaded(self):
+        """Whether the estimator has been loaded yet"""
+        return self._model is not None
+
+    def get(self):
+        """The real estimator (loaded on first call)"""
+        if self._model is None:
+            self._model = self._loader()
+        return self._model
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
+
+class ModelRegistry:
+    def __init__(self, root=DEFAULT_ROOT):
+        """Initialize a registry rooted at a directory"""
+        self.root = Path(root)
+
+    def versions(self):
+        """Saved versions, oldest first"""
+        if not self.root.exists():
+            return []
+        return sorted(p.name for p in self.root.iterdir() if (p / MANIFEST_NAME).exists())
+
+    def latest_version(self):
+        """Newest version (None if nothing was saved)"""
+        try:
+            return (self.root / LATEST_NAME).read_text(encoding='utf-8').strip() or None
+        except FileNotFoundError:
+            versions = self.versions()
+            return versions[-1] if versions else None
+
+    def _resolve(self, version):
+        """Version name for 'latest' or an explicit version"""
+        return self.latest_version() if version == 'latest' else version
+
+    def manifest(self, version='latest'):
+        """Manifest of a version (None if it doesn't exist)"""
+        version = self._resolve(version)
+        if version is None:
+            return None
+        try:
+            with open(self.root / version / MANIFEST_NAME, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def save(self, model, feature_columns, metrics=None, data_hash=None, lineage=None, **details):
+        """Store a new version and make it the latest; returns its manifest"""
+        import sklearn
+
+        versions = self.versions()
+        version = f"v{int(versions[-1][1:]) + 1:04d}" if versions else 'v0001'
+        self.root.mkdir(parents=True, exist_ok=True)
+
+        # Build in a temp directory and rename, so readers never see half a version
+        tmp_dir = self.root / f".{version}.tmp"
+        if tmp_dir.exists():
+            shutil.rmtree(tmp_dir)
+        tmp_dir.mkdir()
+
+        artifact = _dump_artifact(model, tmp_dir)
+        manifest = {
+            'version': version,
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'model_type': f"{type(model).__module__}.{type(model).__name__}",
+            'sklearn_version': sklearn.__version__,
+            'feature_columns': list(feature_columns),
+            'metrics': metrics or {},
+            'data_hash': data_hash,
+            'params': model.get_params() if hasattr(model, 'get_params') else {},
+            'lineage': lineage,
+            'artifact': artifact,
+            **details,
+        }
+        with open(tmp_dir / MANIFEST_NAME, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, default=str)
+        os.replace(tmp_dir, self.root / version)
+
+        tmp_latest = self.root / (LATEST_NAME + '.tmp')
+        tmp_latest.write_text(version, encoding='utf-8')
+        os.replace(tmp_latest, self.root / LATEST_NAME)
+        return manifest
+
+    def load(self, version='latest', feature_columns=None, mmap=True, lazy=False):
+        """Load (model, manifest); None, None if the version doesn't exist
+
+        feature_columns, if given, must match the training schema exactly or
+        FeatureSchemaMismatch is raised before anything else is loaded.
+        lazy=True returns a LazyModel that loads on first use.
+        """
+        manifest = self.manifest(version)
+        if manifest is None:
+            return None, None
+        if feature_columns is not None:
+            check_feature_schema(manifest, feature_columns)
+
+        directory = self.root / manifest['version']
+        loader = lambda: _load_artifact(directory, manifest['artifact'], use_mmap=mmap)
+        return (LazyModel(loader) if lazy else loader()), manifest
+
+    def import_pickle(self, path, feature_columns, **details):
+        """Register a legacy pickled model (e.g. trained_model.pkl) as a new version"""
+        with open(path, 'rb') as f:
+            model = pickle.load(f)
+        n_features = getattr(model, 'n_features_in_', len(feature_columns))
+        if n_features != len(feature_columns):
+            raise FeatureSchemaMismatch(f"{path} expects {n_features} features, got {len(feature_columns)}")
+        return self.save(model, feature_columns, imported_from=str(path), **details)
+
+def describe(root=DEFAULT_ROOT):
+    """Print every saved version with its metrics and lineage"""
+    registry = ModelRegistry(root)
+    versions = registry.versions()
+    if not versions:
+        print(f"📭 No models in {root}")
+        return
+
+    latest = registry.latest_version()
+    for version in versions:
+        manifest = registry.manifest(version)
+        size = sum(f.stat().st_size for f in (registry.root / version).iterdir())
+        metrics = ', '.join(f"{key}={value:.3f}" for key, value in manifest['metrics'].items()
+                            if isinstance(value, (int, float)))
+        marker = ' (latest)' if version == latest else ''
+        print(f"📦 {version}{marker}: {manifest['model_type'].rsplit('.', 1)[-1]}, "
+              f"{len(manifest['feature_columns'])} features, {size / 1024:.1f} KB, {manifest['created_at']}")
+        if metrics:
+            print(f"   metrics: {metrics}")
+        if manifest.get('lineage'):
+            lineage = manifest['lineage']
+            print(f"   {lineage['mode']}: {len(lineage['games_seen'])} games seen "
+                  f"({len(lineage['new_games'])} new), {lineage['rows_seen']} rows")
+
+if __name__ == "__main__":
+    describe()
@@ -7,11 +7,14 @@ This script uses the trained Random Forest model to predict winners
 of ongoing Civ VI games based on current Turn 20+ data.
 
 Prerequisites:
-    - trained_model.pkl (generated by victory_prediction_model.py)
+    - models/ registry version (generated by victory_prediction_model.py)
     - Database connection to live game data
 
 Usage:
-    python predict_winner.py
+    python predict_winner.py                   # compiled forest inference (compiled_forest.py)
+    python predict_winner.py --engine sklearn  # sklearn predict_proba
+    python predict_winner.py --timeline        # every turn of the current game -> prediction_timeline
+    python predict_winner.py --timeline --game "2025-08-02_00:09:07.264659"
 
 Output:
     - Live predictions for current game
@@ -21,15 +24,117 @@ Output:
 
 import pandas as pd
 import numpy as np
-import pickle
 import psycopg2
 from datetime import datetime
+import argparse
 import os
 
+from calibration import PhaseCalibrator
+from compiled_forest import CompiledForest
+from feature_attribution import AttributionCache, top_drivers
+from model_registry import ModelRegistry
+from stage4h_insert_data import copy_civ_rows
+
+LEGACY_MODEL_FILE = 'trained_model.pkl'
+
+INFERENCE_ENGINES = ('compiled', 'sklearn')
+
+# Latest turn of the session the loader wrote to most recently
+CURRENT_TURN_QUERY = """
+SELECT game_id, MAX(game_turn)
+FROM civ_game_data
+WHERE game_id = (
+    SELECT game_id FROM civ_game_data ORDER BY created_at DESC LIMIT 1
+)
+GROUP BY game_id
+"""
+
+# Every civilization's raw metrics and rankings, per turn
+TURN_FEATURES_SELECT = """
+SELECT 
+    cgd.civilization,
+    cgd.game_turn,
+    cgd.num_cities,
+    cgd.population,
+    cgd.techs,
+    cgd.civics,
+    cgd.yields_science,
+    cgd.yields_culture,
+    cgd.yields_production,
+    cgd.buildings,
+    cgd.districts,
+    cgd.total_score,
+    cgd.game_id,
+    -- Relative rankings for this turn (precomputed at ingest)
+    r.science_rank,
+    r.cities_rank,
+    r.score_rank,
+    r.population_rank
+FROM civ_game_data cgd
+JOIN civ_turn_rankings r
+  ON r.game_id = cgd.game_id
+ AND r.game_turn = cgd.game_turn
+ AND r.civilization = cgd.civilization
+"""
+
+# One turn of one game
+TURN_FEATURES_QUERY = TURN_FEATURES_SELECT + """
+WHERE cgd.game_id = %(game_id)s
+  AND cgd.game_turn = %(turn)s
+ORDER BY cgd.total_score DESC
+"""
+
+# Every turn of one game (timeline mode)
+GAME_TIMELINE_QUERY = TURN_FEATURES_SELECT + """
+WHERE cgd.game_id = %(game_id)s
+ORDER BY cgd.game_turn, cgd.total_score DESC
+"""
+
+TIMELINE_TABLE = 'prediction_timeline'
+TIMELINE_COLUMNS = ['game_id', 'game_turn', 'civilization', 'win_probability', 'probability_rank', 'model_version']
+
+def add_derived_features(current_data):
+    """Add the calculated model features to rows from TURN_FEATURES_QUERY (in place)"""
+    current_data['current_score'] = current_data['total_score']
+    current_data['science_per_city'] = np.where(
+        current_data['num_cities'] > 0,
+        current_data['yields_science'] / current_data['num_cities'],
+        0
+    )
+    current_data['population_per_city'] = np.where(
+        current_data['num_cities'] > 0,
+        current_data['population'] / current_data['num_cities'],
+        0
+    )
+    current_data['buildings_per_city'] = np.where(
+        current_data['num_cities'] > 0,
+        current_data['buildings'] / current_data['num_cities'],
+        0
+    )
+    current_data['development_index'] = np.where(
+        current_data['game_turn'] > 0,
+        (current_data['techs'] + current_data['civics']) / current_data['game_turn'],
+        0
+    )
+    return current_data
+
 class LiveVictoryPredictor:
-    def __init__(self):
-        """Initialize the live victory prediction system"""
+    def __init__(self, engine='compiled'):
+        """Initialize the live victory prediction system
+        
+        engine='compiled' scores with a flattened copy of the forest
+        (identical probabilities, much lower latency); 'sklearn' uses
+        predict_proba directly.
+        """
+        if engine not in INFERENCE_ENGINES:
+            raise ValueError(f"Unknown inference engine '{engine}' (choose from {', '.join(INFERENCE_ENGINES)})")
+        self.engine = engine
         self.model = None
+        self.model_version = None
+        self.compiled_model = None
+        self.calibrator = None
+        self.model_hash = None
+        self.attributions = None
         self.feature_columns = [
             # Raw metrics
             'num_cities', 'population', 'techs', 'civics',
@@ -50,17 +155,33 @@ class LiveVictoryPredictor:
         }
     
     def load_trained_model(self):
-        """Load the trained Random Forest model"""
+        """Load the latest trained model from the registry
+        
+        The model is rejected if it was trained on different feature
+        columns (or a different order) than self.feature_columns.
+        """
         try:
-            if not os.path.exists('trained_model.pkl'):
-                print("❌ trained_model.pkl not found!")
+            registry = ModelRegistry()
+            if registry.latest_version() is None and os.path.exists(LEGACY_MODEL_FILE):
+                # One-off import of a model pickled before the registry existed
+                print(f"📦 Importing legacy {LEGACY_MODEL_FILE} into the model registry...")
+                registry.import_pickle(LEGACY_MODEL_FILE, self.feature_columns)
+            
+            self.model, manifest = registry.load(feature_columns=self.feature_columns)
+            if manifest is None:
+                print("❌ No trained model found!")
                 print("   Please run victory_prediction_model.py first")
                 return False
-                
-            with open('trained_model.pkl', 'rb') as f:
-                self.model = pickle.load(f)
             
-            print("✅ Trained model loaded successfully")
+            self.model_version = manifest['version']
+            self.model_hash = manifest['artifact'].get('sha256') or manifest['version']
+            self.calibrator = PhaseCalibrator.from_dict(manifest.get('calibration'))
+            if self.engine == 'compiled':
+                self.compiled_model = CompiledForest.from_estimator(self.model)
+            
+            calibration = f", {self.calibrator.method} calibration" if self.calibrator else ""
+            print(f"✅ Trained model {manifest['version']} loaded successfully "
+                  f"(created {manifest['created_at']}, {self.engine} inference{calibration})")
             return True
             
         except Exception as e:
@@ -83,82 +204,65 @@ class LiveVictoryPredictor:
             return None
         
         try:
-            # Get the most recent game data (latest turn from latest session)
-            latest_data_query = """
-            SELECT 
-                civilization,
-                game_turn,
-                num_cities,
-                population,
-                techs,
-                civics,
-                yields_science,
-                yields_culture,
-                yields_production,
-                buildings,
-                districts,
-                total_score,
-                created_at,
-                -- Calculate relative rankings for this turn
-                RANK() OVER (ORDER BY yields_science DESC) as science_rank,
-                RANK() OVER (ORDER BY num_cities DESC) as cities_rank,
-                RANK() OVER (ORDER BY total_score DESC) as score_rank,
-                RANK() OVER (ORDER BY population DESC) as population_rank
-            FROM civ_game_data 
-            WHERE (created_at, game_turn) = (
-                SELECT created_at, MAX(game_turn)
-                FROM civ_game_data 
-                GROUP BY created_at
-                ORDER BY created_at DESC
-                LIMIT 1
-            )
-            ORDER BY total_score DESC;
-            """
+            # Latest turn of the latest session, then that turn's rows
+            cursor = conn.cursor()
+            cursor.execute(CURRENT_TURN_QUERY)
+            latest = cursor.fetchone()
+            cursor.close()
+            if latest is None:
+                print("❌ No current game data found")
+                conn.close()
+                return None
             
-            current_data = pd.read_sql(latest_data_query, conn)
+            latest_session, latest_turn = latest
+            current_data = pd.read_sql(TURN_FEATURES_QUERY, conn,
+                                       params={'game_id': latest_session, 'turn': int(latest_turn)})
             conn.close()
             
             if len(current_data) == 0:
                 print("❌ No current game data found")
                 return None
             
-            latest_turn = current_data.iloc[0]['game_turn']
-            latest_session = current_data.iloc[0]['created_at']
             num_civs = len(current_data)
             
             print(f"📊 Found current game: {latest_session}")
             print(f"   Latest turn: {latest_turn}, Civilizations: {num_civs}")
             
-            # Calculate derived features
-            current_data['current_score'] = current_data['total_score']
-            current_data['science_per_city'] = np.where(
-                current_data['num_cities'] > 0,
-                current_data['yields_science'] / current_data['num_cities'],
-                0
-            )
-            current_data['population_per_city'] = np.where(
-                current_data['num_cities'] > 0,
-                current_data['population'] / current_data['num_cities'],
-                0
-            )
-            current_data['buildings_per_city'] = np.where(
-                current_data['num_cities'] > 0,
-                current_data['buildings'] / current_data['num_cities'],
-                0
-            )
-            current_data['development_index'] = np.where(
-                current_data['game_turn'] > 0,
-                (current_data['techs'] + current_data['civics']) / current_data['game_turn'],
-                0
-            )
-            
-            return current_data, latest_turn
+            return add_derived_features(current_data), latest_turn
             
         except Exception as e:
             print(f"❌ Error getting current game data: {e}")
             conn.close()
             return None
     
+    def predict_proba(self, X):
+        """Class probabilities from the configured inference engine, calibrated per game phase
+        
+        X is a frame (or array) in feature_columns order; its game_turn column
+        picks the calibration phase of each row.
+        """
+        if self.compiled_model is not None:
+            probabilities = self.compiled_model.predict_proba(X)
+        else:
+            probabilities = self.model.predict_proba(X)
+        if self.calibrator is None:
+            return probabilities
+        
+        turns = X['game_turn'] if isinstance(X, pd.DataFrame) else np.asarray(X)[:, self.feature_columns.index('game_turn')]
+        win = self.calibrator.transform(probabilities[:, 1], turns)
+        return np.column_stack([1.0 - win, win])
+    
+    def explain_predictions(self, current_data):
+        """Each feature's contribution to every row's (uncalibrated) win probability
+        
+        Frame indexed like current_data. Rows this model already explained
+        come from an in-memory cache instead of another pass over the forest.
+        """
+        if self.attributions is None:
+            forest = self.compiled_model or CompiledForest.from_estimator(self.model)
+            self.attributions = AttributionCache(forest, self.feature_columns, self.model_hash or self.model_version)
+        return self.attributions.explain(current_data[self.feature_columns].fillna(0))
+    
     def make_predictions(self, current_data):
         """Make victory predictions for current game"""
         if self.model is None:
@@ -176,7 +280,7 @@ class LiveVictoryPredictor:
                 X[col] = X[col].fillna(0)
             
             # Get win probabilities
-            win_probabilities = self.model.predict_proba(X)[:, 1]
+            win_probabilities = self.predict_proba(X)[:, 1]
             
             # Create results dataframe
             results = pd.DataFrame({
@@ -197,6 +301,98 @@ class LiveVictoryPredictor:
             print(f"❌ Error making predictions: {e}")
             return None
     
+    def get_game_timeline_data(self, game_id=None):
+        """Every turn of a game (default: the current one) in one query, with derived features"""
+        conn = self.connect_database()
+        if not conn:
+            return None
+        
+        try:
+            if game_id is None:
+                cursor = conn.cursor()
+                cursor.execute(CURRENT_TURN_QUERY)
+                latest = cursor.fetchone()
+                cursor.close()
+                if latest is None:
+                    print("❌ No current game data found")
+                    conn.close()
+                    return None
+                game_id = latest[0]
+            
+            game_data = pd.read_sql(GAME_TIMELINE_QUERY, conn, params={'game_id': game_id})
+            conn.close()
+            
+            if len(game_data) == 0:
+                print(f"❌ No data for game {game_id}")
+                return None
+            
+            print(f"📊 Game {game_id}: {game_data['game_turn'].nunique()} turns, "
+                  f"{game_data['civilization'].nunique()} civilizations, {len(game_data)} rows")
+            return add_derived_features(game_data)
+            
+        except Exception as e:
+            print(f"❌ Error getting game timeline data: {e}")
+            conn.close()
+            return None
+    
+    def build_timeline(self, game_data):
+        """Win probability of every civilization at every turn, from one predict_proba call"""
+        X = game_data[self.feature_columns].fillna(0)
+        timeline = game_data[['game_id', 'game_turn', 'civilization']].copy()
+        timeline['win_probability'] = self.predict_proba(X)[:, 1]
+        timeline['probability_rank'] = (
+            timeline.groupby('game_turn')['win_probability'].rank(method='min', ascending=False).astype(int)
+        )
+        timeline['model_version'] = self.model_version
+        return timeline.sort_values(['game_turn', 'probability_rank']).reset_index(drop=True)
+    
+    def save_timeline(self, timeline):
+        """Replace the game's rows in prediction_timeline with this timeline (one transaction)"""
+        conn = self.connect_database()
+        if not conn:
+            return False
+        
+        try:
+            cursor = conn.cursor()
+            for game_id in timeline['game_id'].unique():
+                cursor.execute(f"DELETE FROM {TIMELINE_TABLE} WHERE game_id = %s", (game_id,))
+            copy_civ_rows(cursor, timeline, table=TIMELINE_TABLE, columns=TIMELINE_COLUMNS)
+            conn.commit()
+            cursor.close()
+            conn.close()
+            print(f"✅ {len(timeline)} rows written to {TIMELINE_TABLE}")
+            return True
+        except Exception as e:
+            print(f"❌ Error saving timeline: {e}")
+            conn.rollback()
+            conn.close()
+            return False
+    
+    def run_timeline(self, game_id=None):
+        """Score every turn of a game in one batch and store the timeline for Superset"""
+        print("🚀 Building Win Probability Timeline")
+        print("=" * 40)
+        
+        if not self.load_trained_model():
+            return False
+        
+        game_data = self.get_game_timeline_data(game_id)
+        if game_data is None:
+            return False
+        
+        start = datetime.now()
+        timeline = self.build_timeline(game_data)
+        seconds = (datetime.now() - start).total_seconds()
+        print(f"🎯 Scored {len(timeline)} civilization-turns in one batch ({seconds * 1000:.1f} ms)")
+        
+        # Who led the prediction at each turn, and when that changed
+        leaders = timeline[timeline['probability_rank'] == 1].drop_duplicates('game_turn')
+        changes = leaders[leaders['civilization'] != leaders['civilization'].shift()]
+        for _, row in changes.iterrows():
+            print(f"   Turn {row['game_turn']:3d}: {row['civilization']} takes the lead ({row['win_probability']:.1%})")
+        
+        return self.save_timeline(timeline)
+    
     def analyze_predictions(self, results, current_turn):
         """Analyze and interpret predictions"""
         if results is None or len(results) == 0:
@@ -253,8 +449,12 @@ class LiveVictoryPredictor:
         
         return top_prediction
     
-    def generate_strategic_insights(self, results, current_turn):
-        """Generate strategic insights and recommendations"""
+    def generate_strategic_insights(self, results, current_turn, attributions=None):
+        """Generate strategic insights and recommendations
+        
+        attributions (from explain_predictions, indexed like results) adds
+        the features driving the leader's and challenger's probabilities.
+        """
         if results is None or len(results) == 0:
             return
         
@@ -273,6 +473,8 @@ class LiveVictoryPredictor:
             print(f"   🏙️  Expansion Advantage (Rank #{leader['cities_rank']:.0f})")
         if leader['score_rank'] <= 2:
             print(f"   📊 Score Dominance (Rank #{leader['score_rank']:.0f})")
+        if attributions is not None:
+            self.print_drivers(attributions.loc[[results.index[0]]])
         
         # Challenger analysis
         if len(results) > 1:
@@ -280,6 +482,8 @@ class LiveVictoryPredictor:
             print(f"\n🥈 MAIN CHALLENGER: {challenger['civilization']}")
             print(f"   Win Probability: {challenger['win_probability']:.1%}")
             print(f"   Gap to close: {(leader['win_probability'] - challenger['win_probability']) * 100:.1f} percentage points")
+            if attributions is not None:
+                self.print_drivers(attributions.loc[[results.index[1]]])
         
         # Critical thresholds
         print(f"\n⚠️  CRITICAL THRESHOLDS:")
@@ -315,6 +519,12 @@ class LiveVictoryPredictor:
             print(f"\n🏁 LATE GAME INSIGHTS (Turn {current_turn}):")
             print(f"   Victory conditions becoming clearer")
     
+    def print_drivers(self, attributions):
+        """Features adding the most to one civilization's win probability"""
+        drivers = top_drivers(attributions)[0]
+        if drivers:
+            print(f"   Model drivers: " + ", ".join(f"{feature} (+{value * 100:.1f} pts)" for feature, value in drivers))
+    
     def save_prediction_log(self, results, current_turn):
         """Save predictions to log file for tracking accuracy"""
         try:
@@ -362,7 +572,7 @@ class LiveVictoryPredictor:
         top_prediction = self.analyze_predictions(results, current_turn)
         
         # Step 5: Generate strategic insights
-        self.generate_strategic_insights(results, current_turn)
+        self.generate_strategic_insights(results, current_turn, self.explain_predictions(current_data))
         
         # Step 6: Save prediction log
         self.save_prediction_log(results, current_turn)
@@ -372,11 +582,22 @@ class LiveVictoryPredictor:
         
         return True
 
-def run_quick_prediction():
+def run_quick_prediction(engine='compiled'):
     """Quick prediction function for easy testing"""
-    predictor = LiveVictoryPredictor()
+    predictor = LiveVictoryPredictor(engine=engine)
     return predictor.run_prediction()
 
 if __name__ == "__main__":
-    # Run the live prediction
-    run_quick_prediction()
+    parser = argparse.ArgumentParser(description="Predict the winner of the current Civ VI game")
+    parser.add_argument('--engine', choices=INFERENCE_ENGINES, default='compiled',
+                        help="Inference engine (default: compiled forest)")
+    parser.add_argument('--timeline', action='store_true',
+                        help="Score every turn of a game and write prediction_timeline")
+    parser.add_argument('--game', default=None, help="Game for --timeline (default: the current game)")
+    args = parser.parse_args()
+    
+    if args.timeline:
+        LiveVictoryPredictor(engine=args.engine).run_timeline(args.game)
+    else:
+        # Run the live prediction
+        run_quick_prediction(args.engine)
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Civ VI Prediction Server
+========================
+
+Long-lived HTTP service around LiveVictoryPredictor. The model is loaded
+(and compiled) once, database connections come from a pool, and every
+(game_id, turn) prediction is cached until the loader reports that turn
+was written again.
+
+Endpoints (GET, JSON):
+    /predict/latest              latest turn of the game being played
+    /predict/<game_id>/<turn>    any stored turn (URL-encode the game_id)
+    /health                      model version, cache and listener state
+
+Each civilization comes with its top model drivers (feature attributions,
+see feature_attribution.py), computed once per cached turn.
+
+Cache invalidation: stage4h_insert_data.load_new_turns sends a NOTIFY on
+civ_turns_loaded with the game and turns it committed. A listener thread
+drops those (game_id, turn) entries and the cached "latest" pointer. While
+the listener is down, /predict/latest looks the latest turn up on every
+request instead of trusting the cached pointer.
+
+--source feature-store serves the turns in feature_store/training_features
+instead of Postgres (past games, no database needed).
+
+Usage:
+    python prediction_server.py                         # http://127.0.0.1:8765
+    python prediction_server.py --port 9000 --engine sklearn
+    python prediction_server.py --source feature-store
+"""
+
+import argparse
+import json
+import select
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlparse
+
+import pandas as pd
+import psycopg2
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+from psycopg2.pool import ThreadedConnectionPool
+
+from feature_attribution import top_drivers
+from feature_store import FeatureStore
+from ml_data_preparation import TRAINING_DATASET
+from predict_winner import (CURRENT_TURN_QUERY, INFERENCE_ENGINES, TURN_FEATURES_QUERY,
+                            LiveVictoryPredictor, add_derived_features)
+from stage4h_insert_data import TURNS_LOADED_CHANNEL
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+CACHE_SIZE = 4096
+LISTEN_RETRY_SECONDS = 5
+
+# Per-civilization fields returned next to the win probability
+RESPONSE_COLUMNS = ['current_score', 'score_rank', 'science_rank', 'cities_rank', 'num_cities', 'techs']
+
+class DatabaseTurnSource:
+    def __init__(self, db_config, pool_size=4):
+        """Turn lookups over a pool of warm connections"""
+        self.db_config = db_config
+        self.pool = ThreadedConnectionPool(1, pool_size, **db_config)
+
+    def latest_turn(self):
+        """(game_id, turn) of the latest loaded turn, or None"""
+        conn = self.pool.getconn()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(CURRENT_TURN_QUERY)
+                row = cursor.fetchone()
+            conn.rollback()
+            return (row[0], int(row[1])) if row else None
+        finally:
+            self.pool.putconn(conn)
+
+    def turn_features(self, game_id, turn):
+        """Feature rows of every civilization in one turn (empty if unknown)"""
+        conn = self.pool.getconn()
+        try:
+            df = pd.read_sql(TURN_FEATURES_QUERY, conn, params={'game_id': game_id, 'turn': int(turn)})
+            conn.rollback()
+        finally:
+            self.pool.putconn(conn)
+        return add_derived_features(df) if len(df) else df
+
+    def close(self):
+        """Close every pooled connection"""
+        self.pool.closeall()
+
+class FeatureStoreTurnSource:
+    def __init__(self, store=None):
+        """Turn lookups over the training feature store, held in memory"""
+        store = store or FeatureStore()
+        df = store.read(TRAINING_DATASET)
+        if df is None:
+            raise FileNotFoundError(f"{TRAINING_DATASET} not found in the feature store")
+        df['game_id'] = df['game_id'].astype(str)
+        df['civilization'] = df['civilization'].astype(str)
+        self.turns = {key: rows.reset_index(drop=True)
+                      for key, rows in df.groupby(['game_id', 'game_turn'], sort=True)}
+        self.latest = max(self.turns, key=lambda key: (key[0], key[1])) if self.turns else None
+
+    def latest_turn(self):
+        """Last turn of the most recent game in the store"""
+        return (self.latest[0], int(self.latest[1])) if self.latest else None
+
+    def turn_features(self, game_id, turn):
+        """Feature rows of one stored turn (empty if unknown)"""
+        return self.turns.get((game_id, int(turn)), pd.DataFrame())
+
+    def close(self):
+        """Nothing to release"""
+
+class PredictionService:
+    def __init__(self, source, predictor, cache_size=CACHE_SIZE):
+        """Cached predictions for (game_id, turn) on top of a turn source and a loaded predictor"""
+        self.source = source
+        self.predictor = predictor
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.latest_key = None
+        self.listening = False
+        self.hits = 0
+        self.misses = 0
+        # Bumped by every invalidation; a result computed across one isn't cached
+        self.generation = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def predict(self, game_id, turn):
+        """Win probabilities for one turn (None if the turn doesn't exist)"""
+        key = (game_id, int(turn))
+        with self._lock:
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                self.hits += 1
+                return dict(self.cache[key], cached=True)
+            self.misses += 1
+            generation = self.generation
+
+        rows = self.source.turn_features(game_id, turn)
+        if len(rows) == 0:
+            return None
+
+        X = rows[self.predictor.feature_columns].fillna(0)
+        probabilities = self.predictor.predict_proba(X)[:, 1]
+        drivers = top_drivers(self.predictor.explain_predictions(rows))
+        predictions = [
+            dict({'civilization': str(row['civilization']), 'win_probability': float(probability),
+                  'drivers': [{'feature': feature, 'contribution': value} for feature, value in civ_drivers]},
+                 **{col: float(row[col]) for col in RESPONSE_COLUMNS if col in row})
+            for (_, row), probability, civ_drivers in zip(rows.iterrows(), probabilities, drivers)
+        ]
+        predictions.sort(key=lambda p: p['win_probability'], reverse=True)
+        response = {
+            'game_id': game_id,
+            'turn': int(turn),
+            'model_version': self.predictor.model_version,
+            'predicted_winner': predictions[0]['civilization'],
+            'predictions': predictions,
+        }
+
+        with self._lock:
+            # Turns reloaded while this one was scored may have changed its features
+            if generation == self.generation:
+                self.cache[key] = response
+                if len(self.cache) > self.cache_size:
+                    self.cache.popitem(last=False)
+        return dict(response, cached=False)
+
+    def predict_latest(self):
+        """Predictions for the latest loaded turn (None if nothing is loaded)"""
+        key = self.latest_key if self.listening else None
+        if key is None:
+            key = self.source.latest_turn()
+            if key is None:
+                return None
+            if self.listening:
+                self.latest_key = key
+        return self.predict(*key)
+
+    def invalidate(self, game_id, turns):
+        """Forget cached predictions for turns that were (re)loaded"""
+        with self._lock:
+            self.generation += 1
+            for turn in turns:
+                self.cache.pop((game_id, int(turn)), None)
+            self.latest_key = None
+
+    def listen_for_ingest(self, db_config):
+        """Drop cache entries whenever the loader announces new turns (runs until stop())"""
+        while not self._stop.is_set():
+            try:
+                conn = psycopg2.connect(**db_config)
+                conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+                with conn.cursor() as cursor:
+                    cursor.execute(f"LISTEN {TURNS_LOADED_CHANNEL}")
+                # Anything loaded while we weren't listening may be cached already
+                with self._lock:
+                    self.generation += 1
+                    self.cache.clear()
+                    self.latest_key = None
+                self.listening = True
+                print(f"👂 Listening for {TURNS_LOADED_CHANNEL} notifications")
+
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], 1.0) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        payload = json.loads(conn.notifies.pop(0).payload)
+                        self.invalidate(payload['game_id'], payload['turns'])
+                        print(f"🔄 Turns {payload['turns']} of {payload['game_id']} reloaded - cache entries dropped")
+                conn.close()
+            except Exception as e:
+                self.listening = False
+                print(f"⚠️  Ingest listener unavailable ({e}) - retrying in {LISTEN_RETRY_SECONDS}s")
+                self._stop.wait(LISTEN_RETRY_SECONDS)
+        self.listening = False
+
+    def health(self):
+        """Model, cache and listener state"""
+        with self._lock:
+            return {
+                'status': 'ok',
+                'model_version': self.predictor.model_version,
+                'engine': self.predictor.engine,
+                'cached_turns': len(self.cache),
+                'cache_hits': self.hits,
+                'cache_misses': self.misses,
+                'listening_for_ingest': self.listening,
+            }
+
+    def stop(self):
+        """Stop the listener thread"""
+        self._stop.set()
+
+def make_handler(service):
+    """Request handler class bound to a PredictionService"""
+    class PredictionHandler(BaseHTTPRequestHandler):
+        # Keep-alive, so clients don't pay a TCP handshake per prediction; without
+        # Nagle, headers and body written separately don't wait on a delayed ACK
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True
+
+        def _send_json(self, status, body):
+            data = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            parts = [unquote(part) for part in urlparse(self.path).path.strip('/').split('/')]
+            try:
+                if parts == ['health']:
+                    return self._send_json(200, service.health())
+                if parts == ['predict', 'latest']:
+                    result = service.predict_latest()
+                    if result is None:
+                        return self._send_json(404, {'error': 'No game data loaded yet'})
+                    return self._send_json(200, result)
+                if len(parts) == 3 and parts[0] == 'predict':
+                    try:
+                        turn = int(parts[2])
+                    except ValueError:
+                        return self._send_json(400, {'error': f"Turn must be an integer, got '{parts[2]}'"})
+                    result = service.predict(parts[1], turn)
+                    if result is None:
+                        return self._send_json(404, {'error': f"No data for game {parts[1]} turn {turn}"})
+                    return self._send_json(200, result)
+                return self._send_json(404, {'error': 'Use /predict/latest, /predict/<game_id>/<turn> or /health'})
+            except Exception as e:
+                return self._send_json(500, {'error': str(e)})
+
+        def log_message(self, format, *args):
+            # One line per request is too chatty under load
+            pass
+
+    return PredictionHandler
+
+class PredictionHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 drops SYNs when many clients connect at once
+    request_queue_size = 128
+
+def create_server(service, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """Threaded HTTP server for a service (call serve_forever() on it)"""
+    return PredictionHTTPServer((host, port), make_handler(service))
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve Civ VI victory predictions over HTTP")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--engine', choices=INFERENCE_ENGINES, default='compiled')
+    parser.add_argument('--source', choices=('database', 'feature-store'), default='database',
+                        help="Where turn data comes from (default: the live database)")
+    parser.add_argument('--pool-size', type=int, default=4, help="Database connections kept open")
+    args = parser.parse_args()
+
+    print("🌐 CIV VI PREDICTION SERVER")
+    print("=" * 40)
+
+    predictor = LiveVictoryPredictor(engine=args.engine)
+    if not predictor.load_trained_model():
+        return
+
+    if args.source == 'database':
+        source = DatabaseTurnSource(predictor.db_config, args.pool_size)
+    else:
+        source = FeatureStoreTurnSource()
+    service = PredictionService(source, predictor)
+
+    if args.source == 'database':
+        listener = threading.Thread(target=service.listen_for_ingest, args=(predictor.db_config,), daemon=True)
+        listener.start()
+
+    server = create_server(service, args.host, args.port)
+    print(f"✅ Serving on http://{args.host}:{args.port}/predict/latest")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Shutting down")
+    finally:
+        service.stop()
+        server.server_close()
+        source.close()
+
+if __name__ == "__main__":
+    main()
@@ -9,7 +9,7 @@ echo ==================================
 echo.
 
 REM Check if model exists
-if not exist "trained_model.pkl" (
+if not exist "models\LATEST" if not exist "trained_model.pkl" (
     echo ⚠️  No trained model found. Running full pipeline...
     call run_ml_pipeline.bat
     goto :end
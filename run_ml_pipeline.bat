@@ -67,9 +67,9 @@ echo 🎉 ML PIPELINE COMPLETED SUCCESSFULLY!
 echo =====================================
 echo.
 echo Generated Files:
-echo   📊 training_data.csv - Training dataset
+echo   📊 feature_store\training_features - Training dataset (Parquet)
 echo   📋 data_analysis_report.txt - Data insights
-echo   📦 trained_model.pkl - ML model
+echo   📦 models\vNNNN - ML model with manifest (python model_registry.py lists versions)
 echo   📈 feature_importance.csv - Important features
 echo   📋 model_performance_report.txt - Model evaluation
 echo   🔮 prediction_log.txt - Live predictions
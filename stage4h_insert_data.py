@@ -9,24 +9,675 @@ import psycopg2
 import os
 from pathlib import Path
 import sys
+import io
+import json
+import argparse
 import numpy as np
+from datetime import datetime
 
-def insert_civ_data():
-    """Insert real Civ VI data from CSV files into database"""
+from incremental_log_reader import IncrementalLogReader
+from migrate_database import apply_migrations, ensure_game_partition
+
+# Define the major civilizations (the main players, not city-states)
+# This includes civilizations from all game sessions
+MAJOR_CIVILIZATIONS = {
+    # First game
+    "CIVILIZATION_NETHERLANDS", 
+    "CIVILIZATION_ROME", 
+    "CIVILIZATION_CHINA",
+    "CIVILIZATION_ENGLAND",
+    "CIVILIZATION_CANADA",
+    "CIVILIZATION_INDONESIA",
+    "CIVILIZATION_ETHIOPIA",
+    "CIVILIZATION_CREE",        # Appears in multiple games
+    "CIVILIZATION_OTTOMAN",
+    # Second game
+    "CIVILIZATION_GAUL",        
+    "CIVILIZATION_MALI",        
+    "CIVILIZATION_GRAN_COLOMBIA",
+    "CIVILIZATION_JAPAN",       
+    "CIVILIZATION_MAORI",       # Appears in multiple games
+    "CIVILIZATION_MAYA",
+    # Third game
+    "CIVILIZATION_AUSTRALIA",
+    "CIVILIZATION_BABYLON",
+    "CIVILIZATION_MACEDON",
+    "CIVILIZATION_POLAND",
+    "CIVILIZATION_SCYTHIA",
+    # Fourth game (current)
+    "CIVILIZATION_SUMERIA",
+    "CIVILIZATION_FRANCE"
+}
+
+# civ_game_data columns in the order the loader writes them
+CIV_GAME_DATA_COLUMNS = [
+    'game_turn', 'civilization', 'player_number',
+    'num_cities', 'population', 'techs', 'civics',
+    'land_units', 'corps', 'armies', 'naval_units',
+    'tiles_owned', 'tiles_improved',
+    'balance_gold', 'balance_faith',
+    'yields_science', 'yields_culture', 'yields_gold', 'yields_faith', 'yields_production', 'yields_food',
+    'buildings', 'districts', 'outgoing_trade_routes', 'tourism',
+    'diplo_victory', 'balance_favor', 'lifetime_favor', 'co2_per_turn',
+    'total_score'
+]
+
+# A game's turn for one civilization is stored exactly once
+NATURAL_KEY = ['game_id', 'game_turn', 'civilization']
+UPSERT_COLUMNS = ['game_id'] + CIV_GAME_DATA_COLUMNS
+
+def _conflict_clause():
+    """ON CONFLICT clause that overwrites every non-key column with the new values"""
+    updates = ',\n    '.join(f"{col} = EXCLUDED.{col}" for col in UPSERT_COLUMNS if col not in NATURAL_KEY)
+    return f"ON CONFLICT ({', '.join(NATURAL_KEY)}) DO UPDATE SET\n    {updates}"
+
+def upsert_sql(table='civ_game_data'):
+    """Single-row upsert (--row-by-row path and benchmarks)"""
+    placeholders = ', '.join(['%s'] * len(UPSERT_COLUMNS))
+    return (f"INSERT INTO {table} ({', '.join(UPSERT_COLUMNS)})\n"
+            f"VALUES ({placeholders})\n{_conflict_clause()}")
+
+def upsert_from_staging_sql(table='civ_game_data', staging='civ_game_data_staging'):
+    """Set-based upsert of a whole COPY batch from the staging table"""
+    columns = ', '.join(UPSERT_COLUMNS)
+    return f"INSERT INTO {table} ({columns})\nSELECT {columns} FROM {staging}\n{_conflict_clause()}"
+
+# Brings a civ_game_data table created before game_id existed up to date
+# (game_id itself is backfilled in between by backfill_game_ids)
+ADD_GAME_ID_SQL = "ALTER TABLE civ_game_data ADD COLUMN IF NOT EXISTS game_id VARCHAR(100)"
+
+NATURAL_KEY_DDL = """
+-- Keep only the newest copy of any duplicated (game_id, game_turn, civilization)
+DELETE FROM civ_game_data a
+USING civ_game_data b
+WHERE a.game_id = b.game_id
+  AND a.game_turn = b.game_turn
+  AND a.civilization = b.civilization
+  AND a.ctid < b.ctid;
+
+ALTER TABLE civ_game_data ALTER COLUMN game_id SET NOT NULL;
+
+CREATE UNIQUE INDEX IF NOT EXISTS civ_game_data_natural_key
+    ON civ_game_data (game_id, game_turn, civilization);
+"""
+
+# Log column (as named by read_log_csv) -> civ_game_data column, per source file
+STATS_COLUMN_MAP = {
+    'num_cities': 'num_cities',
+    'population': 'population',
+    'techs': 'techs',
+    'civics': 'civics',
+    'land_units': 'land_units',
+    'corps': 'corps',
+    'armies': 'armies',
+    'naval_units': 'naval_units',
+    'tiles_owned': 'tiles_owned',
+    'tiles_improved': 'tiles_improved',
+    'balance_gold': 'balance_gold',
+    'balance_faith': 'balance_faith',
+    'yield_science': 'yields_science',
+    'yield_culture': 'yields_culture',
+    'yield_gold': 'yields_gold',
+    'yield_faith': 'yields_faith',
+    'yield_production': 'yields_production',
+    'yield_food': 'yields_food'
+}
+
+STATS2_COLUMN_MAP = {
+    'buildings': 'buildings',
+    'districts': 'districts',
+    'outgoing_trade_routes': 'outgoing_trade_routes',
+    'tourism': 'tourism',
+    'diplo_victory_points': 'diplo_victory',
+    'balance_favor': 'balance_favor',
+    'lifetime_favor': 'lifetime_favor',
+    'co2_per_turn': 'co2_per_turn'
+}
+
+SCORES_COLUMN_MAP = {
+    'total_score': 'total_score'
+}
+
+def safe_int(value, default=0):
+    """Safely convert a CSV value to a Python int"""
+    try:
+        if pd.isna(value):
+            return default
+        return int(float(value))
+    except (ValueError, TypeError):
+        return default
+
+def _int_columns(df, column_map):
+    """Vectorized safe_int over the mapped columns (missing columns become 0)"""
+    converted = {}
+    for raw_col, db_col in column_map.items():
+        if raw_col in df.columns:
+            values = pd.to_numeric(df[raw_col], errors='coerce').fillna(0)
+            converted[db_col] = np.trunc(values).astype('int64')
+        else:
+            converted[db_col] = pd.Series(0, index=df.index, dtype='int64')
+    return pd.DataFrame(converted, index=df.index)
+
+def build_civ_game_frame(dataframes, turns=None, major_civilizations=MAJOR_CIVILIZATIONS):
+    """Join the three log DataFrames once into a single typed civ_game_data frame
     
-    print("💾 STAGE 4H: Inserting Real Civ VI Data")
-    print("=" * 50)
+    Player_Stats and Player_Stats_2 are joined on (game_turn, player_name).
+    Game_PlayerScores is joined on (game_turn, player_number), where the
+    player number is the civ's alphabetical position among the major civs
+    present that turn - the same mapping build_turn_rows uses.
+    """
+    stats = dataframes['stats']
+    stats = stats[stats['player_name'].isin(major_civilizations)]
+    if turns is not None:
+        stats = stats[stats['game_turn'].isin(list(turns))]
     
-    # Find the Civ VI logs directory
+    frame = pd.DataFrame({
+        'game_turn': pd.to_numeric(stats['game_turn']).astype('int64'),
+        'player_key': stats['player_name'].astype(str),
+    })
+    frame = frame.join(_int_columns(stats, STATS_COLUMN_MAP))
+    
+    # Vectorized civ -> player number mapping (alphabetical within each turn)
+    turn_civs = frame[['game_turn', 'player_key']].drop_duplicates().sort_values(['game_turn', 'player_key'])
+    turn_civs['player_number'] = turn_civs.groupby('game_turn').cumcount().astype('int64')
+    frame = frame.merge(turn_civs, on=['game_turn', 'player_key'], how='left')
+    
+    # Player_Stats_2: first record per (turn, player)
+    stats2 = dataframes['stats2']
+    stats2 = stats2[stats2['player_name'].isin(major_civilizations)]
+    stats2 = stats2.drop_duplicates(subset=['game_turn', 'player_name'], keep='first')
+    stats2_frame = _int_columns(stats2, STATS2_COLUMN_MAP)
+    stats2_frame['game_turn'] = pd.to_numeric(stats2['game_turn']).astype('int64')
+    stats2_frame['player_key'] = stats2['player_name'].astype(str)
+    frame = frame.merge(stats2_frame, on=['game_turn', 'player_key'], how='left')
+    
+    # Game_PlayerScores: first record per (turn, player number)
+    scores = dataframes['scores'].drop_duplicates(subset=['game_turn', 'player_id'], keep='first')
+    scores_frame = _int_columns(scores, SCORES_COLUMN_MAP)
+    scores_frame['game_turn'] = pd.to_numeric(scores['game_turn']).astype('int64')
+    scores_frame['player_number'] = pd.to_numeric(scores['player_id'], errors='coerce')
+    scores_frame = scores_frame.dropna(subset=['player_number'])
+    scores_frame['player_number'] = scores_frame['player_number'].astype('int64')
+    frame = frame.merge(scores_frame, on=['game_turn', 'player_number'], how='left')
+    
+    # Civs without a Player_Stats_2 or score record get 0, like the per-row path
+    joined_columns = list(STATS2_COLUMN_MAP.values()) + list(SCORES_COLUMN_MAP.values())
+    frame[joined_columns] = frame[joined_columns].fillna(0).astype('int64')
+    
+    frame['civilization'] = frame['player_key']
+    frame = frame.sort_values('game_turn', kind='stable')
+    
+    return frame[CIV_GAME_DATA_COLUMNS].reset_index(drop=True)
+
+def frame_to_rows(frame):
+    """Convert a civ_game_data frame into lists of Python-native values"""
+    return frame[CIV_GAME_DATA_COLUMNS].astype(object).values.tolist()
+
+def build_turn_rows(current_turn, dataframes, major_civilizations=MAJOR_CIVILIZATIONS, verbose=True):
+    """Build the civ_game_data rows for one turn from the three log DataFrames
+    
+    Per-turn reference implementation; the loader uses build_civ_game_frame.
+    Kept for the ingestion benchmark and equivalence tests.
+    """
+    stats_df = dataframes['stats']
+    
+    # Filter data for this specific turn and major civs only
+    turn_stats = stats_df[stats_df['game_turn'] == current_turn]
+    turn_stats2 = dataframes['stats2'][dataframes['stats2']['game_turn'] == current_turn]
+    turn_scores = dataframes['scores'][dataframes['scores']['game_turn'] == current_turn]
+    
+    # Filter for major civilizations only
+    major_civs_stats = turn_stats[turn_stats['player_name'].isin(major_civilizations)]
+    major_civs_stats2 = turn_stats2[turn_stats2['player_name'].isin(major_civilizations)]
+    
+    # For scores, we need to map civilization names to player numbers
+    # Create a mapping based on the civilizations ACTUALLY IN THIS TURN, not all major civs
+    current_turn_civs = sorted(major_civs_stats['player_name'].unique())
+    civ_to_player = {}
+    for i, civ in enumerate(current_turn_civs):
+        civ_to_player[civ] = i
+    
+    if verbose:
+        print(f"  🎯 Turn {current_turn} civ-to-player mapping:")
+        for civ, player_num in civ_to_player.items():
+            print(f"    {civ} → Player {player_num}")
+    
+    # Filter scores using the actual number of players in this turn
+    max_players = len(current_turn_civs)
+    major_civs_scores = turn_scores[turn_scores['player_id'].isin(range(max_players))]
+    
+    if verbose:
+        print(f"  Stats: {len(major_civs_stats)} records")
+        print(f"  Stats2: {len(major_civs_stats2)} records") 
+        print(f"  Scores: {len(major_civs_scores)} records")
+    
+    rows = []
+    for _, stats_row in major_civs_stats.iterrows():
+        civilization_name = stats_row['player_name']
+        player_num = civ_to_player.get(stats_row['player_name'], 999)  # Get mapped player number
+        
+        # Find corresponding records in other files
+        stats2_row = major_civs_stats2[major_civs_stats2['player_name'] == stats_row['player_name']]
+        scores_row = major_civs_scores[major_civs_scores['player_id'] == player_num]
+        
+        # Extract data by column name
+        # Convert all values to Python native types
+        data = [
+            safe_int(current_turn),
+            str(civilization_name),
+            safe_int(player_num),
+            safe_int(stats_row.get('num_cities', 0)),
+            safe_int(stats_row.get('population', 0)),
+            safe_int(stats_row.get('techs', 0)),
+            safe_int(stats_row.get('civics', 0)),
+            safe_int(stats_row.get('land_units', 0)),
+            safe_int(stats_row.get('corps', 0)),
+            safe_int(stats_row.get('armies', 0)),
+            safe_int(stats_row.get('naval_units', 0)),
+            safe_int(stats_row.get('tiles_owned', 0)),
+            safe_int(stats_row.get('tiles_improved', 0)),
+            safe_int(stats_row.get('balance_gold', 0)),
+            safe_int(stats_row.get('balance_faith', 0)),
+            safe_int(stats_row.get('yield_science', 0)),
+            safe_int(stats_row.get('yield_culture', 0)),
+            safe_int(stats_row.get('yield_gold', 0)),
+            safe_int(stats_row.get('yield_faith', 0)),
+            safe_int(stats_row.get('yield_production', 0)),
+            safe_int(stats_row.get('yield_food', 0)),
+            safe_int(stats2_row.iloc[0].get('buildings', 0)) if len(stats2_row) > 0 else 0,
+            safe_int(stats2_row.iloc[0].get('districts', 0)) if len(stats2_row) > 0 else 0,
+            safe_int(stats2_row.iloc[0].get('outgoing_trade_routes', 0)) if len(stats2_row) > 0 else 0,
+            safe_int(stats2_row.iloc[0].get('tourism', 0)) if len(stats2_row) > 0 else 0,
+            safe_int(stats2_row.iloc[0].get('diplo_victory_points', 0)) if len(stats2_row) > 0 else 0,
+            safe_int(stats2_row.iloc[0].get('balance_favor', 0)) if len(stats2_row) > 0 else 0,
+            safe_int(stats2_row.iloc[0].get('lifetime_favor', 0)) if len(stats2_row) > 0 else 0,
+            safe_int(stats2_row.iloc[0].get('co2_per_turn', 0)) if len(stats2_row) > 0 else 0,
+            safe_int(scores_row.iloc[0].get('total_score', 0)) if len(scores_row) > 0 else 0
+        ]
+        rows.append(data)
+        
+        if verbose:
+            print(f"    ✅ {civilization_name}: Science={data[15]}, Culture={data[16]}, Score={data[29]}")
+    
+    return rows
+
+def build_copy_buffer(rows, columns=CIV_GAME_DATA_COLUMNS):
+    """Serialize civ_game_data rows (frame or list of rows) into one tab-separated buffer for COPY"""
+    if isinstance(rows, pd.DataFrame):
+        frame = rows[columns]
+    else:
+        frame = pd.DataFrame(rows, columns=columns)
+    buffer = io.StringIO()
+    frame.to_csv(buffer, sep='\t', header=False, index=False)
+    buffer.seek(0)
+    return buffer
+
+def copy_civ_rows(cursor, rows, table='civ_game_data', columns=CIV_GAME_DATA_COLUMNS):
+    """Stream civ_game_data rows into the database with a single COPY FROM STDIN"""
+    if len(rows) == 0:
+        return 0
+    
+    buffer = build_copy_buffer(rows, columns)
+    copy_sql = (
+        f"COPY {table} ({', '.join(columns)}) "
+        "FROM STDIN WITH (FORMAT csv, DELIMITER E'\\t')"
+    )
+    cursor.copy_expert(copy_sql, buffer)
+    return len(rows)
+
+def dedupe_natural_key(frame):
+    """Keep the last row per (game_id, game_turn, civilization) - ON CONFLICT can't touch a row twice"""
+    return frame.drop_duplicates(subset=NATURAL_KEY, keep='last')
+
+def upsert_civ_rows(cursor, frame, table='civ_game_data'):
+    """COPY a batch into a staging table and merge it with one INSERT ... ON CONFLICT"""
+    if len(frame) == 0:
+        return 0
+    
+    frame = dedupe_natural_key(frame)
+    cursor.execute("DROP TABLE IF EXISTS civ_game_data_staging")
+    cursor.execute(
+        f"CREATE TEMP TABLE civ_game_data_staging ON COMMIT DROP AS "
+        f"SELECT {', '.join(UPSERT_COLUMNS)} FROM {table} WITH NO DATA"
+    )
+    copy_civ_rows(cursor, frame, table='civ_game_data_staging', columns=UPSERT_COLUMNS)
+    cursor.execute(upsert_from_staging_sql(table))
+    return len(frame)
+
+# Recompute the per-turn ranks of the (game, turn) partitions a load touched
+REFRESH_RANKINGS_SQL = """
+INSERT INTO civ_turn_rankings (
+    game_id, game_turn, civilization,
+    science_rank, cities_rank, score_rank, population_rank
+)
+SELECT
+    game_id, game_turn, civilization,
+    RANK() OVER (PARTITION BY game_id, game_turn ORDER BY yields_science DESC),
+    RANK() OVER (PARTITION BY game_id, game_turn ORDER BY num_cities DESC),
+    RANK() OVER (PARTITION BY game_id, game_turn ORDER BY total_score DESC),
+    RANK() OVER (PARTITION BY game_id, game_turn ORDER BY population DESC)
+FROM civ_game_data
+WHERE game_id = %s AND game_turn = ANY(%s)
+ON CONFLICT (game_id, game_turn, civilization) DO UPDATE SET
+    science_rank = EXCLUDED.science_rank,
+    cities_rank = EXCLUDED.cities_rank,
+    score_rank = EXCLUDED.score_rank,
+    population_rank = EXCLUDED.population_rank
+"""
+
+def refresh_turn_rankings(cursor, game_id, turns):
+    """Rank every civilization within the given turns of one game"""
+    cursor.execute(REFRESH_RANKINGS_SQL, (game_id, [int(turn) for turn in turns]))
+    return cursor.rowcount
+
+# Channel prediction_server.py listens on to drop cached predictions
+TURNS_LOADED_CHANNEL = 'civ_turns_loaded'
+
+def notify_turns_loaded(cursor, game_id, turns):
+    """Announce the game and turns just written (Postgres delivers it on commit)"""
+    payload = json.dumps({'game_id': game_id, 'turns': [int(turn) for turn in turns]})
+    cursor.execute("SELECT pg_notify(%s, %s)", (TURNS_LOADED_CHANNEL, payload))
+
+def assign_legacy_sessions(batches):
+    """Group legacy load batches into games with the same rules as resolve_game_id
+    
+    batches are (created_at, civilizations, first_turn) tuples in load order; each
+    load used to insert only the turns it hadn't seen, so a batch continues the
+    previous game unless its civs changed or its turns start over.
+    Returns {created_at: game_id}, ids named after each game's first load.
+    """
+    assignments = {}
+    game_id, game_civs, game_first_turn = None, set(), None
+    for created_at, civilizations, first_turn in batches:
+        civilizations = set(civilizations)
+        if game_id is None or not civilizations & game_civs or first_turn <= game_first_turn:
+            game_id = f"{created_at.date()}_{created_at.time()}"
+            game_civs, game_first_turn = set(), first_turn
+        game_civs |= civilizations
+        assignments[created_at] = game_id
+    return assignments
+
+def backfill_game_ids(cursor):
+    """Give rows loaded before game_id existed the id of the game they belong to"""
+    cursor.execute("""
+        SELECT created_at, ARRAY_AGG(DISTINCT civilization), MIN(game_turn)
+        FROM civ_game_data
+        WHERE game_id IS NULL
+        GROUP BY created_at
+        ORDER BY created_at
+    """)
+    assignments = assign_legacy_sessions(cursor.fetchall())
+    cursor.executemany(
+        "UPDATE civ_game_data SET game_id = %s WHERE created_at = %s AND game_id IS NULL",
+        [(game_id, created_at) for created_at, game_id in assignments.items()]
+    )
+    print(f"   🎮 Backfilled {len(assignments)} load batches into {len(set(assignments.values()))} games")
+    return assignments
+
+def ensure_natural_key(cursor):
+    """Add game_id and the (game_id, game_turn, civilization) unique key if the table predates them"""
+    cursor.execute("SELECT to_regclass('civ_game_data_natural_key') IS NOT NULL")
+    if cursor.fetchone()[0]:
+        return False
+    
+    print("🔧 Adding game_id and unique (game_id, game_turn, civilization) key to civ_game_data...")
+    cursor.execute(ADD_GAME_ID_SQL)
+    backfill_game_ids(cursor)
+    cursor.execute(NATURAL_KEY_DDL)
+    return True
+
+def prepare_schema(conn):
+    """Bring civ_game_data up to date: natural key first, then the versioned migrations"""
+    with conn.cursor() as cursor:
+        ensure_natural_key(cursor)
+    conn.commit()
+    apply_migrations(conn)
+
+# Reload reasons that mean the game started writing its logs from scratch
+LOG_RESTART_REASONS = {'file rotated', 'file truncated', 'header changed', 'file rewritten'}
+
+def new_game_id():
+    """Id for a newly detected game (same shape as the created_at ids of older rows)"""
+    return datetime.now().strftime('%Y-%m-%d_%H:%M:%S.%f')
+
+def resolve_game_id(cursor, current_major_civs, first_turn=None, logs_restarted=False):
+    """Decide which game the incoming turns belong to
+    
+    The latest game is continued unless the logs show a session boundary:
+    - civ-set change: none of its civilizations are among the current majors
+    - turn reset: the logs were rewritten from scratch and start at or before
+      the latest game's first turn (a reloaded save resumes mid-game instead)
+    
+    Returns (game_id, latest_game_civs) - latest_game_civs is empty when a new game starts.
+    """
+    cursor.execute("SELECT game_id FROM civ_game_data ORDER BY created_at DESC LIMIT 1")
+    latest = cursor.fetchone()
+    if latest is None:
+        return new_game_id(), set()
+    
+    cursor.execute(
+        "SELECT civilization, MIN(game_turn) FROM civ_game_data WHERE game_id = %s GROUP BY civilization",
+        (latest[0],)
+    )
+    first_turns = dict(cursor.fetchall())
+    latest_civs = set(first_turns)
+    
+    if not current_major_civs & latest_civs:
+        print(f"🎮 Civilizations changed since game {latest[0]} - new game session")
+        return new_game_id(), set()
+    
+    if logs_restarted and first_turn is not None and first_turn <= min(first_turns.values()):
+        print(f"🎮 Turns restarted at {first_turn} after game {latest[0]} - new game session")
+        return new_game_id(), set()
+    
+    return latest[0], latest_civs
+
+def align_incremental_turns(dataframes, csv_files, reader):
+    """Hold back turns that haven't reached all three logs yet
+    
+    The game writes the three files separately, so a tail read can see turn N
+    in Player_Stats before it shows up in Game_PlayerScores. Rows past the
+    last turn present in every file are left for the next run.
+    """
+    last_turns = []
+    for name, df in dataframes.items():
+        if 'game_turn' in df.columns and len(df) > 0:
+            last_turns.append(int(df['game_turn'].max()))
+        else:
+            last_turns.append(reader.last_turn(csv_files[name]))
+    
+    ready_turn = None if None in last_turns else min(last_turns)
+    
+    for name, df in dataframes.items():
+        if len(df) == 0:
+            continue
+        if ready_turn is None:
+            keep_rows = 0
+        else:
+            # Logs are turn-ordered, so the ready rows are a prefix of the frame
+            keep_rows = int((df['game_turn'] <= ready_turn).cummin().sum())
+        if keep_rows < len(df):
+            print(f"  ⏳ {name}: holding back {len(df) - keep_rows} rows until all logs reach the same turn")
+        reader.hold_back(csv_files[name], keep_rows)
+        dataframes[name] = df.iloc[:keep_rows]
+    
+    return ready_turn
+
+KEY_LOG_FILES = {
+    'stats': "Player_Stats.csv",
+    'stats2': "Player_Stats_2.csv",
+    'scores': "Game_PlayerScores.csv"
+}
+
+# Only the columns civ_game_data is built from are parsed (the rest of each log is skipped)
+KEY_LOG_COLUMNS = {
+    'stats': ['game_turn', 'player_name'] + list(STATS_COLUMN_MAP),
+    'stats2': ['game_turn', 'player_name'] + list(STATS2_COLUMN_MAP),
+    'scores': ['game_turn', 'player_id'] + list(SCORES_COLUMN_MAP)
+}
+
+def find_logs_dir():
+    """Locate the Civ VI logs directory; returns (logs_dir, running_in_docker)"""
     # Check if running in Docker container first
     docker_logs_dir = Path("/civ6-logs")
     if docker_logs_dir.exists():
-        logs_dir = docker_logs_dir
         print(f"📦 Running in Docker - using mounted logs directory")
+        return docker_logs_dir, True
+    
+    # Running locally - use Windows path
+    print(f"💻 Running locally - using Windows logs directory")
+    return Path(os.path.expandvars(r"%LOCALAPPDATA%\Firaxis Games\Sid Meier's Civilization VI\Logs")), False
+
+def get_db_config(in_docker):
+    """Database connection settings for the current environment"""
+    # Use Docker service name if running in container, localhost if running locally
+    return {
+        'host': 'postgres' if in_docker else 'localhost',
+        'port': 5432,
+        'database': 'civ6_analytics',
+        'user': 'civ6_user',
+        'password': 'civ6_password'
+    }
+
+def open_log_reader(cursor, checkpoint_path=None, full_reload=False):
+    """Create the tail reader, discarding checkpoints that can't be trusted"""
+    checkpoint_path = checkpoint_path or os.environ.get('CIV6_CHECKPOINT_PATH', 'civ6_log_checkpoints.json')
+    reader = IncrementalLogReader(checkpoint_path)
+    
+    # Checkpoints are meaningless if the table was emptied since the last run
+    cursor.execute("SELECT EXISTS (SELECT 1 FROM civ_game_data)")
+    if full_reload or not cursor.fetchone()[0]:
+        reader.reset()
+    return reader
+
+def load_new_turns(conn, reader, logs_dir, bulk=True):
+    """Read newly written log lines and store their turns over an open connection
+    
+    Returns (game_id, turns upserted) - (None, []) when there was nothing
+    new - or None when the logs could not be processed.
+    """
+    cursor = conn.cursor()
+    
+    # Load CSV files (only the lines appended since the last run)
+    print("📊 Loading CSV files...")
+    
+    csv_files = {name: logs_dir / filename for name, filename in KEY_LOG_FILES.items()}
+    
+    dataframes = {}
+    for name, file_path in csv_files.items():
+        if file_path.exists():
+            df = reader.read(file_path, columns=KEY_LOG_COLUMNS[name])
+            dataframes[name] = df
+            if reader.was_full_reload(file_path):
+                print(f"  ✅ {name}: {df.shape[0]} rows, {df.shape[1]} columns "
+                      f"(full read: {reader.reload_reason(file_path)})")
+            else:
+                print(f"  ✅ {name}: {df.shape[0]} new rows since last run")
+        else:
+            print(f"  ❌ {name}: File not found")
+            return None
+    
+    align_incremental_turns(dataframes, csv_files, reader)
+    
+    if len(dataframes['stats']) == 0:
+        print("✅ No new turn data in the logs since the last run")
+        reader.commit()
+        return None, []
+    
+    major_civilizations = MAJOR_CIVILIZATIONS
+    
+    # Find the latest complete turn (same logic as stage4d/4e)
+    stats_df = dataframes['stats']
+    
+    # Find ALL turns with data (any number of major civilizations)
+    print("🔍 Finding all turns with civilization data...")
+    
+    # Count civs per turn in one pass instead of filtering each turn
+    major_rows = stats_df[stats_df['player_name'].isin(major_civilizations)]
+    total_civs_per_turn = stats_df.groupby('game_turn')['player_name'].nunique()
+    major_civs_per_turn = major_rows.groupby('game_turn')['player_name'].nunique()
+    major_civs_per_turn = major_civs_per_turn.reindex(total_civs_per_turn.index, fill_value=0)
+    
+    for turn, total_count in total_civs_per_turn.items():
+        print(f"  Turn {turn}: {major_civs_per_turn[turn]} major civilizations, {total_count} total")
+    
+    # Accept turns with ANY number of major civs (flexible for different games)
+    complete_turns = sorted(major_civs_per_turn[major_civs_per_turn >= 1].index.tolist())
+    
+    if not complete_turns:
+        print("❌ No turn data found with major civilizations")
+        return None
+    
+    print(f"✅ Found {len(complete_turns)} complete turns: {complete_turns}")
+    # Process and merge data for ALL complete turns
+    print("🔄 Processing and merging data for all complete turns...")
+    
+    # Work out which game these turns belong to
+    complete_turn_rows = stats_df[stats_df['game_turn'].isin(complete_turns)]
+    current_civs = set(complete_turn_rows['player_name'].unique())
+    current_major_civs = current_civs.intersection(major_civilizations)
+    
+    print(f"   🆕 Current log civilizations (all): {sorted(current_civs)}")
+    print(f"   🎯 Current major civilizations: {sorted(current_major_civs)}")
+    
+    logs_restarted = reader.reload_reason(csv_files['stats']) in LOG_RESTART_REASONS
+    game_id, latest_game_civs = resolve_game_id(cursor, current_major_civs,
+                                                first_turn=complete_turns[0],
+                                                logs_restarted=logs_restarted)
+    if latest_game_civs:
+        print(f"🔄 Detected SAME GAME SESSION (continuing game {game_id})")
+    else:
+        print(f"🎮 New game session {game_id} - earlier games are preserved")
+        ensure_game_partition(cursor, game_id)
+    
+    turns_to_process = complete_turns
+    print(f"🎯 Will upsert {len(turns_to_process)} turns: {turns_to_process}")
+    
+    # Join all three logs for every new turn in one pass
+    civ_frame = build_civ_game_frame(dataframes, turns_to_process, major_civilizations)
+    civ_frame.insert(0, 'game_id', game_id)
+    
+    for current_turn, turn_count in civ_frame.groupby('game_turn').size().items():
+        print(f"  ✅ Turn {current_turn}: Prepared {turn_count} civilizations")
+    
+    # Re-read turns overwrite their earlier rows instead of duplicating them
+    if bulk:
+        print(f"\n🚚 Upserting {len(civ_frame)} rows (COPY FROM STDIN + INSERT ... ON CONFLICT)...")
+        total_upserted = upsert_civ_rows(cursor, civ_frame)
     else:
-        # Running locally - use Windows path
-        logs_dir = Path(os.path.expandvars(r"%LOCALAPPDATA%\Firaxis Games\Sid Meier's Civilization VI\Logs"))
-        print(f"💻 Running locally - using Windows logs directory")
+        row_sql = upsert_sql()
+        civ_frame = dedupe_natural_key(civ_frame)
+        for data in civ_frame[UPSERT_COLUMNS].astype(object).values.tolist():
+            cursor.execute(row_sql, data)
+        total_upserted = len(civ_frame)
+    
+    ranked = refresh_turn_rankings(cursor, game_id, turns_to_process)
+    print(f"🏅 Refreshed {ranked} rankings in civ_turn_rankings")
+    notify_turns_loaded(cursor, game_id, turns_to_process)
+    
+    # Commit the transaction, then remember how far into each log we got
+    conn.commit()
+    reader.commit()
+    
+    print(f"✅ Upserted: {total_upserted} civilizations across {len(turns_to_process)} turns")
+    return game_id, turns_to_process
+
+def insert_civ_data(bulk=True, full_reload=False, checkpoint_path=None):
+    """Insert real Civ VI data from CSV files into database
+    
+    Rows are keyed on (game_id, game_turn, civilization), so re-read turns
+    update their existing rows. With bulk=True (default) each batch is one
+    COPY FROM STDIN plus one INSERT ... ON CONFLICT; bulk=False upserts one
+    civilization at a time.
+    Log files are tail-read from the byte offsets saved by the previous run;
+    full_reload=True ignores those checkpoints and re-reads every file.
+    """
+    
+    print("💾 STAGE 4H: Inserting Real Civ VI Data")
+    print("=" * 50)
+    
+    # Find the Civ VI logs directory
+    logs_dir, in_docker = find_logs_dir()
     
     if not logs_dir.exists():
         print(f"❌ Logs directory not found: {logs_dir}")
@@ -34,316 +685,40 @@ def insert_civ_data():
     
     print(f"📂 Reading data from: {logs_dir}")
     
-    # Database connection settings
-    # Use Docker service name if running in container, localhost if running locally
-    db_host = 'postgres' if docker_logs_dir.exists() else 'localhost'
-    db_config = {
-        'host': db_host,
-        'port': 5432,
-        'database': 'civ6_analytics',
-        'user': 'civ6_user',
-        'password': 'civ6_password'
-    }
+    db_config = get_db_config(in_docker)
     
     try:
-        # Load CSV files
-        print("📊 Loading CSV files...")
-        
-        csv_files = {
-            'stats': logs_dir / "Player_Stats.csv",
-            'stats2': logs_dir / "Player_Stats_2.csv", 
-            'scores': logs_dir / "Game_PlayerScores.csv"
-        }
-        
-        dataframes = {}
-        for name, file_path in csv_files.items():
-            if file_path.exists():
-                df = pd.read_csv(file_path)
-                dataframes[name] = df
-                print(f"  ✅ {name}: {df.shape[0]} rows, {df.shape[1]} columns")
-            else:
-                print(f"  ❌ {name}: File not found")
-                return False
-        
-        # Define the major civilizations (the main players, not city-states)
-        # This includes civilizations from all game sessions
-        major_civilizations = {
-            # First game
-            " CIVILIZATION_NETHERLANDS", 
-            " CIVILIZATION_ROME", 
-            " CIVILIZATION_CHINA",
-            " CIVILIZATION_ENGLAND",
-            " CIVILIZATION_CANADA",
-            " CIVILIZATION_INDONESIA",
-            " CIVILIZATION_ETHIOPIA",
-            " CIVILIZATION_CREE",        # Appears in multiple games
-            " CIVILIZATION_OTTOMAN",
-            # Second game
-            " CIVILIZATION_GAUL",        
-            " CIVILIZATION_MALI",        
-            " CIVILIZATION_GRAN_COLOMBIA",
-            " CIVILIZATION_JAPAN",       
-            " CIVILIZATION_MAORI",       # Appears in multiple games
-            " CIVILIZATION_MAYA",
-            # Third game
-            " CIVILIZATION_AUSTRALIA",
-            " CIVILIZATION_BABYLON",
-            " CIVILIZATION_MACEDON",
-            " CIVILIZATION_POLAND",
-            " CIVILIZATION_SCYTHIA",
-            # Fourth game (current)
-            " CIVILIZATION_SUMERIA",
-            " CIVILIZATION_FRANCE"
-        }
-        
-        # Find the latest complete turn (same logic as stage4d/4e)
-        stats_df = dataframes['stats']
-        
-        # Find ALL turns with data (any number of major civilizations)
-        print("🔍 Finding all turns with civilization data...")
-        
-        complete_turns = []
-        for turn in sorted(stats_df['Game Turn'].unique()):
-            turn_data = stats_df[stats_df['Game Turn'] == turn]
-            turn_civs = set(turn_data[' Player'].unique())
-            major_civ_count = len(turn_civs.intersection(major_civilizations))
-            
-            print(f"  Turn {turn}: {major_civ_count} major civilizations, {len(turn_civs)} total")
-            
-            # Accept turns with ANY number of major civs (flexible for different games)
-            if major_civ_count >= 1:  # At least 1 major civ present
-                complete_turns.append(turn)
-        
-        if not complete_turns:
-            print("❌ No turn data found with major civilizations")
-            return False
-        
-        print(f"✅ Found {len(complete_turns)} complete turns: {complete_turns}")
-        latest_turn = max(complete_turns)
-        
-        # Process and merge data for ALL complete turns
-        print("🔄 Processing and merging data for all complete turns...")
-        
         # Connect to database
         print("📡 Connecting to database...")
         conn = psycopg2.connect(**db_config)
         cursor = conn.cursor()
         
-        # Check what historical data we already have and what civs are in current logs
-        print("📊 Checking existing historical data...")
-        cursor.execute("SELECT DISTINCT game_turn FROM civ_game_data ORDER BY game_turn")
-        existing_turns = [row[0] for row in cursor.fetchall()]
+        prepare_schema(conn)
         
-        cursor.execute("SELECT DISTINCT civilization FROM civ_game_data ORDER BY civilization")
-        existing_civs = set([row[0] for row in cursor.fetchall()])
-        
-        # Get civilizations from current logs
-        current_civs = set()
-        for turn in complete_turns:
-            turn_data = stats_df[stats_df['Game Turn'] == turn]
-            turn_civs = set(turn_data[' Player'].str.strip().unique())
-            # Add ALL civilizations that appear in the logs, not just major ones
-            current_civs.update(turn_civs)
-        
-        # Filter to only major civilizations for comparison
-        current_major_civs = current_civs.intersection(major_civilizations)
-        
-        print(f"   📈 Existing turns in database: {existing_turns}")
-        print(f"   🏛️ Existing civilizations: {sorted(existing_civs)}")
-        print(f"   🆕 Current log civilizations (all): {sorted(current_civs)}")
-        print(f"   🎯 Current major civilizations: {sorted(current_major_civs)}")
-        
-        # Check if this is a different game session
-        is_different_game = len(current_major_civs.intersection(existing_civs)) == 0
-        
-        if is_different_game and existing_civs:
-            print("🎮 Detected DIFFERENT GAME SESSION!")
-            print("   This appears to be a new game with different civilizations.")
-            print("   Both games will be preserved in the database.")
-        elif existing_civs:
-            print("🔄 Detected SAME GAME SESSION (continuing previous game)")
-        else:
-            print("🆕 First game session in database")
-        
-        # Determine which turns to process
-        turns_to_process = []
-        
-        if is_different_game:
-            # Different game - we can insert all turns regardless of existing turn numbers
-            turns_to_process = complete_turns
-            print("🎯 Different game detected - will insert all available turns")
-            
-            # However, we need to handle civilization overlaps (like GAUL appearing in both games)
-            print("⚠️  Checking for civilization overlaps between games...")
-            overlapping_civs = current_civs.intersection(existing_civs)
-            if overlapping_civs:
-                print(f"🔄 Found overlapping civilizations: {sorted(overlapping_civs)}")
-                print("   Will delete conflicting old data and insert fresh data")
-                
-                # Delete old data for overlapping civilizations in conflicting turns
-                for civ in overlapping_civs:
-                    for turn in turns_to_process:
-                        if turn in existing_turns:
-                            cursor.execute(
-                                "DELETE FROM civ_game_data WHERE game_turn = %s AND civilization = %s",
-                                (int(turn), civ)
-                            )
-                            print(f"   🗑️ Removed old data for {civ} turn {turn}")
-                conn.commit()
-            else:
-                print("✅ No civilization overlaps - can insert safely")
-        else:
-            # Same game - only insert new turns
-            for turn in complete_turns:
-                if turn not in existing_turns:
-                    turns_to_process.append(turn)
+        reader = open_log_reader(cursor, checkpoint_path, full_reload)
         
+        loaded = load_new_turns(conn, reader, logs_dir, bulk)
+        if loaded is None:
+            return False
+        game_id, turns_to_process = loaded
         if not turns_to_process:
-            print("✅ All complete turns already in database!")
-            print(f"   Existing: {existing_turns}")
-            print(f"   Available: {complete_turns}")
             return True
         
-        print(f"🎯 Will process {len(turns_to_process)} new turns: {turns_to_process}")
-        
-        # Prepare insert statement
-        insert_sql = """
-        INSERT INTO civ_game_data (
-            game_turn, civilization, player_number,
-            num_cities, population, techs, civics,
-            land_units, corps, armies, naval_units,
-            tiles_owned, tiles_improved,
-            balance_gold, balance_faith,
-            yields_science, yields_culture, yields_gold, yields_faith, yields_production, yields_food,
-            buildings, districts, outgoing_trade_routes, tourism,
-            diplo_victory, balance_favor, lifetime_favor, co2_per_turn,
-            total_score
-        ) VALUES (
-            %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
-            %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
-        )
-        """
-        
-        total_inserted = 0
-        
-        # Process each complete turn
-        for current_turn in turns_to_process:
-            print(f"\n📊 Processing Turn {current_turn}...")
-            
-            # Filter data for this specific turn and major civs only
-            turn_stats = stats_df[stats_df['Game Turn'] == current_turn]
-            turn_stats2 = dataframes['stats2'][dataframes['stats2']['Game Turn'] == current_turn]
-            turn_scores = dataframes['scores'][dataframes['scores']['Game Turn'] == current_turn]
-            turn_scores = dataframes['scores'][dataframes['scores']['Game Turn'] == current_turn]
-            
-            # Filter for major civilizations only
-            major_civs_stats = turn_stats[turn_stats[' Player'].isin(major_civilizations)]
-            major_civs_stats2 = turn_stats2[turn_stats2[' Player'].isin(major_civilizations)]
-            
-            # For scores, we need to map civilization names to player numbers
-            # For scores, we need to map civilization names to player numbers
-            # Create a mapping based on the civilizations ACTUALLY IN THIS TURN, not all major civs
-            current_turn_civs = sorted(major_civs_stats[' Player'].unique())
-            civ_to_player = {}
-            for i, civ in enumerate(current_turn_civs):
-                civ_to_player[civ] = i
-            
-            print(f"  🎯 Turn {current_turn} civ-to-player mapping:")
-            for civ, player_num in civ_to_player.items():
-                print(f"    {civ} → Player {player_num}")
-            
-            # Filter scores using the actual number of players in this turn
-            max_players = len(current_turn_civs)
-            major_civs_scores = turn_scores[turn_scores[' Player'].isin(range(max_players))]
-            
-            # Filter scores using the actual number of players in this turn
-            max_players = len(current_turn_civs)
-            major_civs_scores = turn_scores[turn_scores[' Player'].isin(range(max_players))]
-            
-            print(f"  Stats: {len(major_civs_stats)} records")
-            print(f"  Stats2: {len(major_civs_stats2)} records") 
-            print(f"  Scores: {len(major_civs_scores)} records") 
-            print(f"  Scores: {len(major_civs_scores)} records")
-        
-            # Process each major civilization for this turn
-            turn_inserted = 0
-            for _, stats_row in major_civs_stats.iterrows():
-                civilization_name = stats_row[' Player'].strip()  # Remove leading space
-                player_num = civ_to_player.get(stats_row[' Player'], 999)  # Get mapped player number
-                
-                # Find corresponding records in other files
-                stats2_row = major_civs_stats2[major_civs_stats2[' Player'] == stats_row[' Player']]
-                scores_row = major_civs_scores[major_civs_scores[' Player'] == player_num]
-                
-                # Helper function to safely convert values
-                def safe_int(value, default=0):
-                    try:
-                        if pd.isna(value):
-                            return default
-                        return int(float(value))
-                    except (ValueError, TypeError):
-                        return default
-                
-                # Extract data with proper column names (handling spaces)
-                # Convert all values to Python native types
-                data = [
-                    safe_int(current_turn),
-                    str(civilization_name),
-                    safe_int(player_num),
-                    safe_int(stats_row.get(' Num Cities', 0)),
-                    safe_int(stats_row.get(' Population', 0)),
-                    safe_int(stats_row.get(' Techs', 0)),
-                    safe_int(stats_row.get(' Civics', 0)),
-                    safe_int(stats_row.get(' Land Units', 0)),
-                    safe_int(stats_row.get(' corps', 0)),
-                    safe_int(stats_row.get(' Armies', 0)),
-                    safe_int(stats_row.get(' Naval Units', 0)),
-                    safe_int(stats_row.get(' TILES: Owned', 0)),
-                    safe_int(stats_row.get(' Improved', 0)),
-                    safe_int(stats_row.get(' BALANCE: Gold', 0)),
-                    safe_int(stats_row.get(' Faith', 0)),
-                    safe_int(stats_row.get(' YIELDS: Science', 0)),
-                    safe_int(stats_row.get(' Culture', 0)),
-                    safe_int(stats_row.get(' Gold', 0)),
-                    safe_int(stats_row.get(' Faith.1', 0)),
-                    safe_int(stats_row.get(' Production', 0)),
-                    safe_int(stats_row.get(' Food', 0)),
-                    safe_int(stats2_row.iloc[0].get(' Buildings', 0)) if len(stats2_row) > 0 else 0,
-                    safe_int(stats2_row.iloc[0].get(' Districts', 0)) if len(stats2_row) > 0 else 0,
-                    safe_int(stats2_row.iloc[0].get(' Outgoing Trade Routes', 0)) if len(stats2_row) > 0 else 0,
-                    safe_int(stats2_row.iloc[0].get(' TOURISM', 0)) if len(stats2_row) > 0 else 0,
-                    safe_int(stats2_row.iloc[0].get(' Diplo Victory', 0)) if len(stats2_row) > 0 else 0,
-                    safe_int(stats2_row.iloc[0].get(' BALANCE: Favor', 0)) if len(stats2_row) > 0 else 0,
-                    safe_int(stats2_row.iloc[0].get(' LIFETIME: Favor', 0)) if len(stats2_row) > 0 else 0,
-                    safe_int(stats2_row.iloc[0].get(' CO2 Per Turn', 0)) if len(stats2_row) > 0 else 0,
-                    safe_int(scores_row.iloc[0].get(' Score', 0)) if len(scores_row) > 0 else 0
-                ]
-                
-                cursor.execute(insert_sql, data)
-                turn_inserted += 1
-                total_inserted += 1
-                
-                print(f"    ✅ {civilization_name}: Science={data[15]}, Culture={data[16]}, Score={data[29]}")
-            
-            print(f"  ✅ Turn {current_turn}: Inserted {turn_inserted} civilizations")
-        
-        # Commit the transaction
-        conn.commit()
-        
         print(f"\n🎉 DATA INSERTION COMPLETE!")
         print("=" * 40)
-        print(f"✅ Inserted: {total_inserted} civilizations across {len(turns_to_process)} turns")
-        print(f"✅ Turns processed: {turns_to_process}")
+        print(f"✅ Game {game_id} turns processed: {turns_to_process}")
         print("⚠️  Note: Science/Culture values are rounded integers from CSV")
         
+        latest_turn = max(turns_to_process)
+        
         # Verify the insertion by showing latest turn
         print(f"\n🔍 Verifying latest turn data (Turn {latest_turn})...")
         cursor.execute("""
             SELECT game_turn, civilization, yields_science, yields_culture, total_score 
             FROM civ_game_data 
-            WHERE game_turn = %s 
+            WHERE game_id = %s AND game_turn = %s 
             ORDER BY total_score DESC
-        """, (int(latest_turn),))
+        """, (game_id, int(latest_turn)))
         
         results = cursor.fetchall()
         print(f"📊 Database contains {len(results)} records for turn {latest_turn}:")
@@ -353,16 +728,17 @@ def insert_civ_data():
             print(f"  {civ_short}: Science={science}, Culture={culture}, Score={score}")
         
         # Show total historical data
-        print("\n📈 Complete historical data summary:")
+        print(f"\n📈 Complete historical data summary (game {game_id}):")
         cursor.execute("""
             SELECT game_turn, COUNT(*) as civ_count
             FROM civ_game_data 
+            WHERE game_id = %s
             GROUP BY game_turn 
             ORDER BY game_turn
-        """)
+        """, (game_id,))
         
         historical_data = cursor.fetchall()
-        print(f"   Total turns in database: {len(historical_data)}")
+        print(f"   Total turns in database for this game: {len(historical_data)}")
         for turn, count in historical_data:
             print(f"   Turn {turn}: {count} civilizations")
         
@@ -386,6 +762,22 @@ def insert_civ_data():
     return True
 
 if __name__ == "__main__":
-    success = insert_civ_data()
+    parser = argparse.ArgumentParser(description="Load Civ VI log CSVs into civ_game_data")
+    parser.add_argument('--row-by-row', action='store_true',
+                        help="Upsert one civilization at a time instead of a bulk COPY")
+    parser.add_argument('--full-reload', action='store_true',
+                        help="Ignore saved log checkpoints and re-read every CSV from the start")
+    parser.add_argument('--watch', action='store_true',
+                        help="Keep running and load new turns as soon as the game writes them")
+    parser.add_argument('--poll', action='store_true',
+                        help="With --watch, poll the Logs directory instead of using filesystem events")
+    args = parser.parse_args()
+    
+    if args.watch:
+        from civ_log_watcher import watch_logs
+        success = watch_logs(bulk=not args.row_by_row, full_reload=args.full_reload,
+                             poll=True if args.poll else None)
+    else:
+        success = insert_civ_data(bulk=not args.row_by_row, full_reload=args.full_reload)
     if not success:
         sys.exit(1)
@@ -83,6 +83,9 @@ def register_custom_views(app):
                             COUNT(DISTINCT civilization) as civilizations,
                             COUNT(*) as total_records
                         FROM civ_game_data
+                        WHERE game_id = (
+                            SELECT game_id FROM civ_game_data ORDER BY created_at DESC LIMIT 1
+                        )
                     """)
                     
                     with engine.connect() as conn:
@@ -126,6 +129,9 @@ def register_custom_views(app):
                         COUNT(DISTINCT civilization) as civilizations,
                         COUNT(*) as total_records
                     FROM civ_game_data
+                    WHERE game_id = (
+                        SELECT game_id FROM civ_game_data ORDER BY created_at DESC LIMIT 1
+                    )
                 """)
                 
                 rankings_query = text("""
@@ -135,7 +141,14 @@ def register_custom_views(app):
                         yields_science,
                         yields_culture
                     FROM civ_game_data 
-                    WHERE game_turn = (SELECT MAX(game_turn) FROM civ_game_data)
+                    WHERE (game_id, game_turn) = (
+                        SELECT game_id, MAX(game_turn)
+                        FROM civ_game_data
+                        WHERE game_id = (
+                            SELECT game_id FROM civ_game_data ORDER BY created_at DESC LIMIT 1
+                        )
+                        GROUP BY game_id
+                    )
                     ORDER BY total_score DESC
                 """)
                 
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Test the backtesting harness: per-turn metrics match sklearn's, the current
+game is skipped, and the process pool gives the same results as one process
+"""
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import brier_score_loss, log_loss
+
+from backtest import BACKTEST_COLUMNS, Backtester, split_games, turn_curves, turn_metrics
+from feature_store import FeatureStore
+from ml_data_preparation import TRAINING_DATASET
+from model_registry import ModelRegistry
+from predict_winner import LiveVictoryPredictor
+
+FEATURE_COLUMNS = LiveVictoryPredictor().feature_columns
+CIVS = ['CIVILIZATION_ROME', 'CIVILIZATION_MALI', 'CIVILIZATION_MAYA', 'CIVILIZATION_KOREA']
+
+def make_archive(n_games=5, turns=range(10, 30)):
+    """training_features-shaped rows; the last game is the one being played"""
+    rng = np.random.default_rng(3)
+    frames = []
+    for g in range(n_games):
+        winner = CIVS[g % len(CIVS)]
+        for turn in turns:
+            frame = pd.DataFrame({col: rng.integers(0, 50, len(CIVS)) for col in FEATURE_COLUMNS})
+            frame['game_turn'] = turn
+            frame['civilization'] = CIVS
+            frame['game_id'] = f"2025-08-0{g + 1}_20:00:00"
+            frame['final_turn'] = turns[-1]
+            frame['will_win'] = (frame['civilization'] == winner).astype(int)
+            frame['game_session'] = 'Current_Game' if g == n_games - 1 else 'Previous_Game'
+            frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
+
+def make_environment(tmp_path):
+    """Feature store with the archive and a registry with one model trained on two games"""
+    archive = make_archive()
+    FeatureStore(tmp_path / 'store').write(TRAINING_DATASET, archive)
+
+    train_games = sorted(archive['game_id'].unique())[:2]
+    train = archive[archive['game_id'].isin(train_games)]
+    model = RandomForestClassifier(n_estimators=15, random_state=0).fit(train[FEATURE_COLUMNS], train['will_win'])
+    ModelRegistry(tmp_path / 'models').save(model, FEATURE_COLUMNS, lineage={'games_seen': train_games})
+    return archive, model
+
+def test_turn_metrics_match_sklearn():
+    """Brier score, log-loss and the predicted winner per turn"""
+    scored = pd.DataFrame({
+        'game_id': ['g1'] * 6,
+        'game_turn': [10, 10, 10, 11, 11, 11],
+        'civilization': ['ROME', 'MALI', 'MAYA'] * 2,
+        'final_turn': 11,
+        'will_win': [0, 1, 0, 0, 1, 0],
+        'win_probability': [0.6, 0.3, 0.1, 0.2, 0.7, 0.0],
+    })
+
+    results = turn_metrics(scored)
+
+    assert results['game_turn'].tolist() == [10, 11]
+    assert results['predicted_winner'].tolist() == ['ROME', 'MALI']
+    assert results['winner_correct'].tolist() == [False, True]
+    assert results['civilizations'].tolist() == [3, 3]
+    for turn, row in results.set_index('game_turn').iterrows():
+        rows = scored[scored['game_turn'] == turn]
+        assert np.isclose(row['brier'], brier_score_loss(rows['will_win'], rows['win_probability']))
+        assert np.isclose(row['log_loss'], log_loss(rows['will_win'], rows['win_probability'], labels=[0, 1]))
+    assert results['accuracy'].tolist() == [1 / 3, 1.0]
+
+def test_backtest_replays_finished_games(tmp_path):
+    """Every turn of every finished game, scored with the registry model"""
+    archive, model = make_environment(tmp_path)
+
+    backtester = Backtester(n_jobs=1, registry_root=tmp_path / 'models', store_root=tmp_path / 'store')
+    results = backtester.run()
+
+    finished = archive[archive['game_session'] == 'Previous_Game']
+    assert list(results.columns) == BACKTEST_COLUMNS
+    assert len(results) == finished.groupby(['game_id', 'game_turn']).ngroups
+    assert results['model_version'].unique().tolist() == ['v0001']
+    assert results.groupby('game_id')['in_training'].first().tolist() == [True, True, False, False]
+
+    # Spot-check one turn against sklearn on the raw rows
+    turn_rows = finished[(finished['game_id'] == finished['game_id'].iloc[-1]) & (finished['game_turn'] == 20)]
+    probabilities = model.predict_proba(turn_rows[FEATURE_COLUMNS])[:, 1]
+    row = results[(results['game_id'] == turn_rows['game_id'].iloc[0]) & (results['game_turn'] == 20)].iloc[0]
+    assert np.isclose(row['brier'], brier_score_loss(turn_rows['will_win'], probabilities))
+    assert row['predicted_winner'] == turn_rows['civilization'].iloc[int(np.argmax(probabilities))]
+
+    curves = turn_curves(results)
+    assert curves['game_turn'].tolist() == list(range(10, 30))
+    assert curves['games'].unique().tolist() == [4]
+
+def test_pool_matches_single_process(tmp_path):
+    """Spreading games over workers doesn't change the results"""
+    make_environment(tmp_path)
+    roots = {'registry_root': tmp_path / 'models', 'store_root': tmp_path / 'store'}
+
+    single = Backtester(n_jobs=1, **roots).run()
+    pooled = Backtester(n_jobs=2, **roots)
+    results = pooled.run()
+
+    assert pooled.n_workers == 2
+    pd.testing.assert_frame_equal(single, results)
+
+def test_split_games_balances_rows():
+    """Largest games are spread first so workers get similar row counts"""
+    chunks = split_games(['a', 'b', 'c', 'd'], {'a': 100, 'b': 60, 'c': 50, 'd': 10}, 2)
+    assert chunks == [['a', 'd'], ['b', 'c']]
+    assert split_games(['a'], {}, 3) == [['a']]
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test per-game-phase calibration: phases are fitted separately, survive a
+round trip through the manifest, and are applied by LiveVictoryPredictor
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from calibration import (PHASE_NAMES, PhaseCalibrator, expected_calibration_error, game_phase,
+                         out_of_fold_probabilities)
+from compiled_forest import CompiledForest
+from predict_winner import LiveVictoryPredictor
+
+def make_miscalibrated(n=6000, seed=0):
+    """Raw probabilities that are too low early and too high late"""
+    rng = np.random.default_rng(seed)
+    turns = rng.integers(10, 100, n)
+    raw = rng.random(n)
+    true_probability = np.where(game_phase(turns) == 0, np.sqrt(raw), raw ** 2)
+    y = (rng.random(n) < true_probability).astype(int)
+    groups = rng.integers(0, 50, n).astype(str)
+    return raw, turns, y, groups
+
+def test_game_phase_buckets():
+    """Turns up to 30 are early, up to 60 mid, the rest late"""
+    assert game_phase([10, 30, 31, 60, 61, 200]).tolist() == [0, 0, 1, 1, 2, 2]
+
+@pytest.mark.parametrize('method', ['isotonic', 'sigmoid'])
+def test_calibration_reduces_error_per_phase(method):
+    """Each phase gets its own mapping and ends up better calibrated"""
+    raw, turns, y, groups = make_miscalibrated()
+    calibrator = PhaseCalibrator(method).fit(raw[:4000], turns[:4000], y[:4000], groups[:4000])
+
+    assert calibrator.calibrated_phases == list(PHASE_NAMES)
+    calibrated = calibrator.transform(raw[4000:], turns[4000:])
+    assert ((calibrated >= 0) & (calibrated <= 1)).all()
+    phases = game_phase(turns[4000:])
+    for phase in range(len(PHASE_NAMES)):
+        mask = phases == phase
+        assert (expected_calibration_error(y[4000:][mask], calibrated[mask])
+                < expected_calibration_error(y[4000:][mask], raw[4000:][mask]))
+
+def test_phases_without_enough_games_pass_through():
+    """A phase seen in too few games keeps the raw probabilities"""
+    raw, turns, y, _ = make_miscalibrated()
+    groups = np.where(game_phase(turns) == 2, 'one_long_game', np.arange(len(turns)).astype(str))
+
+    calibrator = PhaseCalibrator().fit(raw, turns, y, groups)
+
+    assert calibrator.calibrated_phases == ['early', 'mid']
+    late = game_phase(turns) == 2
+    assert np.array_equal(calibrator.transform(raw, turns)[late], raw[late])
+
+def test_manifest_round_trip():
+    """to_dict output survives JSON and gives identical probabilities"""
+    raw, turns, y, groups = make_miscalibrated()
+    for method in ('isotonic', 'sigmoid'):
+        calibrator = PhaseCalibrator(method).fit(raw, turns, y, groups)
+        restored = PhaseCalibrator.from_dict(json.loads(json.dumps(calibrator.to_dict())))
+        assert np.array_equal(restored.transform(raw, turns), calibrator.transform(raw, turns))
+
+    assert PhaseCalibrator.from_dict(None) is None
+    with pytest.raises(ValueError):
+        PhaseCalibrator.from_dict(dict(calibrator.to_dict(), phase_bounds=[20, 50]))
+
+def test_out_of_fold_probabilities_hold_out_whole_games():
+    """A row's probability comes from a forest that never saw its game"""
+    rng = np.random.default_rng(1)
+    groups = np.repeat(['a', 'b', 'c', 'd'], 25)
+    X = rng.normal(size=(100, 3))
+    y = (X[:, 0] > 0).astype(int)
+
+    probabilities = out_of_fold_probabilities({'n_estimators': 10}, X, y, groups, n_splits=4)
+
+    held_out = groups != 'a'
+    model = RandomForestClassifier(n_estimators=10, random_state=42).fit(X[held_out], y[held_out])
+    assert np.allclose(probabilities[~held_out], model.predict_proba(X[~held_out])[:, 1])
+
+def test_predictor_applies_calibration():
+    """Both engines return the same calibrated probabilities, using each row's turn"""
+    predictor = LiveVictoryPredictor(engine='sklearn')
+    rng = np.random.default_rng(2)
+    X = pd.DataFrame(rng.integers(0, 50, (200, len(predictor.feature_columns))), columns=predictor.feature_columns)
+    X['game_turn'] = rng.integers(10, 100, len(X))
+    y = (X['current_score'] > 25).astype(int)
+    predictor.model = RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y)
+    raw = predictor.predict_proba(X)[:, 1]
+
+    raw_all, turns, y_all, groups = make_miscalibrated()
+    predictor.calibrator = PhaseCalibrator().fit(raw_all, turns, y_all, groups)
+    calibrated = predictor.predict_proba(X)
+
+    assert np.allclose(calibrated[:, 1], predictor.calibrator.transform(raw, X['game_turn']))
+    assert np.allclose(calibrated.sum(axis=1), 1.0)
+
+    predictor.compiled_model = CompiledForest.from_estimator(predictor.model)
+    assert np.array_equal(predictor.predict_proba(X), calibrated)
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Test write debouncing in the live log watcher
+"""
+
+import time
+
+import civ_log_watcher
+from civ_log_watcher import CivLogWatcher
+
+class FakeConnection:
+    closed = False
+
+    def rollback(self):
+        pass
+
+def test_burst_of_writes_becomes_one_load(tmp_path, monkeypatch):
+    loads = []
+    monkeypatch.setattr(civ_log_watcher, 'load_new_turns',
+                        lambda conn, reader, logs_dir, bulk: loads.append(time.monotonic()) or ('game', [5]))
+
+    watcher = CivLogWatcher(tmp_path, db_config={}, debounce_seconds=0.05, max_delay_seconds=0.5)
+    watcher.conn = FakeConnection()
+
+    for name in ["Player_Stats.csv", "Player_Stats_2.csv", "Game_PlayerScores.csv"]:
+        watcher._schedule(str(tmp_path / name))
+    time.sleep(0.3)
+
+    assert len(loads) == 1
+
+def test_other_log_files_are_ignored(tmp_path, monkeypatch):
+    loads = []
+    monkeypatch.setattr(civ_log_watcher, 'load_new_turns',
+                        lambda conn, reader, logs_dir, bulk: loads.append(1) or (None, []))
+
+    watcher = CivLogWatcher(tmp_path, db_config={}, debounce_seconds=0.01)
+    watcher.conn = FakeConnection()
+    watcher._schedule(str(tmp_path / "AI_Research.csv"))
+    watcher._schedule(str(tmp_path / "Player_Stats.csv"), is_directory=True)
+    time.sleep(0.1)
+
+    assert loads == []
+
+def test_continuous_writes_respect_max_delay(tmp_path, monkeypatch):
+    loads = []
+    monkeypatch.setattr(civ_log_watcher, 'load_new_turns',
+                        lambda conn, reader, logs_dir, bulk: loads.append(time.monotonic()) or (None, []))
+
+    watcher = CivLogWatcher(tmp_path, db_config={}, debounce_seconds=0.1, max_delay_seconds=0.2)
+    watcher.conn = FakeConnection()
+
+    start = time.monotonic()
+    while time.monotonic() - start < 0.4:
+        watcher._schedule(str(tmp_path / "Player_Stats.csv"))
+        time.sleep(0.02)
+    time.sleep(0.2)
+
+    assert loads
+    assert loads[0] - start < 0.35
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Test that the compiled forest reproduces RandomForestClassifier exactly
+"""
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from compiled_forest import CompiledForest
+
+def make_data(n=400, n_features=6, seed=0):
+    """Noisy problem so trees grow deep and disagree"""
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, n_features)) * 50
+    y = (X[:, 0] + X[:, 1] + rng.normal(0, 30, n) > 10).astype(int)
+    return X, y
+
+@pytest.mark.parametrize('params', [
+    {'n_estimators': 25},
+    {'n_estimators': 10, 'max_depth': 3},
+    {'n_estimators': 15, 'min_samples_leaf': 4, 'bootstrap': False},
+])
+def test_predict_proba_is_bit_identical(params):
+    """Same probabilities, to the last bit, on train and unseen rows"""
+    X, y = make_data()
+    model = RandomForestClassifier(random_state=1, **params).fit(X, y)
+    forest = CompiledForest.from_estimator(model)
+
+    X_new, _ = make_data(seed=7)
+    for batch in (X, X_new, X_new[:1], X_new[:8]):
+        assert np.array_equal(forest.predict_proba(batch), model.predict_proba(batch))
+        assert np.array_equal(forest.predict(batch), model.predict(batch))
+
+def test_leaves_match_sklearn_apply():
+    """Every tree lands on the same leaf sklearn does"""
+    X, y = make_data()
+    model = RandomForestClassifier(n_estimators=5, random_state=2).fit(X, y)
+    forest = CompiledForest.from_estimator(model)
+
+    assert np.array_equal(forest.apply(X) - forest.roots, model.apply(X))
+
+def test_missing_values_follow_the_trained_direction():
+    """NaN inputs take the branch sklearn learned for missing values"""
+    X, y = make_data()
+    X[::7, 0] = np.nan
+    model = RandomForestClassifier(n_estimators=10, random_state=3).fit(X, y)
+    forest = CompiledForest.from_estimator(model)
+
+    X_new, _ = make_data(seed=9)
+    X_new[::3, 0] = np.nan
+    assert np.array_equal(forest.predict_proba(X_new), model.predict_proba(X_new))
+
+def test_wrong_feature_count_is_rejected():
+    """Inputs must have the training feature count"""
+    X, y = make_data()
+    forest = CompiledForest.from_estimator(RandomForestClassifier(n_estimators=2).fit(X, y))
+    with pytest.raises(ValueError):
+        forest.predict_proba(X[:, :3])
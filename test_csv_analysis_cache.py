@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Test the CSV analysis cache: unchanged files are served from the cache,
+modified ones are profiled again, and the relationship analyzer reads it
+"""
+
+import os
+
+from csv_analysis_cache import CSVAnalysisCache, fingerprint, sample_hash
+from csv_relationship_analyzer import CivRelationshipAnalyzer
+from test_csv_profiler import write_log
+
+def make_logs(logs_path):
+    """Three small Player_Stats-like logs"""
+    logs_path.mkdir()
+    paths = []
+    for seed, name in enumerate(('Player_Stats.csv', 'Player_Stats_2.csv', 'AI_Research.csv')):
+        paths.append(logs_path / name)
+        write_log(paths[-1], 200 + 100 * seed, seed)
+    return paths
+
+def test_unchanged_files_come_from_cache(tmp_path):
+    """A second run (even from a new process' cache object) profiles nothing"""
+    paths = make_logs(tmp_path / 'Logs')
+    cache = CSVAnalysisCache(tmp_path / 'cache.json')
+    first = cache.analyze(paths, n_jobs=1)
+    cache.save()
+    assert (cache.hits, cache.misses) == (0, 3)
+
+    reloaded = CSVAnalysisCache(tmp_path / 'cache.json')
+    again = reloaded.analyze(paths, n_jobs=1)
+
+    assert (reloaded.hits, reloaded.misses) == (3, 0)
+    assert list(again) == [path.name for path in paths]
+    assert again['Player_Stats.csv']['column_analysis'] == first['Player_Stats.csv']['column_analysis']
+
+def test_modified_files_are_profiled_again(tmp_path):
+    """Appending a turn or touching a file invalidates only that file"""
+    paths = make_logs(tmp_path / 'Logs')
+    cache = CSVAnalysisCache(tmp_path / 'cache.json')
+    rows_before = cache.analyze(paths, n_jobs=1)['Player_Stats.csv']['row_count']
+
+    with open(paths[0], 'a') as f:
+        f.write("41,CIVILIZATION_ROME,120.5,\n")
+    stat = paths[1].stat()
+    os.utime(paths[1], ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    results = cache.analyze(paths, n_jobs=1)
+
+    assert (cache.hits, cache.misses) == (1, 5)
+    assert results['Player_Stats.csv']['row_count'] == rows_before + 1
+
+def test_sampled_hash_sees_same_size_rewrites(tmp_path):
+    """A same-size rewrite with the mtime put back is caught by the sampled blocks"""
+    path = tmp_path / 'big.csv'
+    path.write_bytes(b'a' * 500_000)
+    before = fingerprint(path)
+
+    with open(path, 'r+b') as f:
+        f.seek(499_990)
+        f.write(b'b')
+    os.utime(path, ns=(before['mtime_ns'], before['mtime_ns']))
+    after = fingerprint(path)
+
+    assert (after['size'], after['mtime_ns']) == (before['size'], before['mtime_ns'])
+    assert after['sample_hash'] != before['sample_hash']
+    assert sample_hash(path) == after['sample_hash']
+
+def test_relationship_analyzer_reads_the_cache(tmp_path):
+    """load_analysis_results refreshes from the logs, or falls back to the cached entries"""
+    paths = make_logs(tmp_path / 'Logs')
+    analyzer = CivRelationshipAnalyzer(cache_path=tmp_path / 'cache.json')
+    analyzer.logs_path = tmp_path / 'Logs'
+
+    results = analyzer.load_analysis_results()
+    assert sorted(results) == sorted(path.name for path in paths)
+    patterns = analyzer.identify_common_patterns(results)
+    assert ('Player_Stats.csv', 'Game Turn') in patterns['turn_columns']
+
+    analyzer.logs_path = tmp_path / 'missing'
+    assert analyzer.load_analysis_results() == results
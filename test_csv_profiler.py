@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Test the streaming CSV profiler: chunked statistics match a whole-file pandas
+read, HyperLogLog sketches merge, and pooled runs match in-process ones
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+
+from csv_profiler import EXACT_DISTINCT_LIMIT, ColumnProfile, HyperLogLog, profile_csv, profile_csvs
+
+def write_log(path, rows=500, seed=0):
+    """Player_Stats-like log with a text, an int, a float and a sparse column"""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'Game Turn': np.repeat(np.arange(1, rows // 5 + 1), 5)[:rows],
+        'Player': rng.choice(['CIVILIZATION_ROME', 'CIVILIZATION_MALI', 'CIVILIZATION_MAYA'], rows),
+        'Gold': rng.normal(100, 30, rows).round(1),
+        'Wonders': np.where(rng.random(rows) < 0.9, np.nan, rng.integers(0, 5, rows)),
+    })
+    # The first chunks have no wonders at all
+    df.loc[:149, 'Wonders'] = np.nan
+    df.to_csv(path, index=False)
+    return df
+
+def test_hyperloglog_estimate_and_merge():
+    """Estimates within a few percent, and merging two sketches counts the union"""
+    first, second = HyperLogLog(), HyperLogLog()
+    first.add(pd.Series(np.arange(0, 60_000)))
+    second.add(pd.Series(np.arange(40_000, 100_000)))
+
+    assert abs(first.estimate() - 60_000) / 60_000 < 0.05
+    assert abs(first.merge(second).estimate() - 100_000) / 100_000 < 0.05
+
+    small = HyperLogLog()
+    small.add(pd.Series(['a', 'b', 'c', 'a']))
+    assert small.estimate() == 3
+
+def test_profile_matches_pandas(tmp_path):
+    """Chunked one-pass statistics equal a whole-file read"""
+    path = tmp_path / 'Player_Stats.csv'
+    write_log(path)
+    df = pd.read_csv(path)
+
+    info = profile_csv(path, chunk_rows=64)
+
+    assert info['row_count'] == len(df)
+    assert info['columns'] == list(df.columns)
+    assert info['dtypes'] == {col: str(dtype) for col, dtype in df.dtypes.items()}
+    pd.testing.assert_frame_equal(pd.DataFrame(info['data_preview']), df.head(3))
+    for col in df.columns:
+        stats = info['column_analysis'][col]
+        assert stats['non_null_count'] == df[col].count()
+        assert stats['null_count'] == df[col].isnull().sum()
+        assert stats['unique_values'] == df[col].nunique()
+        assert stats['sample_values'] == df[col].dropna().head(5).tolist()
+    for col in ('Game Turn', 'Gold', 'Wonders'):
+        stats = info['column_analysis'][col]
+        assert (stats['min_value'], stats['max_value']) == (df[col].min(), df[col].max())
+        assert stats['mean_value'] == round(df[col].mean(), 2)
+    assert info['column_analysis']['Player']['value_counts'] == df['Player'].value_counts().to_dict()
+
+def test_large_columns_switch_to_sketch():
+    """Past the exact limit the distinct count is the HyperLogLog estimate"""
+    profile = ColumnProfile()
+    for start in range(0, 20_000, 5_000):
+        profile.update(pd.Series(np.arange(start, start + 5_000)))
+
+    assert profile.value_counts is None
+    assert abs(profile.distinct - 20_000) / 20_000 < 0.05
+    assert 'value_counts' not in profile.to_dict()
+
+    small = ColumnProfile()
+    small.update(pd.Series(np.arange(EXACT_DISTINCT_LIMIT)))
+    assert small.distinct == EXACT_DISTINCT_LIMIT
+
+    # Merging an exact profile into a sketched one keeps the exact profile's values
+    small.merge(profile)
+    assert small.value_counts is None
+    assert abs(small.distinct - 20_000) / 20_000 < 0.05
+    assert (small.count, small.minimum, small.maximum) == (20_000 + EXACT_DISTINCT_LIMIT, 0, 19_999)
+
+def test_pool_matches_in_process(tmp_path):
+    """Profiling on the pool gives the same results, in the order the files were given"""
+    paths = []
+    for seed, rows in enumerate((300, 900, 600)):
+        paths.append(tmp_path / f"log_{seed}.csv")
+        write_log(paths[-1], rows, seed)
+    (tmp_path / 'empty.csv').write_text('')
+    paths.append(tmp_path / 'empty.csv')
+
+    pooled = profile_csvs(paths, n_jobs=2, chunk_rows=128)
+    in_process = profile_csvs(paths, n_jobs=1, chunk_rows=128)
+
+    assert list(pooled) == [path.name for path in paths]
+    # As saved by CivCSVAnalyzer.save_results (NaN in the previews never compares equal)
+    assert json.dumps(pooled, default=str) == json.dumps(in_process, default=str)
+    assert 'error' in pooled['empty.csv']
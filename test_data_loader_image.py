@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Test that the data-loader image has every module its scripts import:
+copy only the files Dockerfile.data-loader copies and import them there
+"""
+
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+REPO = Path(__file__).parent
+
+def copied_scripts(dockerfile=REPO / 'Dockerfile.data-loader'):
+    """Python files named on the Dockerfile's COPY lines"""
+    scripts = []
+    for line in dockerfile.read_text().splitlines():
+        parts = line.split()
+        if parts and parts[0] == 'COPY':
+            scripts.extend(part for part in parts[1:-1] if part.endswith('.py'))
+    return scripts
+
+def test_loader_imports_from_image_files_only(tmp_path):
+    scripts = copied_scripts()
+    assert 'stage4h_insert_data.py' in scripts
+    for script in scripts:
+        shutil.copy(REPO / script, tmp_path / script)
+
+    modules = ', '.join(Path(script).stem for script in scripts)
+    result = subprocess.run([sys.executable, '-E', '-c', f"import {modules}"],
+                            cwd=tmp_path, capture_output=True, text=True)
+
+    assert result.returncode == 0, result.stderr
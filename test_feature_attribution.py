@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Test feature attribution: pooled permutation importance matches sklearn and
+is cached per model, and tree attributions add up to the prediction
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.inspection import permutation_importance as sklearn_permutation_importance
+
+from compiled_forest import CompiledForest
+from feature_attribution import AttributionCache, permutation_importance, top_drivers
+from model_registry import artifact_hash
+from predict_winner import LiveVictoryPredictor
+
+def make_model(seed=0):
+    """Forest where only the first two of five features matter"""
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.random((300, 5)), columns=['techs', 'num_cities', 'noise_a', 'noise_b', 'noise_c'])
+    y = (X['techs'] + X['num_cities'] > 1).astype(int)
+    return RandomForestClassifier(n_estimators=20, random_state=seed).fit(X, y), X, y
+
+def test_permutation_importance_matches_sklearn():
+    """Same shuffles and seeds as sklearn, in-process and on the pool"""
+    model, X, y = make_model()
+    expected = sklearn_permutation_importance(model, X, y, n_repeats=4, random_state=42)
+
+    for n_jobs in (1, 2):
+        importance = permutation_importance(model, X, y, n_repeats=4, n_jobs=n_jobs, cache_dir=None)
+        importance = importance.set_index('feature').loc[X.columns]
+        assert np.allclose(importance['importance_mean'], expected.importances_mean)
+        assert np.allclose(importance['importance_std'], expected.importances_std)
+
+    top = permutation_importance(model, X, y, n_repeats=4, n_jobs=1, cache_dir=None)['feature'][:2]
+    assert set(top) == {'techs', 'num_cities'}
+
+def test_permutation_importance_is_cached_per_model(tmp_path):
+    """The second request for the same model and data is read from the cache"""
+    model, X, y = make_model()
+
+    first = permutation_importance(model, X, y, n_repeats=3, n_jobs=1, cache_dir=tmp_path)
+    assert len(list(tmp_path.glob('*.json'))) == 1
+
+    # A cached result is returned even though the hash now points at a different model
+    other_model, _, _ = make_model(seed=1)
+    cached = permutation_importance(other_model, X, y, n_repeats=3, n_jobs=1, cache_dir=tmp_path,
+                                    model_hash=artifact_hash(model))
+    pd.testing.assert_frame_equal(cached[first.columns], first)
+
+    permutation_importance(other_model, X, y, n_repeats=3, n_jobs=1, cache_dir=tmp_path)
+    permutation_importance(model, X.iloc[:100], y.iloc[:100], n_repeats=3, n_jobs=1, cache_dir=tmp_path)
+    assert len(list(tmp_path.glob('*.json'))) == 3
+
+def test_contributions_add_up_to_probability():
+    """bias + contributions = predict_proba for every row"""
+    model, X, _ = make_model()
+    forest = CompiledForest.from_estimator(model)
+
+    bias, contributions = forest.contributions(X)
+
+    assert contributions.shape == X.shape
+    assert np.allclose(bias + contributions.sum(axis=1), model.predict_proba(X)[:, 1])
+    # The noise features barely move the prediction
+    mean_effect = np.abs(contributions).mean(axis=0)
+    assert mean_effect[:2].min() > mean_effect[2:].max()
+
+def test_attribution_cache_reuses_rows():
+    """Rows already explained for the model aren't walked through the forest again"""
+    model, X, _ = make_model()
+    cache = AttributionCache(CompiledForest.from_estimator(model), X.columns, 'abc')
+
+    first = cache.explain(X.iloc[:8])
+    again = cache.explain(X.iloc[4:12])
+
+    assert (cache.hits, cache.misses) == (4, 12)
+    pd.testing.assert_frame_equal(first.iloc[4:], again.iloc[:4])
+    assert list(again.index) == list(X.index[4:12])
+
+def test_attribution_cache_keeps_hits_of_a_batch_that_overflows_it():
+    """Evicting for new rows never drops a row the same batch hit"""
+    model, X, _ = make_model()
+    cache = AttributionCache(CompiledForest.from_estimator(model), X.columns, 'abc', size=2)
+
+    cache.explain(X.iloc[[0, 1]])
+    both = cache.explain(X.iloc[[0, 5]])
+
+    _, contributions = cache.forest.contributions(X.iloc[[0, 5]].to_numpy(dtype=np.float64))
+    assert np.allclose(both.to_numpy(), contributions)
+    assert len(cache.cache) == 2
+    assert (cache.hits, cache.misses) == (1, 3)
+
+def test_attribution_cache_is_shared_by_threads():
+    """Concurrent explains of overlapping rows through a tiny cache all succeed"""
+    model, X, _ = make_model()
+    cache = AttributionCache(CompiledForest.from_estimator(model), X.columns, 'abc', size=4)
+    expected = cache.explain(X.iloc[:16])
+
+    def explain(start):
+        rows = X.iloc[start:start + 6]
+        pd.testing.assert_frame_equal(cache.explain(rows), expected.loc[rows.index])
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(explain, [i % 10 for i in range(40)]))
+    assert len(cache.cache) <= 4
+
+def test_top_drivers_keep_positive_contributions():
+    """Largest positive contributions first, negative ones left out"""
+    contributions = pd.DataFrame([[0.05, -0.2, 0.1], [-0.1, -0.2, -0.3]], columns=['techs', 'score', 'cities'])
+    assert top_drivers(contributions, n=2) == [[('cities', 0.1), ('techs', 0.05)], []]
+
+def test_strategic_insights_show_drivers(capsys):
+    """generate_strategic_insights names the leader's drivers from the attributions"""
+    predictor = LiveVictoryPredictor()
+    rng = np.random.default_rng(0)
+    current = pd.DataFrame(rng.integers(1, 30, (4, len(predictor.feature_columns))),
+                           columns=predictor.feature_columns)
+    current['civilization'] = ['CIVILIZATION_ROME', 'CIVILIZATION_MALI', 'CIVILIZATION_MAYA', 'CIVILIZATION_KOREA']
+    current['total_score'] = current['current_score']
+    current['science_rank'] = [1, 2, 3, 4]
+    current['cities_rank'] = [2, 1, 3, 4]
+    predictor.model = RandomForestClassifier(n_estimators=10, random_state=0).fit(
+        current[predictor.feature_columns], [1, 0, 0, 0])
+    predictor.model_version = 'v0001'
+
+    results = predictor.make_predictions(current)
+    attributions = predictor.explain_predictions(current)
+    predictor.generate_strategic_insights(results, 40, attributions)
+
+    assert "Model drivers:" in capsys.readouterr().out
+    assert predictor.explain_predictions(current).equals(attributions)
+    assert predictor.attributions.hits == 4
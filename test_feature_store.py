@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Test the Parquet feature store: partitioning, manifest, pruning and appends
+"""
+
+import pandas as pd
+import pytest
+
+from feature_store import FeatureStore
+
+def make_features():
+    """Two games worth of training rows"""
+    return pd.DataFrame({
+        'game_id': ['2025-08-01_20:00:00', '2025-08-01_20:00:00', '2025-08-02_07:00:00'],
+        'civilization': ['CIVILIZATION_ROME', 'CIVILIZATION_MALI', 'CIVILIZATION_POLAND'],
+        'game_turn': [10, 10, 12],
+        'techs': [5, 4, 7],
+        'science_per_city': [2.5, 1.0, 3.25],
+        'will_win': [1, 0, 1],
+    })
+
+def test_round_trip_and_manifest(tmp_path):
+    """Every game gets its own file; the manifest knows schema and row counts"""
+    store = FeatureStore(tmp_path)
+    manifest = store.write('training_features', make_features())
+
+    assert manifest['total_rows'] == 3
+    assert store.row_counts('training_features') == {'2025-08-01_20:00:00': 2, '2025-08-02_07:00:00': 1}
+    assert manifest['schema']['techs'] == 'int32'
+    # ':' is not allowed in Windows paths
+    assert all(':' not in p['path'] for p in manifest['partitions'].values())
+
+    df = store.read('training_features')
+    expected = make_features()
+    for col in expected.columns:
+        assert df[col].astype(expected[col].dtype).tolist() == expected[col].tolist()
+
+def test_read_prunes_columns_and_games(tmp_path):
+    """Only the requested games and columns come back"""
+    store = FeatureStore(tmp_path)
+    store.write('training_features', make_features())
+
+    df = store.read('training_features', columns=['civilization', 'techs'], games=['2025-08-02_07:00:00'])
+
+    assert list(df.columns) == ['civilization', 'techs']
+    assert df['civilization'].astype(str).tolist() == ['CIVILIZATION_POLAND']
+
+    with pytest.raises(KeyError):
+        store.read('training_features', columns=['no_such_column'])
+    assert store.read('missing_dataset') is None
+
+def test_append_replaces_only_written_games(tmp_path):
+    """overwrite=False keeps other games and replaces the one rewritten"""
+    store = FeatureStore(tmp_path)
+    store.write('training_features', make_features())
+
+    update = make_features().iloc[[2]].assign(techs=9)
+    new_game = make_features().iloc[[0]].assign(game_id='2025-08-03_10:00:00')
+    store.write('training_features', pd.concat([update, new_game]), overwrite=False)
+
+    assert store.row_counts('training_features') == {
+        '2025-08-01_20:00:00': 2, '2025-08-02_07:00:00': 1, '2025-08-03_10:00:00': 1
+    }
+    poland = store.read('training_features', columns=['techs'], games=['2025-08-02_07:00:00'])
+    assert poland['techs'].tolist() == [9]
+
+def test_frame_without_game_id_needs_one(tmp_path):
+    """Log snapshots are tagged with the game they belong to"""
+    store = FeatureStore(tmp_path)
+    snapshot = make_features().drop(columns='game_id')
+
+    with pytest.raises(ValueError):
+        store.write('civ6_player_stats_cleaned', snapshot)
+
+    store.write('civ6_player_stats_cleaned', snapshot, game_id='current_logs')
+    assert store.games('civ6_player_stats_cleaned') == ['current_logs']
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Test game-grouped cross-validation: folds never split a game, and the
+shared-memory pool scores the same as fitting in-process
+"""
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from group_cv import GroupCrossValidator, game_folds
+
+def make_games(n_games=4, rows_per_game=30):
+    """Rows tagged with the game they came from"""
+    rng = np.random.default_rng(1)
+    X = rng.normal(size=(n_games * rows_per_game, 3))
+    y = (X[:, 0] > 0).astype(int)
+    groups = np.repeat([f"2025-08-0{g + 1}_20:00:00" for g in range(n_games)], rows_per_game)
+    return X, y, groups
+
+def test_folds_keep_games_whole():
+    """No game is on both sides of any fold, and every row is tested once"""
+    _, _, groups = make_games()
+
+    for method, expected_folds in (('logo', 4), ('group_kfold', 2)):
+        folds = game_folds(groups, method, n_splits=2)
+        assert len(folds) == expected_folds
+        for train_idx, test_idx in folds:
+            assert not set(groups[train_idx]) & set(groups[test_idx])
+        assert sorted(np.concatenate([test for _, test in folds])) == list(range(len(groups)))
+
+    with pytest.raises(ValueError):
+        game_folds(groups[:30])
+    with pytest.raises(ValueError):
+        game_folds(groups, 'kfold')
+
+def test_pool_matches_in_process_fit():
+    """Workers read the shared arrays and get the same accuracy as a local fit"""
+    X, y, groups = make_games()
+    params = {'n_estimators': 10, 'max_depth': 3}
+
+    with GroupCrossValidator(X, y, groups, method='logo', n_jobs=2) as cv:
+        results = cv.evaluate(params)
+        assert cv.n_fits == 4
+        assert cv.folds_for(params) is results
+
+        for (train_idx, test_idx), result in zip(cv.folds, results):
+            model = RandomForestClassifier(random_state=42, n_jobs=1, **params).fit(X[train_idx], y[train_idx])
+            assert result['accuracy'] == pytest.approx(np.mean(model.predict(X[test_idx]) == y[test_idx]))
+            assert result['games'] == sorted(set(groups[test_idx]))
+            assert result['fit_seconds'] > 0
+
+        assert cv(params) == pytest.approx(np.mean([r['accuracy'] for r in results]))
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Test the hyperparameter search strategies on a small synthetic problem
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from hyperparameter_search import (CVEvaluator, DEFAULT_PARAMS, GridSearch, SuccessiveHalvingSearch, TPESearch,
+                                   get_strategy, RESOURCE)
+from victory_prediction_model import VictoryPredictionModel
+
+SMALL_GRID = {
+    'n_estimators': [10, 30],
+    'max_depth': [2, None],
+    'min_samples_leaf': [1, 4],
+}
+
+def make_data():
+    """Two informative features and some noise"""
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(120, 4))
+    y = (X[:, 0] + X[:, 1] > 0).astype(int)
+    return X, y
+
+def make_evaluator():
+    """3-fold single-process evaluator"""
+    X, y = make_data()
+    return CVEvaluator(X, y, cv=3, n_jobs=1)
+
+def test_grid_tries_every_configuration():
+    """Grid search covers the full grid at full size"""
+    result = GridSearch().run(make_evaluator(), SMALL_GRID)
+
+    assert result['configurations'] == 8
+    assert result['fits'] == 8 * 3
+    assert result['best_params'].keys() == SMALL_GRID.keys()
+    assert 0.5 < result['best_score'] <= 1.0
+
+def test_halving_grows_the_forest_for_survivors():
+    """Everything starts small; only the top 1/factor reach the largest forest"""
+    strategy = SuccessiveHalvingSearch(factor=2, min_resource=5)
+    result = strategy.run(make_evaluator(), SMALL_GRID)
+
+    resources = [params[RESOURCE] for params, _ in strategy.trials]
+    assert resources == [5] * 4 + [10] * 2 + [30]
+    # The winner comes from the last (largest-forest) round
+    assert result['best_params'][RESOURCE] == 30
+
+def test_tpe_never_repeats_a_configuration():
+    """TPE stops once the grid is used up and never refits a configuration"""
+    strategy = TPESearch(n_trials=20, n_startup=3)
+    result = strategy.run(make_evaluator(), SMALL_GRID)
+
+    keys = [TPESearch._key(params) for params, _ in strategy.trials]
+    assert len(keys) == len(set(keys)) == result['configurations'] == 8
+
+def test_budget_stops_new_fits():
+    """A spent budget means no further configurations are started"""
+    result = GridSearch().run(make_evaluator(), SMALL_GRID, budget_seconds=0)
+
+    assert result['budget_exhausted']
+    assert result['configurations'] == 0
+    assert result['best_params'] is None
+
+def test_failed_trials_are_never_best():
+    """Configurations whose fits all failed (NaN score) leave no best configuration"""
+    class FailingEvaluator:
+        n_fits = 0
+        def __call__(self, params):
+            return float('nan')
+
+    result = GridSearch().run(FailingEvaluator(), SMALL_GRID)
+
+    assert result['configurations'] == 8
+    assert result['best_params'] is None
+
+def test_training_falls_back_to_default_parameters():
+    """An empty search result trains with the defaults instead of crashing"""
+    X, y = make_data()
+    trainer = VictoryPredictionModel(search='grid', search_budget=0)
+
+    trainer.train_model(pd.DataFrame(X), pd.Series(y))
+
+    assert trainer.search_result['configurations'] == 0
+    assert trainer.model.get_params()['n_estimators'] == DEFAULT_PARAMS['n_estimators']
+    assert hasattr(trainer.model, 'estimators_')
+
+def test_unknown_strategy():
+    """Typos in --search fail loudly"""
+    with pytest.raises(ValueError):
+        get_strategy('random')
+
+def test_training_with_two_games_splits_rows():
+    """A fresh install with two archived games trains on a row split without calibration"""
+    X, y = make_data()
+    groups = np.where(np.arange(len(y)) < 60, 'game_a', 'game_b')
+    X = pd.DataFrame(X, columns=['f0', 'f1', 'f2', 'game_turn'])
+    trainer = VictoryPredictionModel(search='grid', search_budget=0)
+
+    X_train, X_test, y_train, y_test = trainer.train_model(X, pd.Series(y), pd.Series(groups))
+
+    assert len(X_train) + len(X_test) == len(X)
+    assert trainer.train_groups is None
+    assert trainer.calibrate_model(X_train, X_test, y_train, y_test) == {}
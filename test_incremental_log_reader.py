@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Test byte-offset tail reading of Civ VI log CSVs
+"""
+
+import os
+
+from incremental_log_reader import IncrementalLogReader
+
+HEADER = "Game Turn, Player, Score\n"
+
+def write_log(path, text, mode='w'):
+    """Write raw log text (binary-safe newlines)"""
+    with open(path, mode, newline='') as f:
+        f.write(text)
+
+def test_reads_only_appended_rows(tmp_path):
+    log = tmp_path / "Game_PlayerScores.csv"
+    checkpoints = tmp_path / "checkpoints.json"
+    write_log(log, HEADER + "1, 0, 4\n1, 1, 3\n")
+
+    reader = IncrementalLogReader(checkpoints)
+    first = reader.read(log)
+    assert reader.was_full_reload(log)
+    assert len(first) == 2
+    reader.commit()
+
+    write_log(log, "2, 0, 6\n2, 1, 5\n", mode='a')
+    reader = IncrementalLogReader(checkpoints)
+    second = reader.read(log)
+    assert not reader.was_full_reload(log)
+    assert second['game_turn'].tolist() == [2, 2]
+    assert list(second.columns) == ['game_turn', 'player_id', 'total_score']
+    reader.commit()
+
+    # Untouched file: nothing new
+    assert len(IncrementalLogReader(checkpoints).read(log)) == 0
+
+def test_partial_last_line_waits_for_next_run(tmp_path):
+    log = tmp_path / "Game_PlayerScores.csv"
+    checkpoints = tmp_path / "checkpoints.json"
+    write_log(log, HEADER + "1, 0, 4\n1, 1")
+
+    reader = IncrementalLogReader(checkpoints)
+    assert len(reader.read(log)) == 1
+    reader.commit()
+
+    write_log(log, ", 3\n", mode='a')
+    reader = IncrementalLogReader(checkpoints)
+    rows = reader.read(log)
+    assert rows['player_id'].tolist() == [1]
+    assert rows['total_score'].tolist() == [3]
+
+def test_truncated_or_rewritten_file_falls_back_to_full_reload(tmp_path):
+    log = tmp_path / "Game_PlayerScores.csv"
+    checkpoints = tmp_path / "checkpoints.json"
+    write_log(log, HEADER + "1, 0, 4\n2, 0, 5\n3, 0, 6\n")
+    reader = IncrementalLogReader(checkpoints)
+    reader.read(log)
+    reader.commit()
+
+    # New game truncates the log
+    write_log(log, HEADER + "1, 0, 1\n")
+    reader = IncrementalLogReader(checkpoints)
+    rows = reader.read(log)
+    assert reader.reload_reason(log) == 'file truncated'
+    assert rows['total_score'].tolist() == [1]
+    reader.commit()
+
+    # New game grew past the old offset before the next run
+    write_log(log, HEADER + "1, 0, 9\n2, 0, 9\n3, 0, 9\n")
+    reader = IncrementalLogReader(checkpoints)
+    rows = reader.read(log)
+    assert reader.reload_reason(log) == 'file rewritten'
+    assert len(rows) == 3
+
+def test_hold_back_rereads_remaining_rows(tmp_path):
+    log = tmp_path / "Game_PlayerScores.csv"
+    checkpoints = tmp_path / "checkpoints.json"
+    write_log(log, HEADER + "1, 0, 4\n2, 0, 5\n")
+
+    reader = IncrementalLogReader(checkpoints)
+    reader.read(log)
+    reader.hold_back(log, 1)
+    assert reader.last_turn(log) == 1
+    reader.commit()
+
+    reader = IncrementalLogReader(checkpoints)
+    rows = reader.read(log)
+    assert rows['game_turn'].tolist() == [2]
+    assert os.path.exists(checkpoints)
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Test warm-start incremental retraining and model lineage
+"""
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+from feature_store import FeatureStore
+from ml_data_preparation import TRAINING_DATASET
+from model_registry import ModelRegistry
+from victory_prediction_model import VictoryPredictionModel
+
+def make_game(trainer, game_id, n_civs=4, turns=range(10, 16), seed=0):
+    """Training rows for one finished game; civ 0 wins"""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for turn in turns:
+        for civ in range(n_civs):
+            row = {col: float(rng.integers(1, 50)) for col in trainer.feature_columns}
+            row.update(game_id=game_id, game_turn=turn, current_score=100 - civ * 10 + turn,
+                       will_win=int(civ == 0))
+            rows.append(row)
+    return pd.DataFrame(rows)
+
+def test_incremental_run_only_fits_new_games(tmp_path, monkeypatch):
+    """New trees come from the new game only; old trees and params are kept"""
+    monkeypatch.chdir(tmp_path)
+    trainer = VictoryPredictionModel()
+    trainer.feature_store = FeatureStore(tmp_path / 'feature_store')
+    trainer.registry = ModelRegistry(tmp_path / 'models')
+
+    history = pd.concat([make_game(trainer, 'game_a', seed=1), make_game(trainer, 'game_b', seed=2)])
+    trainer.feature_store.write(TRAINING_DATASET, history)
+    trainer.model = RandomForestClassifier(n_estimators=20, max_depth=5, random_state=42)
+    trainer.model.fit(history[trainer.feature_columns], history['will_win'])
+    lineage = trainer.build_lineage('full', ['game_a', 'game_b'], ['game_a', 'game_b'], len(history))
+    trainer.save_model(data_hash='history', lineage=lineage)
+    old_trees = list(trainer.model.estimators_)
+
+    # Nothing new yet
+    assert trainer.run_incremental_training()
+    assert len(trainer.load_lineage()) == 1
+
+    new_game = make_game(trainer, 'game_c', seed=3)
+    trainer.feature_store.write(TRAINING_DATASET, new_game, overwrite=False)
+    assert trainer.run_incremental_training()
+
+    model = trainer.model
+    # 24 new rows out of 72 seen -> a third more trees
+    assert model.n_estimators == 20 + 7
+    assert model.max_depth == 5
+    assert not model.warm_start
+    for old, kept in zip(old_trees, model.estimators_):
+        assert old.tree_.node_count == kept.tree_.node_count
+        assert np.array_equal(old.tree_.threshold, kept.tree_.threshold)
+
+    latest = trainer.load_lineage()[-1]
+    assert latest['version'] == 'v0002'
+    assert latest['mode'] == 'incremental'
+    assert latest['games_seen'] == ['game_a', 'game_b', 'game_c']
+    assert latest['new_games'] == ['game_c']
+    assert latest['rows_seen'] == 72
+    assert latest['parent_version'] == 'v0001'
+    manifest = trainer.registry.manifest()
+    assert manifest['data_hash'] != 'history'
+    assert 'new_game_accuracy_before_update' in manifest['metrics']
+
+    # The grown forest round-trips through the registry
+    reloaded, _ = trainer.registry.load(feature_columns=trainer.feature_columns)
+    assert reloaded.n_estimators == 27
+
+def test_current_game_is_not_learned_until_it_finishes(tmp_path, monkeypatch):
+    """Provisional will_win labels of the game in progress are neither fitted nor recorded"""
+    monkeypatch.chdir(tmp_path)
+    trainer = VictoryPredictionModel()
+    trainer.feature_store = FeatureStore(tmp_path / 'feature_store')
+    trainer.registry = ModelRegistry(tmp_path / 'models')
+
+    history = pd.concat([make_game(trainer, 'game_a', seed=1), make_game(trainer, 'game_b', seed=2)])
+    history['game_session'] = 'Historical_Game'
+    trainer.feature_store.write(TRAINING_DATASET, history)
+    trainer.model = RandomForestClassifier(n_estimators=20, max_depth=5, random_state=42)
+    trainer.model.fit(history[trainer.feature_columns], history['will_win'])
+    trainer.save_model(data_hash='history',
+                       lineage=trainer.build_lineage('full', ['game_a', 'game_b'], ['game_a', 'game_b'], len(history)))
+
+    current = make_game(trainer, 'game_c', seed=3).assign(game_session='Current_Game')
+    trainer.feature_store.write(TRAINING_DATASET, current, overwrite=False)
+    assert trainer.run_incremental_training()
+    assert trainer.model.n_estimators == 20
+    assert len(trainer.load_lineage()) == 1
+
+    # Once re-extracted as a finished game it is learned with its real outcome
+    trainer.feature_store.write(TRAINING_DATASET, current.assign(game_session='Historical_Game'))
+    assert trainer.run_incremental_training()
+    latest = trainer.load_lineage()[-1]
+    assert latest['new_games'] == ['game_c']
+    assert latest['games_seen'] == ['game_a', 'game_b', 'game_c']
+
+def test_full_training_leaves_the_current_game_out(tmp_path, monkeypatch):
+    """Full training reads finished games only, so the current game stays out of games_seen"""
+    monkeypatch.chdir(tmp_path)
+    trainer = VictoryPredictionModel()
+    trainer.feature_store = FeatureStore(tmp_path / 'feature_store')
+
+    history = pd.concat([make_game(trainer, 'game_a', seed=1), make_game(trainer, 'game_b', seed=2)])
+    current = make_game(trainer, 'game_c', seed=3)
+    trainer.feature_store.write(TRAINING_DATASET, pd.concat([history.assign(game_session='Historical_Game'),
+                                                             current.assign(game_session='Current_Game')]))
+
+    df = trainer.load_training_data()
+
+    assert sorted(df['game_id'].astype(str).unique()) == ['game_a', 'game_b']
+
+    # Only the current game so far: nothing to train on
+    trainer.feature_store = FeatureStore(tmp_path / 'fresh_store')
+    trainer.feature_store.write(TRAINING_DATASET, current.assign(game_session='Current_Game'))
+    assert trainer.load_training_data() is None
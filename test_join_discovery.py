@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Test value-overlap join discovery: MinHash signatures match across files,
+containment estimates rank real keys first, and the LSH index finds the
+same pairs as comparing every column
+"""
+
+import numpy as np
+import pandas as pd
+
+from csv_profiler import MinHash, profile_csv
+from csv_relationship_analyzer import CivRelationshipAnalyzer
+from join_discovery import LSHIndex, discover_joins, estimate_containment, make_synthetic_analysis, pairwise_joins
+
+CIVS = ['CIVILIZATION_ROME', 'CIVILIZATION_MALI', 'CIVILIZATION_MAYA', 'CIVILIZATION_KOREA',
+        'CIVILIZATION_JAPAN', 'CIVILIZATION_INCA', 'CIVILIZATION_GREECE', 'CIVILIZATION_EGYPT']
+
+def minhash_of(values):
+    minhash = MinHash()
+    minhash.add(pd.Series(values))
+    return minhash
+
+def test_containment_estimate():
+    """A small column fully inside a large one is found from Jaccard and sizes"""
+    small, large = minhash_of(np.arange(200)), minhash_of(np.arange(1000))
+
+    jaccard = small.jaccard(large)
+
+    assert abs(jaccard - 0.2) < 0.1
+    assert estimate_containment(jaccard, 200, 1000) > 0.8
+    assert estimate_containment(jaccard, 1000, 200) < 0.4
+    assert MinHash.from_hex(small.to_hex()).jaccard(small) == 1.0
+
+def test_lsh_finds_small_columns_inside_large_ones():
+    """The per-partition banding still retrieves low-Jaccard containment"""
+    index = LSHIndex()
+    index.insert('large', minhash_of(np.arange(5000)), 5000)
+    index.insert('unrelated', minhash_of(np.arange(10**6, 10**6 + 300)), 300)
+
+    candidates = index.query(minhash_of(np.arange(100, 300)), 200)
+
+    assert candidates == {'large'}
+
+def test_lsh_matches_pairwise_comparison():
+    """Nearly every pair found by comparing all columns is found through the index"""
+    analysis = make_synthetic_analysis(200, seed=1)
+
+    found = set()
+    for join in discover_joins(analysis):
+        found.add(((join['file'], join['column']), (join['ref_file'], join['ref_column'])))
+        if join['mutual']:
+            found.add(((join['ref_file'], join['ref_column']), (join['file'], join['column'])))
+    expected = pairwise_joins(analysis)
+
+    assert found <= expected
+    assert len(found) >= 0.95 * len(expected)
+
+def test_relationship_report_lists_value_joins(tmp_path, monkeypatch):
+    """Player columns join across logs even with padded text and different column names"""
+    rng = np.random.default_rng(0)
+    logs = tmp_path / 'Logs'
+    logs.mkdir()
+    pd.DataFrame({'Game Turn': np.repeat(np.arange(1, 51), 8), 'Player': np.tile(CIVS, 50),
+                  'Gold': rng.normal(100, 30, 400).round(1)}).to_csv(logs / 'Player_Stats.csv', index=False)
+    pd.DataFrame({'Turn': np.arange(1, 41), 'Civ': [' ' + civ for civ in rng.choice(CIVS[:6], 40)],
+                  'Flag': rng.integers(0, 2, 40)}).to_csv(logs / 'AI_Research.csv', index=False)
+
+    assert profile_csv(logs / 'Player_Stats.csv')['column_analysis']['Gold']['minhash'] is None
+
+    monkeypatch.chdir(tmp_path)
+    analyzer = CivRelationshipAnalyzer(cache_path=tmp_path / 'cache.json')
+    analyzer.logs_path = logs
+    results = analyzer.create_analysis_report()
+
+    pairs = {(join['column'], join['ref_column']) for join in results['value_joins']}
+    assert pairs == {('Civ', 'Player'), ('Turn', 'Game Turn')}
+    report = (tmp_path / 'csv_relationships_20250803_relationships.md').read_text(encoding='utf-8')
+    assert "AI_Research.csv: 'Civ' -> Player_Stats.csv: 'Player'" in report
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Test the shared log reader: one-pass stripping and renaming of the key
+logs, narrow types, no silent overflow, column pruning, and a fallback for
+cells that aren't integers
+"""
+
+import io
+
+import pandas as pd
+
+from log_schemas import LOG_COLUMN_NAMES, read_log_csv, schema_for
+
+HEADER = "Game Turn, Player, Num Cities, Techs, BALANCE: Gold, Faith, Gold, Faith\n"
+
+def write_stats(path, rows):
+    path.write_text(HEADER + ''.join(rows))
+    return path
+
+def test_schemas_are_found_by_file_name(tmp_path):
+    assert schema_for(tmp_path / 'Player_Stats.csv')['player_name'] == 'category'
+    assert schema_for('civ6_player_stats_2_cleaned_20250803_191355.csv')['districts'] == 'int16'
+    assert schema_for('civ6_game_scores_cleaned_20250803_191355.csv')['player_id'] == 'int8'
+    assert schema_for('AI_Research.csv') is None
+
+def test_raw_log_gets_narrow_types(tmp_path):
+    """Counters are int16, amounts int32, players categorical - same values as inferred types"""
+    path = write_stats(tmp_path / 'Player_Stats.csv', [
+        "1, CIVILIZATION_ROME, 1, 2, 10, 0, 5, 1\n",
+        "1, CIVILIZATION_MALI, 1, 3, 12, 79488, 6, 2\n",
+    ])
+
+    df = read_log_csv(path)
+
+    assert str(df['game_turn'].dtype) == 'int16'
+    assert str(df['techs'].dtype) == 'int16'
+    assert str(df['balance_faith'].dtype) == 'int32'
+    assert str(df['yield_faith'].dtype) == 'int32'
+    assert isinstance(df['player_name'].dtype, pd.CategoricalDtype)
+    inferred = pd.read_csv(path, skipinitialspace=True).rename(columns=LOG_COLUMN_NAMES['Player_Stats.csv'])
+    pd.testing.assert_frame_equal(df, inferred, check_dtype=False, check_categorical=False)
+
+def test_key_logs_are_stripped_and_renamed_while_parsing(tmp_path):
+    """Header and values lose their leading space; the same frame as stripping and renaming afterwards"""
+    path = write_stats(tmp_path / 'Player_Stats.csv', [
+        "1, CIVILIZATION_ROME, 1, 2, 10, 0, 5, 1\n",
+        "2, CIVILIZATION_MALI, 1, 3, 12, 4, 6, 2\n",
+    ])
+    scores = tmp_path / 'Game_PlayerScores.csv'
+    scores.write_text("Game Turn, Player, Score, CATEGORY_TECH\n1, 0, 10, 3\n1, 1, 12, 4\n")
+
+    df = read_log_csv(path)
+
+    assert list(df.columns) == ['game_turn', 'player_name', 'num_cities', 'techs',
+                                'balance_gold', 'balance_faith', 'yield_gold', 'yield_faith']
+    assert df['player_name'].tolist() == ['CIVILIZATION_ROME', 'CIVILIZATION_MALI']
+    legacy = pd.read_csv(path)
+    legacy.columns = legacy.columns.str.strip()
+    legacy['Player'] = legacy['Player'].str.strip()
+    legacy = legacy.rename(columns=LOG_COLUMN_NAMES['Player_Stats.csv'])
+    pd.testing.assert_frame_equal(df, legacy, check_dtype=False, check_categorical=False)
+    assert list(read_log_csv(scores, columns=['player_id', 'score_tech']).columns) == ['player_id', 'score_tech']
+    assert str(read_log_csv(scores)['player_id'].dtype) == 'int8'
+
+def test_values_too_big_for_int16_are_not_wrapped(tmp_path):
+    """A counter beyond int16 stays int32 instead of wrapping around"""
+    path = write_stats(tmp_path / 'Player_Stats.csv', ["1, CIVILIZATION_ROME, 1, 40000, 10, 0, 5, 1\n"])
+
+    df = read_log_csv(path)
+
+    assert str(df['techs'].dtype) == 'int32'
+    assert df['techs'].tolist() == [40000]
+
+def test_columns_prune_the_read(tmp_path):
+    path = write_stats(tmp_path / 'Player_Stats.csv', ["1, CIVILIZATION_ROME, 1, 2, 10, 0, 5, 1\n"])
+
+    df = read_log_csv(path, columns=['game_turn', 'player_name', 'yield_faith'])
+
+    assert list(df.columns) == ['game_turn', 'player_name', 'yield_faith']
+    assert df['yield_faith'].tolist() == [1]
+
+def test_blank_cells_fall_back_to_inferred_numbers():
+    """A buffer named after its log; blanks become NaN instead of failing the read"""
+    buffer = io.BytesIO((HEADER + "1, CIVILIZATION_ROME, 1,, 10, 0, 5, 1\n").encode('utf-8'))
+
+    df = read_log_csv(buffer, file_path='Player_Stats.csv')
+
+    assert df['techs'].isna().all()
+    assert str(df['game_turn'].dtype) == 'int16'
+    assert isinstance(df['player_name'].dtype, pd.CategoricalDtype)
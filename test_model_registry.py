@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Test the model registry: round trips, manifests, schema checks and lazy loading
+"""
+
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from model_registry import FeatureSchemaMismatch, LazyModel, ModelRegistry, hash_frame
+
+FEATURES = ['techs', 'civics', 'score_rank']
+
+def make_model():
+    """Small fitted forest on three features"""
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.integers(0, 50, size=(60, 3)), columns=FEATURES)
+    y = (X['techs'] > 25).astype(int)
+    return RandomForestClassifier(n_estimators=8, max_depth=4, random_state=0).fit(X, y), X
+
+@pytest.mark.parametrize('use_mmap', [True, False])
+def test_round_trip_matches_predictions(tmp_path, use_mmap):
+    """The loaded forest predicts exactly like the one that was saved"""
+    model, X = make_model()
+    registry = ModelRegistry(tmp_path)
+    manifest = registry.save(model, FEATURES, metrics={'test_accuracy': 0.9}, data_hash=hash_frame(X))
+
+    loaded, loaded_manifest = registry.load(feature_columns=FEATURES, mmap=use_mmap)
+
+    assert np.array_equal(loaded.predict_proba(X), model.predict_proba(X))
+    assert loaded_manifest == manifest
+    assert manifest['version'] == 'v0001'
+    assert manifest['feature_columns'] == FEATURES
+    assert manifest['params']['n_estimators'] == 8
+    assert manifest['data_hash'] == hash_frame(X)
+
+def test_versions_and_latest(tmp_path):
+    """Every save is a new version and the newest is loaded by default"""
+    model, _ = make_model()
+    registry = ModelRegistry(tmp_path)
+    registry.save(model, FEATURES)
+    registry.save(model, FEATURES, metrics={'test_accuracy': 0.5})
+
+    assert registry.versions() == ['v0001', 'v0002']
+    assert registry.latest_version() == 'v0002'
+    assert registry.manifest()['metrics'] == {'test_accuracy': 0.5}
+    assert registry.manifest('v0001')['metrics'] == {}
+    assert ModelRegistry(tmp_path / 'empty').load() == (None, None)
+
+def test_feature_schema_mismatch_is_rejected(tmp_path):
+    """A different column set or order fails before the model is loaded"""
+    model, _ = make_model()
+    registry = ModelRegistry(tmp_path)
+    registry.save(model, FEATURES)
+
+    with pytest.raises(FeatureSchemaMismatch, match='missing'):
+        registry.load(feature_columns=FEATURES[:2])
+    with pytest.raises(FeatureSchemaMismatch, match='order'):
+        registry.load(feature_columns=list(reversed(FEATURES)))
+
+def test_lazy_load_defers_the_model(tmp_path):
+    """Only the manifest is read until the model is used"""
+    model, X = make_model()
+    registry = ModelRegistry(tmp_path)
+    registry.save(model, FEATURES)
+
+    lazy, manifest = registry.load(lazy=True)
+    assert isinstance(lazy, LazyModel) and not lazy.loaded
+    assert manifest['version'] == 'v0001'
+    assert np.array_equal(lazy.predict(X), model.predict(X))
+    assert lazy.loaded
+
+def test_import_legacy_pickle(tmp_path):
+    """trained_model.pkl files become registry versions"""
+    model, X = make_model()
+    legacy = tmp_path / 'trained_model.pkl'
+    with open(legacy, 'wb') as f:
+        pickle.dump(model, f)
+    registry = ModelRegistry(tmp_path / 'models')
+
+    manifest = registry.import_pickle(legacy, FEATURES)
+    assert manifest['imported_from'] == str(legacy)
+    with pytest.raises(FeatureSchemaMismatch):
+        registry.import_pickle(legacy, FEATURES + ['extra'])
+
+    loaded, _ = registry.load()
+    assert np.array_equal(loaded.predict(X), model.predict(X))
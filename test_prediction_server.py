@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Test the prediction server: per-turn caching, ingest invalidation and the HTTP routes
+"""
+
+import json
+import threading
+import urllib.error
+import urllib.request
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+from compiled_forest import CompiledForest
+from feature_store import FeatureStore
+from ml_data_preparation import TRAINING_DATASET
+from predict_winner import LiveVictoryPredictor
+from prediction_server import FeatureStoreTurnSource, PredictionService, create_server
+
+GAME = '2025-08-02_00:09:07.264659'
+
+class CountingSource(FeatureStoreTurnSource):
+    """Feature-store source that counts how often turn data is fetched"""
+    def __init__(self, store):
+        super().__init__(store)
+        self.fetches = 0
+
+    def turn_features(self, game_id, turn):
+        self.fetches += 1
+        return super().turn_features(game_id, turn)
+
+def make_service(tmp_path):
+    """Service over a two-turn game and a small fitted forest"""
+    predictor = LiveVictoryPredictor()
+    rng = np.random.default_rng(0)
+    rows = []
+    for turn in (10, 11):
+        for civ in ('CIVILIZATION_ROME', 'CIVILIZATION_MALI', 'CIVILIZATION_MAYA'):
+            row = {col: float(rng.integers(1, 30)) for col in predictor.feature_columns}
+            row.update(game_id=GAME, civilization=civ, game_turn=turn, will_win=int(civ == 'CIVILIZATION_ROME'))
+            rows.append(row)
+    df = pd.DataFrame(rows)
+    store = FeatureStore(tmp_path)
+    store.write(TRAINING_DATASET, df)
+
+    predictor.model = RandomForestClassifier(n_estimators=5, random_state=0).fit(
+        df[predictor.feature_columns], df['will_win'])
+    predictor.compiled_model = CompiledForest.from_estimator(predictor.model)
+    predictor.model_version = 'v0001'
+    return PredictionService(CountingSource(store), predictor), df
+
+def test_predictions_are_cached_per_turn(tmp_path):
+    """A turn is scored once; invalidation forces a fresh score"""
+    service, df = make_service(tmp_path)
+
+    first = service.predict(GAME, 10)
+    assert not first['cached']
+    assert first['model_version'] == 'v0001'
+    assert {p['civilization'] for p in first['predictions']} == {'CIVILIZATION_ROME', 'CIVILIZATION_MALI', 'CIVILIZATION_MAYA'}
+    probabilities = [p['win_probability'] for p in first['predictions']]
+    assert probabilities == sorted(probabilities, reverse=True)
+
+    second = service.predict(GAME, 10)
+    assert second['cached'] and second['predictions'] == first['predictions']
+    assert service.source.fetches == 1
+
+    service.invalidate(GAME, [10])
+    assert not service.predict(GAME, 10)['cached']
+    assert service.source.fetches == 2
+    assert service.predict(GAME, 99) is None
+
+def test_result_scored_across_an_invalidation_is_not_cached(tmp_path):
+    """A NOTIFY that lands while a turn is being scored keeps the stale result out of the cache"""
+    service, _ = make_service(tmp_path)
+    fetch = service.source.turn_features
+
+    def reloaded_while_fetching(game_id, turn):
+        rows = fetch(game_id, turn)
+        service.invalidate(game_id, [turn])
+        return rows
+
+    service.source.turn_features = reloaded_while_fetching
+    assert not service.predict(GAME, 10)['cached']
+    assert (GAME, 10) not in service.cache
+
+    service.source.turn_features = fetch
+    service.predict(GAME, 10)
+    assert service.predict(GAME, 10)['cached']
+
+def test_latest_pointer_is_only_cached_while_listening(tmp_path):
+    """Without the ingest listener the latest turn is looked up every time"""
+    service, _ = make_service(tmp_path)
+    assert service.predict_latest()['turn'] == 11
+    assert service.latest_key is None
+
+    service.listening = True
+    service.predict_latest()
+    assert service.latest_key == (GAME, 11)
+    service.invalidate(GAME, [11])
+    assert service.latest_key is None
+
+def test_http_routes(tmp_path):
+    """JSON over HTTP, with URL-encoded game ids and error statuses"""
+    service, _ = make_service(tmp_path)
+    server = create_server(service, port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    def get(path):
+        try:
+            with urllib.request.urlopen(base + path) as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read())
+
+    try:
+        status, body = get('/predict/latest')
+        assert status == 200 and body['game_id'] == GAME and body['turn'] == 11
+
+        status, body = get(f"/predict/{quote(GAME)}/10")
+        assert status == 200 and body['turn'] == 10
+
+        assert get(f"/predict/{quote(GAME)}/abc")[0] == 400
+        assert get(f"/predict/{quote(GAME)}/500")[0] == 404
+        assert get('/nope')[0] == 404
+
+        status, body = get('/health')
+        assert status == 200 and body['cached_turns'] == 2
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Test the batched whole-game win-probability timeline
+"""
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+from predict_winner import TIMELINE_COLUMNS, LiveVictoryPredictor, add_derived_features
+from stage4h_insert_data import build_copy_buffer
+
+RAW_COLUMNS = ['num_cities', 'population', 'techs', 'civics', 'yields_science', 'yields_culture',
+               'yields_production', 'buildings', 'districts', 'total_score',
+               'science_rank', 'cities_rank', 'score_rank', 'population_rank']
+
+def make_game_rows(turns=range(10, 40), civs=('CIVILIZATION_ROME', 'CIVILIZATION_MALI', 'CIVILIZATION_MAYA')):
+    """GAME_TIMELINE_QUERY-shaped rows for one game"""
+    rng = np.random.default_rng(0)
+    rows = []
+    for turn in turns:
+        for civ in civs:
+            row = {col: int(rng.integers(0, 40)) for col in RAW_COLUMNS}
+            row['num_cities'] = int(rng.integers(0, 3))  # some zero-city rows
+            row.update(game_id='g1', game_turn=turn, civilization=civ)
+            rows.append(row)
+    return pd.DataFrame(rows)
+
+def make_predictor():
+    """Predictor with a small forest fitted on the same feature columns"""
+    predictor = LiveVictoryPredictor()
+    training = add_derived_features(make_game_rows(turns=range(1, 30)))
+    y = (training['civilization'] == 'CIVILIZATION_ROME').astype(int)
+    predictor.model = RandomForestClassifier(n_estimators=10, random_state=0).fit(
+        training[predictor.feature_columns], y)
+    predictor.model_version = 'v0007'
+    return predictor
+
+def test_timeline_matches_turn_by_turn_scoring():
+    """One batched pass gives the same probabilities as scoring each turn separately"""
+    predictor = make_predictor()
+    game_data = add_derived_features(make_game_rows())
+
+    timeline = predictor.build_timeline(game_data)
+
+    assert len(timeline) == len(game_data)
+    assert timeline['model_version'].unique().tolist() == ['v0007']
+    for turn, turn_rows in game_data.groupby('game_turn'):
+        expected = predictor.predict_proba(turn_rows[predictor.feature_columns])[:, 1]
+        actual = timeline[timeline['game_turn'] == turn].set_index('civilization')['win_probability']
+        assert np.allclose(actual.loc[turn_rows['civilization']].values, expected)
+
+def test_probability_rank_per_turn():
+    """Rank 1 is the most likely winner of each turn"""
+    timeline = make_predictor().build_timeline(add_derived_features(make_game_rows()))
+
+    for _, turn_rows in timeline.groupby('game_turn'):
+        leader = turn_rows.loc[turn_rows['win_probability'].idxmax()]
+        assert leader['probability_rank'] == 1
+        assert turn_rows['probability_rank'].min() == 1
+
+def test_timeline_rows_serialize_for_copy():
+    """The COPY buffer has one line per civilization-turn in table column order"""
+    timeline = make_predictor().build_timeline(add_derived_features(make_game_rows(turns=[10])))
+
+    lines = build_copy_buffer(timeline, TIMELINE_COLUMNS).read().splitlines()
+    assert len(lines) == 3
+    assert lines[0].split('\t')[0:2] == ['g1', '10']
+    assert lines[0].split('\t')[-1] == 'v0007'
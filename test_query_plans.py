@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+EXPLAIN regression test: every per-game lookup the project runs against
+civ_game_data must be answerable from an index once the migrations are applied
+
+Needs the local PostgreSQL container; skipped when it isn't reachable.
+"""
+
+import json
+
+import psycopg2
+import pytest
+
+from ml_data_preparation import TRAINING_FEATURES_QUERY
+from stage4h_insert_data import get_db_config, prepare_schema
+
+CURRENT_GAME_SQL = "SELECT game_id FROM civ_game_data ORDER BY created_at DESC LIMIT 1"
+
+# Query text as issued by each caller (%s = a game_id)
+PROJECT_QUERIES = {
+    'current game (loader / ML / predict_winner / Superset)': CURRENT_GAME_SQL,
+    'table has rows (open_log_reader)': "SELECT EXISTS (SELECT 1 FROM civ_game_data)",
+    'latest game civs (resolve_game_id)': """
+        SELECT civilization, MIN(game_turn) FROM civ_game_data WHERE game_id = %s GROUP BY civilization
+    """,
+    'status (Superset /civ6/status)': f"""
+        SELECT MAX(game_turn), COUNT(DISTINCT civilization), COUNT(*)
+        FROM civ_game_data
+        WHERE game_id = ({CURRENT_GAME_SQL})
+    """,
+    'rankings (Superset /civ6/status)': f"""
+        SELECT civilization, total_score, yields_science, yields_culture
+        FROM civ_game_data
+        WHERE (game_id, game_turn) = (
+            SELECT game_id, MAX(game_turn)
+            FROM civ_game_data
+            WHERE game_id = ({CURRENT_GAME_SQL})
+            GROUP BY game_id
+        )
+        ORDER BY total_score DESC
+    """,
+    'current game data (LiveVictoryPredictor)': f"""
+        SELECT cgd.civilization, cgd.game_turn, cgd.num_cities, cgd.population, cgd.techs,
+               cgd.civics, cgd.yields_science, cgd.yields_culture, cgd.yields_production,
+               cgd.buildings, cgd.districts, cgd.total_score, cgd.game_id,
+               r.science_rank, r.cities_rank, r.score_rank, r.population_rank
+        FROM civ_game_data cgd
+        JOIN civ_turn_rankings r
+          ON r.game_id = cgd.game_id
+         AND r.game_turn = cgd.game_turn
+         AND r.civilization = cgd.civilization
+        WHERE (cgd.game_id, cgd.game_turn) = (
+            SELECT game_id, MAX(game_turn)
+            FROM civ_game_data
+            WHERE game_id = ({CURRENT_GAME_SQL})
+            GROUP BY game_id
+        )
+        ORDER BY cgd.total_score DESC
+    """,
+    'refresh turn rankings (load_new_turns)': """
+        SELECT game_id, game_turn, civilization,
+               RANK() OVER (PARTITION BY game_id, game_turn ORDER BY total_score DESC)
+        FROM civ_game_data
+        WHERE game_id = %s AND game_turn = ANY(ARRAY[1, 2, 3])
+    """,
+    'one civ history (final results)': """
+        SELECT game_turn, total_score FROM civ_game_data
+        WHERE game_id = %s AND civilization = 'CIVILIZATION_ROME'
+        ORDER BY game_turn
+    """,
+}
+
+@pytest.fixture(scope='module')
+def conn():
+    """Migrated database connection (skips the module without PostgreSQL)"""
+    try:
+        connection = psycopg2.connect(connect_timeout=3, **get_db_config(in_docker=False))
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"PostgreSQL not reachable: {e}")
+    prepare_schema(connection)
+    yield connection
+    connection.close()
+
+def _plan_nodes(plan):
+    """Flatten an EXPLAIN (FORMAT JSON) plan tree"""
+    yield plan
+    for child in plan.get('Plans', []):
+        yield from _plan_nodes(child)
+
+def _explain(cursor, query, params):
+    """EXPLAIN a query with sequential scans priced out, so available indexes get picked"""
+    cursor.execute("SET LOCAL enable_seqscan = off")
+    cursor.execute("EXPLAIN (FORMAT JSON) " + query, params if '%s' in query else None)
+    plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return list(_plan_nodes(plan[0]['Plan']))
+
+@pytest.mark.parametrize('name', sorted(PROJECT_QUERIES))
+def test_project_queries_use_indexes(conn, name):
+    """No sequential scan over civ_game_data (or any of its partitions)"""
+    with conn.cursor() as cursor:
+        nodes = _explain(cursor, PROJECT_QUERIES[name], ('benchmark_game',))
+    conn.rollback()
+
+    scans = [(node['Node Type'], node.get('Relation Name', '')) for node in nodes
+             if node.get('Relation Name', '').startswith('civ_game_data')]
+    assert scans, f"{name}: civ_game_data not scanned?"
+    seq_scans = [scan for scan in scans if scan[0] == 'Seq Scan']
+    assert not seq_scans, f"{name}: sequential scan in plan {scans}"
+
+def test_training_query_has_no_correlated_subplan(conn):
+    """Final turns are aggregated once, not re-queried per row"""
+    with conn.cursor() as cursor:
+        nodes = _explain(cursor, TRAINING_FEATURES_QUERY, None)
+    conn.rollback()
+
+    subplans = [node['Node Type'] for node in nodes if node.get('Parent Relationship') == 'SubPlan']
+    assert not subplans, f"correlated subquery in training query plan: {subplans}"
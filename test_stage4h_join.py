@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Test the vectorized turn/civ join in stage4h_insert_data against the
+original per-turn row builder
+"""
+
+import numpy as np
+import pandas as pd
+
+from stage4h_insert_data import (
+    build_civ_game_frame, build_turn_rows, frame_to_rows, build_copy_buffer
+)
+
+MAJORS = {"CIVILIZATION_ROME", "CIVILIZATION_CHINA", "CIVILIZATION_MALI"}
+
+def make_logs():
+    """Small logs (as read_log_csv names them) with a city-state, a missing stats2 row and a NaN"""
+    stats = pd.DataFrame({
+        'game_turn': [1, 1, 1, 2, 2, 2, 2],
+        'player_name': ["CIVILIZATION_ROME", "CIVILIZATION_CHINA", "CIVILIZATION_VILNIUS",
+                        "CIVILIZATION_ROME", "CIVILIZATION_MALI", "CIVILIZATION_CHINA",
+                        "CIVILIZATION_VILNIUS"],
+        'num_cities': [1, 1, 1, 2, 1, 1, 1],
+        'population': [3, 2, 1, 5, 2, np.nan, 1],
+        'yield_science': [2.7, 1.0, 0.5, 4.2, 1.9, 3.0, 0.5],
+        'balance_faith': [0, 0, 0, 1, 0, 2, 0],
+        'yield_faith': [0, 1, 0, 1, 1, 2, 0],
+    })
+    stats2 = pd.DataFrame({
+        'game_turn': [1, 1, 2, 2],
+        'player_name': ["CIVILIZATION_ROME", "CIVILIZATION_CHINA",
+                        "CIVILIZATION_ROME", "CIVILIZATION_CHINA"],
+        'buildings': [1, 0, 3, 2],
+        'tourism': [0, 0, 1, 0],
+    })
+    scores = pd.DataFrame({
+        'game_turn': [1, 1, 1, 2, 2, 2, 2],
+        'player_id': [0, 1, 2, 0, 1, 2, 63],
+        'total_score': [10, 12, 1, 20, 18, 9, 0],
+    })
+    return {'stats': stats, 'stats2': stats2, 'scores': scores}
+
+def test_frame_matches_per_turn_rows():
+    """The single-pass join must produce exactly the per-turn builder's rows"""
+    logs = make_logs()
+    expected = []
+    for turn in [1, 2]:
+        expected.extend(build_turn_rows(turn, logs, MAJORS, verbose=False))
+
+    frame = build_civ_game_frame(logs, [1, 2], MAJORS)
+
+    assert frame_to_rows(frame) == expected
+
+def test_frame_player_numbers_and_scores():
+    """Player numbers follow alphabetical order within each turn"""
+    frame = build_civ_game_frame(make_logs(), [2], MAJORS)
+
+    by_civ = frame.set_index('civilization')
+    assert by_civ.loc['CIVILIZATION_CHINA', 'player_number'] == 0
+    assert by_civ.loc['CIVILIZATION_MALI', 'player_number'] == 1
+    assert by_civ.loc['CIVILIZATION_ROME', 'player_number'] == 2
+    assert by_civ.loc['CIVILIZATION_ROME', 'total_score'] == 9
+    # Mali has no Player_Stats_2 record and missing columns default to 0
+    assert by_civ.loc['CIVILIZATION_MALI', 'buildings'] == 0
+    assert by_civ.loc['CIVILIZATION_MALI', 'techs'] == 0
+    assert (frame.drop(columns='civilization').dtypes == 'int64').all()
+
+def test_copy_buffer_accepts_frame():
+    """COPY buffer is one tab-separated line per civ/turn"""
+    frame = build_civ_game_frame(make_logs(), [1, 2], MAJORS)
+    lines = build_copy_buffer(frame).getvalue().splitlines()
+
+    assert len(lines) == len(frame)
+    assert lines[0].split('\t')[:3] == ['1', 'CIVILIZATION_ROME', '1']
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Test the (game_id, game_turn, civilization) upsert path in stage4h_insert_data
+"""
+
+import json
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from stage4h_insert_data import (
+    UPSERT_COLUMNS, upsert_sql, upsert_from_staging_sql, dedupe_natural_key,
+    build_copy_buffer, resolve_game_id, assign_legacy_sessions, refresh_turn_rankings,
+    notify_turns_loaded, TURNS_LOADED_CHANNEL
+)
+
+class RecordingCursor:
+    """Minimal DB-API cursor that answers queries from a list of canned results"""
+    def __init__(self, results):
+        self.results = list(results)
+        self.queries = []
+
+    def execute(self, sql, params=None):
+        self.queries.append((sql, params))
+        self._result = self.results.pop(0)
+
+    def fetchone(self):
+        return self._result[0] if self._result else None
+
+    def fetchall(self):
+        return self._result
+
+def test_upsert_sql_updates_everything_but_the_key():
+    """ON CONFLICT targets the natural key and overwrites the other columns"""
+    sql = upsert_sql()
+
+    assert "ON CONFLICT (game_id, game_turn, civilization) DO UPDATE SET" in sql
+    assert sql.count('%s') == len(UPSERT_COLUMNS)
+    assert "total_score = EXCLUDED.total_score" in sql
+    assert "game_turn = EXCLUDED.game_turn" not in sql
+    assert "FROM civ_game_data_staging" in upsert_from_staging_sql()
+
+def test_dedupe_keeps_last_row_per_key():
+    """A batch can't hit the same key twice, the later log row wins"""
+    frame = pd.DataFrame({
+        'game_id': ['g1', 'g1', 'g1', 'g2'],
+        'game_turn': [5, 5, 6, 5],
+        'civilization': ['CIVILIZATION_ROME'] * 4,
+        'total_score': [10, 12, 15, 3],
+    })
+    deduped = dedupe_natural_key(frame)
+
+    assert deduped['total_score'].tolist() == [12, 15, 3]
+
+def test_copy_buffer_with_game_id_first():
+    """Staging COPY rows lead with game_id"""
+    frame = pd.DataFrame([['g1', 1, 'CIVILIZATION_ROME'] + [0] * (len(UPSERT_COLUMNS) - 3)],
+                         columns=UPSERT_COLUMNS)
+    line = build_copy_buffer(frame, UPSERT_COLUMNS).getvalue().strip()
+
+    assert line.split('\t')[:3] == ['g1', '1', 'CIVILIZATION_ROME']
+
+def test_resolve_game_id_continues_or_starts_games():
+    """Shared major civs continue the latest game, disjoint civs start a new one"""
+    latest = [('2025-08-01_20:00:00',)]
+    cursor = RecordingCursor([latest, [('CIVILIZATION_ROME', 1), ('CIVILIZATION_MALI', 1)]])
+    game_id, civs = resolve_game_id(cursor, {'CIVILIZATION_ROME'}, first_turn=12)
+    assert game_id == '2025-08-01_20:00:00'
+    assert civs == {'CIVILIZATION_ROME', 'CIVILIZATION_MALI'}
+
+    cursor = RecordingCursor([latest, [('CIVILIZATION_ROME', 1)]])
+    game_id, civs = resolve_game_id(cursor, {'CIVILIZATION_POLAND'}, first_turn=1)
+    assert game_id != '2025-08-01_20:00:00'
+    assert civs == set()
+
+    game_id, civs = resolve_game_id(RecordingCursor([[]]), {'CIVILIZATION_ROME'})
+    assert game_id and civs == set()
+
+def test_resolve_game_id_turn_reset():
+    """Rewritten logs starting over at the first turn are a new game, a reloaded save is not"""
+    latest = [('2025-08-01_20:00:00',)]
+    first_turns = [('CIVILIZATION_ROME', 1), ('CIVILIZATION_MALI', 1)]
+
+    cursor = RecordingCursor([latest, first_turns])
+    game_id, _ = resolve_game_id(cursor, {'CIVILIZATION_ROME'}, first_turn=1, logs_restarted=True)
+    assert game_id != '2025-08-01_20:00:00'
+
+    cursor = RecordingCursor([latest, first_turns])
+    game_id, _ = resolve_game_id(cursor, {'CIVILIZATION_ROME'}, first_turn=80, logs_restarted=True)
+    assert game_id == '2025-08-01_20:00:00'
+
+    # A plain full re-read (lost checkpoints) of the same game keeps its id
+    cursor = RecordingCursor([latest, first_turns])
+    game_id, _ = resolve_game_id(cursor, {'CIVILIZATION_ROME'}, first_turn=1)
+    assert game_id == '2025-08-01_20:00:00'
+
+def test_assign_legacy_sessions():
+    """Legacy load batches merge into games on shared civs and increasing turns"""
+    t = [datetime(2025, 8, 1, 20, 0, 0, 500), datetime(2025, 8, 1, 20, 30),
+         datetime(2025, 8, 2, 7, 0), datetime(2025, 8, 2, 9, 0), datetime(2025, 8, 3, 10, 0)]
+    batches = [
+        (t[0], ['CIVILIZATION_ROME', 'CIVILIZATION_MALI'], 1),
+        (t[1], ['CIVILIZATION_ROME', 'CIVILIZATION_MALI'], 25),   # same game, later turns
+        (t[2], ['CIVILIZATION_POLAND', 'CIVILIZATION_MAYA'], 1),  # civ-set change
+        (t[3], ['CIVILIZATION_POLAND', 'CIVILIZATION_MAYA'], 40),
+        (t[4], ['CIVILIZATION_POLAND', 'CIVILIZATION_GAUL'], 1),  # turn reset
+    ]
+    assignments = assign_legacy_sessions(batches)
+
+    assert assignments[t[0]] == assignments[t[1]] == '2025-08-01_20:00:00.000500'
+    assert assignments[t[2]] == assignments[t[3]] == '2025-08-02_07:00:00'
+    assert assignments[t[4]] == '2025-08-03_10:00:00'
+
+def test_refresh_turn_rankings_targets_loaded_turns():
+    """Only the (game, turn) partitions of the load are re-ranked"""
+    cursor = RecordingCursor([[]])
+    cursor.rowcount = 12
+    refresh_turn_rankings(cursor, 'g1', [np.int64(7), np.int64(8)])
+
+    sql, params = cursor.queries[0]
+    assert "WHERE game_id = %s AND game_turn = ANY(%s)" in sql
+    assert "ON CONFLICT (game_id, game_turn, civilization) DO UPDATE" in sql
+    assert params == ('g1', [7, 8])
+    assert all(type(turn) is int for turn in params[1])
+
+def test_notify_turns_loaded_payload():
+    """The prediction server is told exactly which game and turns changed"""
+    cursor = RecordingCursor([[]])
+    notify_turns_loaded(cursor, 'g1', [np.int64(7), np.int64(8)])
+
+    sql, params = cursor.queries[0]
+    assert sql == "SELECT pg_notify(%s, %s)"
+    assert params[0] == TURNS_LOADED_CHANNEL
+    assert json.loads(params[1]) == {'game_id': 'g1', 'turns': [7, 8]}
@@ -7,38 +7,77 @@ This script trains a Random Forest classifier to predict Civ VI game winners
 based on Turn 20 performance metrics.
 
 Prerequisites:
-    - training_data.csv (generated by ml_data_preparation.py)
+    - feature_store/training_features (generated by ml_data_preparation.py)
     - Required packages: scikit-learn, pandas, numpy, matplotlib, seaborn
 
 Usage:
-    python victory_prediction_model.py
+    python victory_prediction_model.py                  # successive-halving search
+    python victory_prediction_model.py --search grid    # exhaustive grid (slowest)
+    python victory_prediction_model.py --search tpe --budget 30
+    python victory_prediction_model.py --cv logo        # leave-one-game-out tuning
+    python victory_prediction_model.py --incremental    # grow the saved forest with new games only
+    python victory_prediction_model.py --calibration sigmoid   # Platt instead of isotonic per game phase
 
 Output:
-    - trained_model.pkl: Saved Random Forest model
+    - models/<version>: Saved Random Forest model with its manifest (see model_registry.py)
     - feature_importance.csv: Feature importance rankings
     - model_performance_report.txt: Detailed evaluation metrics
     - confusion_matrix.png: Visualization of model performance
 """
 
+import argparse
+import hashlib
 import pandas as pd
 import numpy as np
-import pickle
 import matplotlib.pyplot as plt
 import seaborn as sns
 from datetime import datetime
 import os
 
-from sklearn.model_selection import train_test_split, cross_val_score, GridSearchCV
+from sklearn.model_selection import train_test_split, GroupShuffleSplit
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import (classification_report, confusion_matrix, 
                            accuracy_score, precision_score, recall_score, f1_score)
 from sklearn.preprocessing import StandardScaler
 
+from calibration import (METHODS as CALIBRATION_METHODS, PhaseCalibrator, calibration_report,
+                         out_of_fold_probabilities, print_calibration_report)
+from feature_attribution import permutation_importance, print_importance
+from feature_store import FeatureStore
+from group_cv import METHODS as CV_METHODS, GroupCrossValidator, print_fold_report
+from hyperparameter_search import DEFAULT_PARAMS, PARAM_GRID, STRATEGIES, CVEvaluator, get_strategy
+from ml_data_preparation import TRAINING_DATASET, finished_games
+from model_registry import ModelRegistry, hash_frame
+
+# Fewer games than this can't fill a held-out test split and calibration folds
+MIN_GROUP_SPLIT_GAMES = 3
+
 class VictoryPredictionModel:
-    def __init__(self):
-        """Initialize the victory prediction model trainer"""
+    def __init__(self, search='halving', search_budget=None, cv_method='group_kfold', cv_splits=5,
+                 calibration='isotonic'):
+        """Initialize the victory prediction model trainer
+        
+        search picks the hyperparameter strategy ('grid', 'halving' or 'tpe',
+        see hyperparameter_search.py); search_budget caps it in seconds.
+        cv_method ('group_kfold' or 'logo', see group_cv.py) sets how games
+        are folded during tuning. calibration ('isotonic', 'sigmoid' or None,
+        see calibration.py) is fitted per game phase and saved with the model.
+        """
         self.model = None
+        self.search = search
+        self.search_budget = search_budget
+        self.search_result = None
+        self.cv_method = cv_method
+        self.cv_splits = cv_splits
+        self.cv_folds = None
+        self.train_games = None
+        self.train_groups = None
+        self.calibration_method = calibration
+        self.calibrator = None
+        self.registry = ModelRegistry()
+        self.model_version = None
         self.scaler = StandardScaler()
+        self.feature_store = FeatureStore()
         self.feature_columns = [
             # Raw metrics
             'num_cities', 'population', 'techs', 'civics',
@@ -54,24 +93,39 @@ class VictoryPredictionModel:
     def load_training_data(self):
         """Load and validate training data"""
         try:
-            if not os.path.exists('training_data.csv'):
-                print("❌ training_data.csv not found!")
+            manifest = self.feature_store.manifest(TRAINING_DATASET)
+            if manifest is None and os.path.exists('training_data.csv'):
+                # One-off import of a training set prepared before the feature store existed
+                print("📦 Importing legacy training_data.csv into the feature store...")
+                manifest = self.feature_store.write(TRAINING_DATASET, pd.read_csv('training_data.csv'))
+            if manifest is None:
+                print(f"❌ {TRAINING_DATASET} not found in the feature store!")
                 print("   Please run ml_data_preparation.py first")
                 return None
                 
-            df = pd.read_csv('training_data.csv')
-            print(f"✅ Loaded training data: {len(df)} records")
-            
             # Validate required columns exist
-            missing_cols = [col for col in self.feature_columns if col not in df.columns]
+            missing_cols = [col for col in self.feature_columns if col not in manifest['schema']]
             if missing_cols:
                 print(f"❌ Missing required columns: {missing_cols}")
                 return None
                 
             # Check for target column
-            if 'will_win' not in df.columns:
+            if 'will_win' not in manifest['schema']:
                 print("❌ Target column 'will_win' not found")
                 return None
+            
+            # The current game's will_win is provisional - it is trained on once it has finished
+            games = finished_games(self.feature_store)
+            skipped = len(manifest['partitions']) - len(games)
+            if not games:
+                print("❌ No finished games in the feature store yet - only the current game")
+                return None
+            
+            # Only decode the columns training uses
+            df = self.feature_store.read(TRAINING_DATASET, columns=['game_id'] + self.feature_columns + ['will_win'],
+                                         games=games)
+            print(f"✅ Loaded training data: {len(df)} records from {len(games)} finished games"
+                  f"{' (current game left out)' if skipped else ''}")
                 
             return df
             
@@ -100,43 +154,74 @@ class VictoryPredictionModel:
         
         return X, y, df_clean
     
-    def train_model(self, X, y):
-        """Train Random Forest model with hyperparameter tuning"""
+    def train_model(self, X, y, groups=None):
+        """Train Random Forest model with hyperparameter tuning
+        
+        With groups (the game_id of each row) whole games are held out for
+        testing and tuning folds never split a game; without them rows are
+        split at random as before. The row split is also used while there
+        are fewer than MIN_GROUP_SPLIT_GAMES games.
+        """
         print("\n🤖 Training Random Forest model...")
         
-        # Split data for training and testing
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.3, random_state=42, stratify=y
-        )
+        if groups is not None and pd.Series(groups).nunique() < MIN_GROUP_SPLIT_GAMES:
+            print(f"⚠️  Only {pd.Series(groups).nunique()} game(s) - splitting rows at random until there are "
+                  f"{MIN_GROUP_SPLIT_GAMES}; per-game calibration is skipped")
+            groups = None
+            self.train_games = None
+            self.train_groups = None
+        
+        if groups is None:
+            # Split data for training and testing
+            X_train, X_test, y_train, y_test = train_test_split(
+                X, y, test_size=0.3, random_state=42, stratify=y
+            )
+        else:
+            # Hold out whole games so test turns come from games the model never saw
+            groups = np.asarray(groups).astype(str)
+            splitter = GroupShuffleSplit(n_splits=1, test_size=0.3, random_state=42)
+            train_idx, test_idx = next(splitter.split(X, y, groups))
+            X_train, X_test = X.iloc[train_idx], X.iloc[test_idx]
+            y_train, y_test = y.iloc[train_idx], y.iloc[test_idx]
+            self.train_games = sorted(np.unique(groups[train_idx]))
+            self.train_groups = groups[train_idx]
+            print(f"   Games: {len(self.train_games)} training, "
+                  f"{len(np.unique(groups[test_idx]))} held out")
         
         print(f"   Training set: {len(X_train)} samples")
         print(f"   Test set: {len(X_test)} samples")
         
-        # Define hyperparameter grid for tuning
-        param_grid = {
-            'n_estimators': [50, 100, 200],
-            'max_depth': [5, 10, 15, None],
-            'min_samples_split': [2, 5, 10],
-            'min_samples_leaf': [1, 2, 4]
-        }
-        
-        # Initialize Random Forest
-        rf = RandomForestClassifier(random_state=42)
-        
-        # Perform grid search with cross-validation
-        print("   Performing hyperparameter tuning...")
-        grid_search = GridSearchCV(
-            rf, param_grid, cv=5, scoring='accuracy', 
-            n_jobs=-1, verbose=0
-        )
-        
-        grid_search.fit(X_train, y_train)
-        
-        # Get best model
-        self.model = grid_search.best_estimator_
-        
-        print(f"✅ Best parameters: {grid_search.best_params_}")
-        print(f"✅ Cross-validation accuracy: {grid_search.best_score_:.3f}")
+        # Tune on the training split with the configured search strategy
+        print(f"   Performing hyperparameter tuning ({self.search} search)...")
+        if groups is None:
+            evaluator = CVEvaluator(X_train, y_train, cv=5)
+            result = get_strategy(self.search).run(evaluator, PARAM_GRID, self.search_budget)
+        else:
+            with GroupCrossValidator(X_train, y_train, groups[train_idx],
+                                     self.cv_method, self.cv_splits) as evaluator:
+                print(f"   {len(evaluator.folds)} {self.cv_method} folds on {evaluator.n_workers} worker(s)")
+                result = get_strategy(self.search).run(evaluator, PARAM_GRID, self.search_budget)
+                if result['best_params'] is not None:
+                    self.cv_folds = evaluator.folds_for(result['best_params'])
+        self.search_result = result
+        
+        if result['best_params'] is None:
+            print(f"⚠️  {self.search} search scored no configuration ({result['configurations']} tried) - "
+                  f"falling back to the default parameters")
+            result['best_params'] = dict(DEFAULT_PARAMS)
+        
+        # Refit the best configuration on the whole training split
+        self.model = RandomForestClassifier(random_state=42, n_jobs=-1, **result['best_params'])
+        self.model.fit(X_train, y_train)
+        
+        print(f"✅ Best parameters: {result['best_params']}")
+        if np.isfinite(result['best_score']):
+            print(f"✅ Cross-validation accuracy: {result['best_score']:.3f}")
+        print(f"   {result['configurations']} configurations, {result['fits']} fits "
+              f"in {result['seconds']:.1f}s{' (budget reached)' if result['budget_exhausted'] else ''}")
+        if self.cv_folds:
+            print("   Cross-validation folds for the best parameters:")
+            print_fold_report(self.cv_folds)
         
         return X_train, X_test, y_train, y_test
     
@@ -182,8 +267,40 @@ class VictoryPredictionModel:
             'y_test_pred': y_test_pred
         }
     
-    def analyze_feature_importance(self):
-        """Analyze and visualize feature importance"""
+    def calibrate_model(self, X_train, X_test, y_train, y_test):
+        """Fit per-game-phase calibration and measure it on the held-out games
+        
+        The calibrator learns from out-of-fold probabilities of the training
+        games (same hyperparameters, never the row's own game), not from the
+        final model's in-sample probabilities.
+        """
+        if self.calibration_method is None:
+            return {}
+        if self.train_groups is None:
+            print("\n📐 Calibration skipped - it needs whole training games (see MIN_GROUP_SPLIT_GAMES)")
+            return {}
+        
+        print(f"\n📐 Calibrating win probabilities per game phase ({self.calibration_method})...")
+        params = {key: self.model.get_params()[key] for key in PARAM_GRID}
+        oof = out_of_fold_probabilities(params, X_train, y_train, self.train_groups, self.cv_splits)
+        self.calibrator = PhaseCalibrator(self.calibration_method).fit(oof, X_train['game_turn'], y_train,
+                                                                       self.train_groups)
+        print(f"   Calibrated phases: {', '.join(self.calibrator.calibrated_phases) or 'none yet (too few games)'}")
+        
+        raw = self.model.predict_proba(X_test)[:, 1]
+        rows = calibration_report(y_test, X_test['game_turn'], raw,
+                                  self.calibrator.transform(raw, X_test['game_turn']))
+        print_calibration_report(rows)
+        overall = rows[-1]
+        return {key: overall[key] for key in ('ece_raw', 'ece_calibrated', 'brier_raw', 'brier_calibrated')}
+    
+    def analyze_feature_importance(self, X_test=None, y_test=None):
+        """Analyze and visualize feature importance
+        
+        With a test set, permutation importance on the held-out games is
+        added next to the impurity importances (see feature_attribution.py;
+        cached per model artifact).
+        """
         print("\n🎯 Analyzing feature importance...")
         
         # Get feature importances
@@ -193,9 +310,21 @@ class VictoryPredictionModel:
             'importance': importances
         }).sort_values('importance', ascending=False)
         
-        print("   Top 10 Most Important Features:")
-        for i, (_, row) in enumerate(feature_importance_df.head(10).iterrows(), 1):
-            print(f"   {i:2d}. {row['feature']:20s} ({row['importance']:.3f})")
+        if X_test is None:
+            print("   Top 10 Most Important Features:")
+            for i, (feature, importance) in enumerate(zip(feature_importance_df['feature'].head(10),
+                                                          feature_importance_df['importance'].head(10)), 1):
+                print(f"   {i:2d}. {feature:20s} ({importance:.3f})")
+        else:
+            start = datetime.now()
+            permutation = permutation_importance(self.model, X_test, y_test)
+            seconds = (datetime.now() - start).total_seconds()
+            print(f"   Permutation importance on {len(X_test)} held-out rows ({seconds:.2f}s), top 10:")
+            print_importance(permutation, dict(zip(self.feature_columns, importances)), n=10)
+            feature_importance_df = feature_importance_df.merge(
+                permutation[['feature', 'importance_mean', 'importance_std']].rename(columns={
+                    'importance_mean': 'permutation_importance', 'importance_std': 'permutation_std'}),
+                on='feature', how='left')
         
         # Save feature importance
         feature_importance_df.to_csv('feature_importance.csv', index=False)
@@ -236,17 +365,116 @@ class VictoryPredictionModel:
             print(f"⚠️  Could not create confusion matrix plot: {e}")
             print("   (matplotlib/seaborn may not be available)")
     
-    def save_model(self):
-        """Save the trained model"""
+    def save_model(self, metrics=None, data_hash=None, lineage=None):
+        """Save the trained model as a new registry version"""
         try:
-            with open('trained_model.pkl', 'wb') as f:
-                pickle.dump(self.model, f)
-            print("✅ Trained model saved to: trained_model.pkl")
+            calibration = self.calibrator.to_dict() if self.calibrator is not None else None
+            manifest = self.registry.save(self.model, self.feature_columns, metrics=metrics,
+                                          data_hash=data_hash, lineage=lineage, calibration=calibration)
+            self.model_version = manifest['version']
+            print(f"✅ Trained model saved to: {self.registry.root}/{manifest['version']}")
             return True
         except Exception as e:
             print(f"❌ Error saving model: {e}")
             return False
     
+    def load_model(self):
+        """Load the latest registry version (rejects a different feature schema)"""
+        try:
+            self.model, manifest = self.registry.load(feature_columns=self.feature_columns)
+            if manifest is None:
+                print("❌ No saved model - run a full training first")
+                return None
+            self.model_version = manifest['version']
+            self.calibrator = PhaseCalibrator.from_dict(manifest.get('calibration'))
+            return manifest
+        except Exception as e:
+            print(f"❌ Error loading model: {e}")
+            return None
+    
+    def load_lineage(self):
+        """Lineage of every registry version, oldest first"""
+        lineage = []
+        for version in self.registry.versions():
+            manifest = self.registry.manifest(version)
+            if manifest.get('lineage'):
+                lineage.append(dict(manifest['lineage'], version=version))
+        return lineage
+    
+    def build_lineage(self, mode, games, new_games, rows_seen, **details):
+        """Which games a model version has seen (stored in its registry manifest)"""
+        lineage = {
+            'mode': mode,
+            'params': {key: self.model.get_params()[key] for key in PARAM_GRID},
+            'games_seen': sorted(games),
+            'new_games': sorted(new_games),
+            'rows_seen': int(rows_seen),
+            **details,
+        }
+        print(f"🧬 Lineage: {len(lineage['games_seen'])} games seen ({len(lineage['new_games'])} new)")
+        return lineage
+    
+    def grow_forest(self, X_new, y_new, rows_seen):
+        """Add trees fitted only on the new rows, in proportion to their share of all rows
+        
+        The existing trees and hyperparameters are kept (warm_start), so the
+        cost depends on the new rows only. Returns the number of trees added.
+        """
+        n_existing = len(self.model.estimators_)
+        n_new = max(1, int(round(n_existing * len(X_new) / max(rows_seen, 1))))
+        self.model.set_params(warm_start=True, n_estimators=n_existing + n_new)
+        self.model.fit(X_new, y_new)
+        self.model.set_params(warm_start=False)
+        return n_new
+    
+    def run_incremental_training(self):
+        """Grow the saved model with the games it hasn't seen yet"""
+        print("🚀 Incremental Victory Prediction Model Training")
+        print("=" * 50)
+        
+        manifest = self.load_model()
+        if manifest is None:
+            return False
+        latest = manifest.get('lineage')
+        if not latest:
+            print(f"❌ Model {manifest['version']} has no lineage - run a full training first")
+            return False
+        
+        seen = set(latest['games_seen'])
+        # The current game's labels are provisional - it is learned once it has finished
+        new_games = [game for game in finished_games(self.feature_store) if game not in seen]
+        if not new_games:
+            print(f"✅ Model {manifest['version']} has already seen every finished game in the feature store")
+            return True
+        
+        # Only the new games are read and fitted
+        df = self.feature_store.read(TRAINING_DATASET, columns=['game_id'] + self.feature_columns + ['will_win'],
+                                     games=new_games)
+        X_new, y_new, _ = self.prepare_features(df)
+        if y_new.nunique() < 2:
+            print("⚠️  New games have only one outcome class - waiting for more games before retraining")
+            return False
+        
+        # Accuracy on the new games before they are learned (they are unseen data for the old model)
+        new_game_accuracy = accuracy_score(y_new, self.model.predict(X_new))
+        print(f"\n🎯 Current model on {len(new_games)} new game(s): {new_game_accuracy:.3f} accuracy")
+        
+        start = datetime.now()
+        rows_seen = latest['rows_seen'] + len(X_new)
+        n_new = self.grow_forest(X_new, y_new, rows_seen)
+        seconds = (datetime.now() - start).total_seconds()
+        print(f"🌲 Added {n_new} trees fitted on {len(X_new)} new rows in {seconds:.2f}s "
+              f"({self.model.n_estimators} trees total, params from {manifest['version']})")
+        if self.calibrator is not None:
+            print(f"   Calibration carried over from {manifest['version']} - a full training refits it")
+        
+        # Chain the data hash so it still identifies every row the model has seen
+        data_hash = hashlib.sha256(f"{manifest['data_hash']}:{hash_frame(df)}".encode('utf-8')).hexdigest()
+        lineage = self.build_lineage('incremental', seen | set(new_games), new_games, rows_seen,
+                                     trees=self.model.n_estimators, trees_added=n_new,
+                                     parent_version=manifest['version'])
+        return self.save_model({'new_game_accuracy_before_update': new_game_accuracy}, data_hash, lineage)
+    
     def generate_performance_report(self, metrics, feature_importance_df, df):
         """Generate comprehensive performance report"""
         report = []
@@ -269,6 +497,10 @@ class VictoryPredictionModel:
         report.append(f"Precision: {metrics['test_precision']:.1%}")
         report.append(f"Recall: {metrics['test_recall']:.1%}")
         report.append(f"F1-Score: {metrics['test_f1']:.1%}")
+        if 'ece_calibrated' in metrics:
+            report.append(f"Calibration Error (ECE): {metrics['ece_raw']:.3f} raw -> "
+                          f"{metrics['ece_calibrated']:.3f} {self.calibration_method}")
+            report.append(f"Brier Score: {metrics['brier_raw']:.3f} raw -> {metrics['brier_calibrated']:.3f} calibrated")
         report.append("")
         
         # Interpretation
@@ -358,26 +590,33 @@ class VictoryPredictionModel:
         X, y, df_clean = self.prepare_features(df)
         
         # Step 3: Train model
-        X_train, X_test, y_train, y_test = self.train_model(X, y)
+        groups = df_clean['game_id'] if 'game_id' in df_clean.columns else None
+        X_train, X_test, y_train, y_test = self.train_model(X, y, groups)
         
         # Step 4: Evaluate model
         metrics = self.evaluate_model(X_train, X_test, y_train, y_test)
         
+        # Step 4b: Calibrate probabilities per game phase on out-of-fold predictions
+        metrics.update(self.calibrate_model(X_train, X_test, y_train, y_test))
+        
         # Step 5: Analyze feature importance
-        feature_importance_df = self.analyze_feature_importance()
+        feature_importance_df = self.analyze_feature_importance(X_test, y_test)
         
         # Step 6: Create visualizations
         self.create_confusion_matrix_plot(metrics['y_test'], metrics['y_test_pred'])
         
-        # Step 7: Save model
-        self.save_model()
+        # Step 7: Save model with its metrics, data hash and lineage
+        train_games = self.train_games if self.train_games is not None else sorted(df_clean['game_id'].astype(str).unique())
+        lineage = self.build_lineage('full', train_games, train_games, len(X_train), trees=self.model.n_estimators)
+        scalar_metrics = {key: float(value) for key, value in metrics.items() if np.isscalar(value)}
+        self.save_model(scalar_metrics, hash_frame(pd.concat([X_train, y_train], axis=1)), lineage)
         
         # Step 8: Generate comprehensive report
         self.generate_performance_report(metrics, feature_importance_df, df_clean)
         
         print("\n🎉 Model training completed successfully!")
         print("Generated files:")
-        print("  📦 trained_model.pkl - Saved Random Forest model")
+        print(f"  📦 {self.registry.root}/{self.model_version} - Saved Random Forest model, manifest and lineage")
         print("  📊 feature_importance.csv - Feature rankings")
         print("  📋 model_performance_report.txt - Detailed analysis")
         print("  📈 confusion_matrix.png - Performance visualization")
@@ -386,6 +625,25 @@ class VictoryPredictionModel:
         return True
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the Civ VI victory prediction model")
+    parser.add_argument('--search', choices=list(STRATEGIES), default='halving',
+                        help="Hyperparameter search strategy (default: successive halving)")
+    parser.add_argument('--budget', type=float, default=None,
+                        help="Wall-clock budget for the hyperparameter search in seconds")
+    parser.add_argument('--cv', choices=list(CV_METHODS), default='group_kfold',
+                        help="Game-grouped CV: GroupKFold or leave-one-game-out")
+    parser.add_argument('--folds', type=int, default=5, help="Folds for --cv group_kfold")
+    parser.add_argument('--calibration', choices=list(CALIBRATION_METHODS) + ['none'], default='isotonic',
+                        help="Per-game-phase probability calibration (default: isotonic)")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Grow the saved model with games it hasn't seen (no search, no full refit)")
+    args = parser.parse_args()
+    
     # Run the model training process
-    trainer = VictoryPredictionModel()
-    trainer.run_training()
+    trainer = VictoryPredictionModel(search=args.search, search_budget=args.budget,
+                                     cv_method=args.cv, cv_splits=args.folds,
+                                     calibration=None if args.calibration == 'none' else args.calibration)
+    if args.incremental:
+        trainer.run_incremental_training()
+    else:
+        trainer.run_training()